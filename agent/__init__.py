@@ -0,0 +1,40 @@
+# Agent loop package
+# Modules are imported on first access (PEP 562), so importing the package stays cheap
+import importlib
+
+_EXPORTS = {
+    'ToolCall': '.actions',
+    'extract_actions': '.actions',
+    'parse_action': '.actions',
+    'execute_actions': '.actions',
+    'execute_tool_calls': '.actions',
+    'format_observations': '.actions',
+    'compact_observations': '.compaction',
+    'ConversationContext': '.context',
+    'build_tool_schemas': '.tool_schema',
+    'SessionResult': '.session',
+    'configure_environment': '.session',
+    'create_model': '.session',
+    'create_available_tools': '.session',
+    'run_session': '.session',
+}
+
+__all__ = [
+    'ConversationContext', 'SessionResult', 'ToolCall',
+    'extract_actions', 'parse_action', 'execute_actions', 'execute_tool_calls', 'format_observations',
+    'compact_observations',
+    'build_tool_schemas',
+    'configure_environment', 'create_model', 'create_available_tools', 'run_session'
+]
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
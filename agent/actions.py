@@ -0,0 +1,229 @@
+import json
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+from utils.parallel import ThreadPerTaskExecutor, run_parallel
+from utils.tracing import current_span, trace_span
+
+# Every tool call gets its own thread, calls abandoned at their timeout never delay other
+# sessions' calls; the HTTP transport's per-host limit caps the requests actually in flight
+_tool_executor = ThreadPerTaskExecutor(thread_name_prefix="agent-tool")
+
+
+def extract_actions(llm_output: str) -> List[str]:
+    """
+    Extract the Action lines of one model turn
+
+    Models sometimes keep writing after their Actions and invent an Observation
+    followed by further Actions that depend on it. Only Actions written before the
+    first Observation are returned, since those are the independent ones. A finish
+    Action ends the list, its answer may span several lines and runs up to the last
+    closing parenthesis.
+
+    Args:
+        llm_output: Raw model output
+
+    Returns:
+        Action strings in the order they appear, e.g. ['get_weather(city="Madrid")']
+    """
+    observation_match = re.search(r"^\s*Observation", llm_output, re.MULTILINE)
+    if observation_match:
+        llm_output = llm_output[:observation_match.start()]
+
+    actions = []
+    for match in re.finditer(r"Action: ([^\n]+)", llm_output):
+        action = match.group(1).strip()
+        if action.startswith("finish"):
+            call = llm_output[match.start(1):]
+            end = call.rfind(")")
+            actions.append(call[:end + 1].strip() if end != -1 else call.strip())
+            break
+        actions.append(action)
+    return actions
+
+
+def parse_action(action_str: str) -> Tuple[str, dict]:
+    """
+    Parse a tool call such as 'calculate_budget(city="Rome", attractions="Colosseum", days=2)'
+
+    Args:
+        action_str: Action string
+
+    Returns:
+        Tuple of (tool name, keyword arguments)
+
+    Raises:
+        ValueError: If the action string is not a function call
+    """
+    tool_match = re.search(r"(\w+)\((.*)\)", action_str)
+    if not tool_match:
+        raise ValueError(f"Unable to parse Action format '{action_str}'")
+
+    tool_name = tool_match.group(1)
+    args_str = tool_match.group(2)
+    kwargs = {}
+
+    # Parse quoted string parameters, values may contain escaped quotes (\")
+    string_params = re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', args_str)
+    for key, value in string_params:
+        kwargs[key] = value.replace('\\"', '"')
+
+    # Parse numeric parameters (without quotes)
+    number_params = re.findall(r'(\w+)=(\d+(?:\.\d+)?)', args_str)
+    for key, value in number_params:
+        # Try to convert to integer, if failed then convert to float
+        try:
+            kwargs[key] = int(value)
+        except ValueError:
+            kwargs[key] = float(value)
+
+    return tool_name, kwargs
+
+
+class ToolCall:
+    """A structured tool call returned by a function-calling model"""
+
+    def __init__(self, name: str, arguments: Optional[dict], call_id: Optional[str] = None,
+                 error: Optional[str] = None):
+        """
+        Args:
+            name: Tool name
+            arguments: Decoded JSON arguments, None if they could not be decoded
+            call_id: Provider's id of the call, needed to send the result back
+            error: Why the arguments could not be decoded
+        """
+        self.name = name
+        self.arguments = arguments
+        self.call_id = call_id
+        self.error = error
+
+    def __str__(self) -> str:
+        """Render in Action format, e.g. get_weather(city="Madrid")"""
+        arguments = ", ".join(f"{key}={json.dumps(value, ensure_ascii=False)}"
+                              for key, value in (self.arguments or {}).items())
+        return f"{self.name}({arguments})"
+
+
+def _call_tool(tool_name: str, kwargs: dict, available_tools: Dict[str, Callable]) -> str:
+    """Call a tool by name inside a trace span, errors are returned as observation text"""
+    if tool_name not in available_tools:
+        return f"Error: Undefined tool '{tool_name}'"
+
+    with trace_span(tool_name, "tool") as span:
+        try:
+            observation = available_tools[tool_name](**kwargs)
+        except Exception as e:
+            observation = f"Error: Problem calling tool '{tool_name}' - {e}"
+            if span is not None:
+                span.error = type(e).__name__
+        if span is not None:
+            span.set(observation_chars=len(str(observation)))
+            # Tools report their own failures as "Error: ..." observations
+            if span.error is None and str(observation).startswith("Error"):
+                span.error = "ToolError"
+        return observation
+
+
+def execute_tool_call(call: ToolCall, available_tools: Dict[str, Callable]) -> str:
+    """Execute a structured tool call, its typed arguments are passed straight to the tool"""
+    if call.error:
+        return f"Error: Invalid arguments for tool '{call.name}' - {call.error}"
+    return _call_tool(call.name, call.arguments or {}, available_tools)
+
+
+def execute_action(action_str: str, available_tools: Dict[str, Callable]) -> str:
+    """
+    Execute a single Action and return its observation, errors are returned as text
+
+    Args:
+        action_str: Action string
+        available_tools: Mapping of tool name to tool function
+
+    Returns:
+        Observation text
+    """
+    try:
+        tool_name, kwargs = parse_action(action_str)
+    except ValueError as e:
+        return f"Error: {e}"
+
+    return _call_tool(tool_name, kwargs, available_tools)
+
+
+def execute_actions(action_strs: List[str], available_tools: Dict[str, Callable],
+                    timeout: Optional[float] = None) -> List[str]:
+    """
+    Execute independent Actions concurrently, each on its own worker thread
+
+    Args:
+        action_strs: Action strings of one model turn
+        available_tools: Mapping of tool name to tool function
+        timeout: Seconds to wait for the calls, a call still running afterwards gets a timeout observation
+
+    Returns:
+        One observation per Action, in the same order
+    """
+    return _run_concurrently([
+        (lambda action_str=action_str: execute_action(action_str, available_tools))
+        for action_str in action_strs
+    ], timeout)
+
+
+def execute_tool_calls(calls: List[ToolCall], available_tools: Dict[str, Callable],
+                       timeout: Optional[float] = None) -> List[str]:
+    """
+    Execute independent structured tool calls concurrently, each on its own worker thread
+
+    Args:
+        calls: Tool calls of one model turn
+        available_tools: Mapping of tool name to tool function
+        timeout: Seconds to wait for the calls, a call still running afterwards gets a timeout observation
+
+    Returns:
+        One observation per call, in the same order
+    """
+    return _run_concurrently([
+        (lambda call=call: execute_tool_call(call, available_tools))
+        for call in calls
+    ], timeout)
+
+
+def _run_concurrently(tasks: List[Callable[[], str]], timeout: Optional[float] = None) -> List[str]:
+    """Run observation-producing tasks, a single task without timeout runs on the calling thread"""
+    if len(tasks) == 1 and timeout is None:
+        return [tasks[0]()]
+    if timeout is not None and timeout <= 0:
+        return ["Error: Tool call skipped, no time left before the session deadline"] * len(tasks)
+
+    outcomes = run_parallel(_tool_executor, tasks, timeout=timeout)
+    # Slow calls are abandoned, the model continues without them. Their HTTP requests were sent
+    # with the remaining time as timeout, so they end in the background shortly afterwards
+    timed_out = sum(1 for outcome in outcomes if outcome.timed_out)
+    span = current_span()
+    if timed_out and span is not None:
+        span.increment("tool_timeouts", timed_out)
+    return [
+        f"Error: Tool call timed out after {timeout:.1f}s, continue without its result" if outcome.timed_out
+        else outcome.value if outcome.ok else f"Error: {outcome.error}"
+        for outcome in outcomes
+    ]
+
+
+def format_observations(action_strs: List[str], observations: List[str]) -> str:
+    """
+    Combine the observations of one turn into a single message
+
+    Args:
+        action_strs: Executed Action strings
+        observations: Observation of each Action, same order
+
+    Returns:
+        'Observation: ...' for a single Action, numbered observations otherwise
+    """
+    if len(observations) == 1:
+        return f"Observation: {observations[0]}"
+
+    lines = []
+    for i, (action_str, observation) in enumerate(zip(action_strs, observations), 1):
+        lines.append(f"Observation {i} [{action_str}]: {observation}")
+    return "\n".join(lines)
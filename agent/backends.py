@@ -0,0 +1,225 @@
+import json
+import os
+from typing import List, Optional, Tuple
+
+from utils.llm_cache import get_llm_cache
+from utils.llm_client import OpenAICompatibleClient, STOP_SEQUENCES
+from utils.scheduler import get_scheduler
+from .actions import ToolCall
+
+# "camel" uses camel's ChatAgent, "streaming" streams completions and stops right after the Actions,
+# "native" uses the provider's function-calling API with schemas generated from the tools
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "camel")
+
+
+# Rough token estimate for backends whose provider does not report usage
+CHARS_PER_TOKEN = 4
+
+
+class LLMTurn:
+    """One model output: free text and, for function-calling backends, structured tool calls"""
+
+    def __init__(self, text: str, tool_calls: Optional[List[ToolCall]] = None, usage: Optional[dict] = None):
+        """
+        Args:
+            text: Model text
+            tool_calls: Structured tool calls
+            usage: {"prompt_tokens", "completion_tokens"} and "estimated" if they were
+                estimated from the text length instead of reported by the provider
+        """
+        self.text = text
+        self.tool_calls = tool_calls or []
+        self.usage = usage
+
+
+def _estimated_usage(prompt_chars: int, output: str) -> dict:
+    return {"prompt_tokens": prompt_chars // CHARS_PER_TOKEN,
+            "completion_tokens": len(output) // CHARS_PER_TOKEN,
+            "estimated": True}
+
+
+def _reported_usage(usage) -> Optional[dict]:
+    """Normalize a provider usage record (dict or object), None if it has no token counts"""
+    if usage is None:
+        return None
+    get = usage.get if isinstance(usage, dict) else (lambda key: getattr(usage, key, None))
+    prompt_tokens, completion_tokens = get("prompt_tokens"), get("completion_tokens")
+    if prompt_tokens is None and completion_tokens is None:
+        return None
+    return {"prompt_tokens": prompt_tokens or 0, "completion_tokens": completion_tokens or 0, "estimated": False}
+
+
+class CamelBackend:
+    """
+    Stateful chat backend built on camel's ChatAgent, which keeps its own memory
+
+    With the LLM response cache enabled, a turn is answered from the cache when
+    the whole conversation so far matches a stored one. Cached turns never reach
+    the agent, so they are written into its memory before the next live call.
+    """
+
+    def __init__(self, model, system_prompt: str):
+        from camel.agents import ChatAgent
+
+        self.agent = ChatAgent(
+            model=model,
+            output_language='English',
+            system_message=system_prompt
+        )
+        self.model_name = str(getattr(model, "model_type", type(model).__name__))
+        self.system_prompt = system_prompt
+        self.cache = get_llm_cache()
+        self._history: List[dict] = []
+        # Cached (user, assistant) turns not yet in the agent's memory
+        self._unrecorded: List[Tuple[str, str]] = []
+
+    def step(self, message: str) -> LLMTurn:
+        """Send the new message and return the model output"""
+        if self.cache is None:
+            return self._step(message)
+
+        self._history.append({'role': 'user', 'content': message})
+        key = self.cache.make_key(self.model_name, self.system_prompt, self._history, {"stop": STOP_SEQUENCES})
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._unrecorded.append((message, cached["text"]))
+            turn = LLMTurn(cached["text"], usage={"prompt_tokens": 0, "completion_tokens": 0, "estimated": False})
+        else:
+            self._record_cached_turns()
+            turn = self._step(message)
+            self.cache.set(key, {"text": turn.text})
+        self._history.append({'role': 'assistant', 'content': turn.text})
+        return turn
+
+    def _step(self, message: str) -> LLMTurn:
+        # The agent's memory makes every call unique, so calls are only rate limited
+        response = get_scheduler().call("llm", None, lambda: self.agent.step(message))
+        text = response.msgs[0].content
+        usage = _reported_usage((response.info or {}).get("usage"))
+        return LLMTurn(text, usage=usage or _estimated_usage(len(message), text))
+
+    def _record_cached_turns(self):
+        if not self._unrecorded:
+            return
+        from camel.messages import BaseMessage
+        from camel.types import OpenAIBackendRole
+
+        for user_text, assistant_text in self._unrecorded:
+            self.agent.update_memory(BaseMessage.make_user_message("User", user_text), OpenAIBackendRole.USER)
+            self.agent.update_memory(BaseMessage.make_assistant_message("Assistant", assistant_text),
+                                     OpenAIBackendRole.ASSISTANT)
+        self._unrecorded = []
+
+    def reset(self):
+        """Forget the conversation, the system prompt is kept"""
+        self.agent.reset()
+        self._history = []
+        self._unrecorded = []
+
+
+class StreamingBackend:
+    """
+    Stateful chat backend that streams completions from an OpenAI-compatible API
+
+    Generation is cut off as soon as the Action lines of a turn are complete, so
+    the loop does not wait for (or pay for) text the model writes after them.
+    """
+
+    def __init__(self, client: OpenAICompatibleClient, system_prompt: str):
+        self.client = client
+        self.system_prompt = system_prompt
+        self.messages: List[dict] = []
+
+    def step(self, message: str) -> LLMTurn:
+        """Send the new message and return the model output"""
+        self.messages.append({'role': 'user', 'content': message})
+        messages = [{'role': 'system', 'content': self.system_prompt}] + self.messages
+        output = self.client.chat(messages, stream=True, stop_at_action=True)
+        self.messages.append({'role': 'assistant', 'content': output})
+        # Streams are closed early, so the provider never reports usage
+        prompt_chars = sum(len(message['content'] or "") for message in messages)
+        return LLMTurn(output, usage=_estimated_usage(prompt_chars, output))
+
+    def reset(self):
+        """Forget the conversation, the system prompt is kept"""
+        self.messages = []
+
+
+class NativeToolBackend:
+    """
+    Stateful chat backend using the OpenAI-compatible function-calling API
+
+    Tool calls come back as structured JSON arguments, so they never fail to
+    parse the way text Actions can. If the model answers with plain text
+    instead, the session falls back to parsing it as ReAct Actions.
+    """
+
+    def __init__(self, client: OpenAICompatibleClient, system_prompt: str, tool_schemas: List[dict]):
+        self.client = client
+        self.system_prompt = system_prompt
+        self.tool_schemas = tool_schemas
+        self.messages: List[dict] = []
+
+    def step(self, message: str) -> LLMTurn:
+        """Send the new message (may be empty right after tool results) and return the model output"""
+        if message:
+            self.messages.append({'role': 'user', 'content': message})
+        reply = self.client.chat_with_tools(
+            [{'role': 'system', 'content': self.system_prompt}] + self.messages,
+            self.tool_schemas
+        )
+
+        assistant_message = {'role': 'assistant', 'content': reply["content"]}
+        if reply["tool_calls"]:
+            assistant_message['tool_calls'] = reply["tool_calls"]
+        self.messages.append(assistant_message)
+
+        tool_calls = []
+        for raw_call in reply["tool_calls"]:
+            name = raw_call["function"]["name"]
+            try:
+                arguments = json.loads(raw_call["function"]["arguments"])
+                if not isinstance(arguments, dict):
+                    raise ValueError("arguments must be a JSON object")
+                tool_calls.append(ToolCall(name, arguments, call_id=raw_call["id"]))
+            except ValueError as e:
+                tool_calls.append(ToolCall(name, None, call_id=raw_call["id"], error=str(e)))
+        return LLMTurn(reply["content"], tool_calls, usage=_reported_usage(reply.get("usage")))
+
+    def add_tool_results(self, results: List[Tuple[str, str]]):
+        """
+        Record tool results, they are sent with the next step
+
+        Args:
+            results: (tool call id, observation) pairs
+        """
+        for call_id, content in results:
+            self.messages.append({'role': 'tool', 'tool_call_id': call_id, 'content': content})
+
+    def reset(self):
+        """Forget the conversation, the system prompt is kept"""
+        self.messages = []
+
+
+def uses_native_tools(model, mode: str = LLM_BACKEND) -> bool:
+    """Whether sessions on this model should use the function-calling API"""
+    return mode == "native" and isinstance(model, OpenAICompatibleClient)
+
+
+def create_backend(model, system_prompt: str, tool_schemas: Optional[List[dict]] = None):
+    """
+    Wrap a model created by agent.session.create_model() into a per-session chat backend
+
+    Args:
+        model: camel model backend or OpenAICompatibleClient
+        system_prompt: System prompt of the agent
+        tool_schemas: Function-calling schemas, selects the native tool-calling backend
+
+    Returns:
+        Backend with step(message) -> LLMTurn and reset()
+    """
+    if tool_schemas is not None:
+        return NativeToolBackend(model, system_prompt, tool_schemas)
+    if isinstance(model, OpenAICompatibleClient):
+        return StreamingBackend(model, system_prompt)
+    return CamelBackend(model, system_prompt)
@@ -0,0 +1,232 @@
+"""
+Compaction of tool observations before they enter the model's prompt
+
+Tool output is written for people: a Tavily answer in full paragraphs, budget
+text with tips repeated on every call. Every later turn pays for it again as
+prompt tokens. Each tool gets a compactor that keeps what the model needs to
+plan the next step (attraction names with a one-line reason, price figures)
+and every result is capped at OBSERVATION_MAX_CHARS. Only the model's context
+gets the compacted text; the report keeps the raw output.
+"""
+import os
+import re
+from typing import Callable, Dict, List
+
+from .actions import parse_action
+
+# Compact observations before they are sent to the model
+COMPACTION_ENABLED = os.environ.get("AGENT_OBSERVATION_COMPACTION", "1") == "1"
+# Upper bound of one compacted observation in characters
+OBSERVATION_MAX_CHARS = int(os.environ.get("AGENT_OBSERVATION_MAX_CHARS", "800"))
+
+# Attractions listed per recommendation, characters per kept line
+MAX_ATTRACTIONS = 8
+LINE_MAX_CHARS = 160
+# Shortest a budget line is cut to when its section has to share the cap
+MIN_LINE_CHARS = 48
+
+# "- Park Güell: ...", "* ...", "• ...", "1. ...", "2) ..."
+_LIST_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.+)$")
+# Separator between an attraction name and its description
+_NAME_SEPARATOR = re.compile(r"\s*(?::|：| - | – | — )\s*")
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+")
+# Amounts with a currency, e.g. "€15", "15-30 EUR", "¥1,500", "20 euros"
+_CURRENCY_AMOUNT = re.compile(
+    r"(?:[€$£¥₩฿₹]|USD|EUR|GBP|JPY|CNY|RMB)\s?\d[\d,.]*|"
+    r"\d[\d,.]*(?:\s?[-–~]\s?\d[\d,.]*)?\s?(?:€|\$|£|¥|euros?|dollars?|pounds?|yen|yuan|won|baht|USD|EUR|GBP|JPY|CNY|RMB|元)",
+    re.IGNORECASE
+)
+# Section of the budget tools that only repeats generic advice
+_BOILERPLATE_SECTIONS = ("💡",)
+
+
+def _truncate(text: str, limit: int) -> str:
+    if len(text) <= limit:
+        return text
+    return text[:limit - 3].rstrip() + "..."
+
+
+def _first_sentence(text: str) -> str:
+    return _SENTENCE_END.split(text.strip(), maxsplit=1)[0]
+
+
+def _strip_markdown(text: str) -> str:
+    return re.sub(r"\*\*|__|`", "", text).strip()
+
+
+def _compact_attractions(observation: str) -> str:
+    """Attraction names with a one-line reason each, or the first sentences of a prose answer"""
+    items = []
+    for line in observation.splitlines():
+        match = _LIST_ITEM.match(line)
+        if not match:
+            continue
+        item = _strip_markdown(match.group(1))
+        parts = _NAME_SEPARATOR.split(item, maxsplit=1)
+        if len(parts) == 2 and parts[1]:
+            item = f"{parts[0]}: {_first_sentence(parts[1])}"
+        items.append("- " + _truncate(item, LINE_MAX_CHARS))
+
+    if len(items) >= 2:
+        return "\n".join(items[:MAX_ATTRACTIONS])
+
+    # Prose answer: keep whole sentences from the start
+    kept, length = [], 0
+    for sentence in _SENTENCE_END.split(_strip_markdown(" ".join(observation.split()))):
+        if kept and length + len(sentence) > OBSERVATION_MAX_CHARS:
+            break
+        kept.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(kept)
+
+
+def _price_facts(text: str, limit: int) -> str:
+    """
+    Price statements of a text within limit characters
+
+    Whole sentences stating prices are kept while they fit, preferring those with a
+    currency; if not even one fits, only the amounts are listed.
+    """
+    sentences = [sentence for sentence in _SENTENCE_END.split(" ".join(text.split())) if sentence]
+    priced = [sentence for sentence in sentences if _CURRENCY_AMOUNT.search(sentence)]
+    if not priced:
+        priced = [sentence for sentence in sentences if re.search(r"\d", sentence)]
+    kept = ""
+    for sentence in priced or sentences:
+        candidate = f"{kept} {sentence}".strip()
+        if len(candidate) > limit:
+            break
+        kept = candidate
+    if kept:
+        return kept
+    amounts = list(dict.fromkeys(amount.strip().rstrip(",.") for amount in _CURRENCY_AMOUNT.findall(text)))
+    if amounts:
+        return _truncate(", ".join(amounts), limit)
+    return _truncate((priced or sentences or [""])[0], limit)
+
+
+def _compact_budget_line(line: str, limit: int) -> str:
+    """One budget line within limit characters, reduced to its price facts if longer"""
+    if len(line) <= limit:
+        return line
+    name, separator, info = line.partition(": ") if line.startswith("- ") else ("", "", line)
+    room = max(limit - len(name) - len(separator), MIN_LINE_CHARS // 2)
+    return _truncate(f"{name}{separator}{_price_facts(info, room)}", limit)
+
+
+def _section_shares(sizes: List[int], budget: int) -> List[int]:
+    """Split budget characters between sections: small ones keep their size, the rest share what is left"""
+    shares = [0] * len(sizes)
+    remaining = budget
+    order = sorted(range(len(sizes)), key=lambda index: sizes[index])
+    for position, index in enumerate(order):
+        shares[index] = min(sizes[index], remaining // (len(sizes) - position))
+        remaining -= shares[index]
+    return shares
+
+
+def _fit_section(title: str, lines: List[str], share: int) -> List[str]:
+    """
+    Lines of one section within share characters
+
+    Lines get an equal part of the share (at least MIN_LINE_CHARS), lines that
+    still do not fit are dropped and counted at the end.
+    """
+    limit = LINE_MAX_CHARS
+    if lines:
+        limit = min(LINE_MAX_CHARS, max(MIN_LINE_CHARS, (share - len(title) - 1) // len(lines) - 1))
+    kept, used = [title], len(title) + 1
+    compacted = [_compact_budget_line(line, limit) for line in lines]
+    for index, line in enumerate(compacted):
+        # The last line needs no room for the "more" marker
+        reserve = 0 if index == len(compacted) - 1 else len(f"- ... {len(compacted)} more") + 1
+        if used + len(line) + 1 + reserve > share:
+            kept.append(f"- ... {len(compacted) - index} more")
+            break
+        kept.append(line)
+        used += len(line) + 1
+    return kept
+
+
+def _compact_budget(observation: str) -> str:
+    """
+    Budget text without the generic tips, long lines reduced to their price figures
+
+    The observation cap is split between the sections, so a long ticket section
+    cannot push the transport costs out of the compacted text.
+    """
+    header, sections = [], []
+    skipping = False
+    for line in observation.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        # Section titles end with a colon, e.g. "🚇 Public Transport Costs:"
+        if stripped.endswith(":") and not stripped.startswith("-"):
+            skipping = stripped.startswith(_BOILERPLATE_SECTIONS)
+            if not skipping:
+                sections.append((stripped, []))
+            continue
+        if skipping:
+            continue
+        if sections:
+            sections[-1][1].append(stripped)
+        else:
+            header.append(_compact_budget_line(stripped, LINE_MAX_CHARS))
+
+    budget = OBSERVATION_MAX_CHARS - sum(len(line) + 1 for line in header)
+    sizes = [sum(len(_compact_budget_line(line, LINE_MAX_CHARS)) + 1 for line in [title] + lines)
+             for title, lines in sections]
+    result = list(header)
+    for (title, lines), share in zip(sections, _section_shares(sizes, budget)):
+        result.extend(_fit_section(title, lines, share))
+    return "\n".join(result)
+
+
+# Tool name -> compactor of its observations, other tools are only capped in length
+COMPACTORS: Dict[str, Callable[[str], str]] = {
+    "get_attraction": _compact_attractions,
+    "calculate_budget": _compact_budget,
+    "get_budget_summary": _compact_budget,
+}
+
+
+def compact_observation(tool_name: str, observation: str) -> str:
+    """
+    Compact one tool observation for the model's context
+
+    Args:
+        tool_name: Tool that produced the observation
+        observation: Raw tool output
+
+    Returns:
+        Bounded text, errors are only capped in length
+    """
+    observation = str(observation)
+    compactor = COMPACTORS.get(tool_name)
+    if compactor is not None and not observation.startswith("Error"):
+        observation = compactor(observation) or observation
+    return _truncate(observation, OBSERVATION_MAX_CHARS)
+
+
+def compact_observations(action_strs: List[str], observations: List[str]) -> List[str]:
+    """
+    Compact the observations of one turn
+
+    Args:
+        action_strs: Executed calls in Action format
+        observations: Their raw observations, same order
+
+    Returns:
+        Compacted observations, the raw ones if compaction is disabled
+    """
+    if not COMPACTION_ENABLED:
+        return list(observations)
+    compacted = []
+    for action_str, observation in zip(action_strs, observations):
+        try:
+            tool_name, _ = parse_action(action_str)
+        except ValueError:
+            tool_name = ""
+        compacted.append(compact_observation(tool_name, observation))
+    return compacted
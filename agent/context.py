@@ -0,0 +1,106 @@
+import os
+from typing import List, Tuple
+
+# Approximate prompt size the loop may keep in the model's memory
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("AGENT_CONTEXT_TOKEN_BUDGET", "6000"))
+
+
+class ConversationContext:
+    """
+    Decide what the agent loop sends to a stateful chat agent on each turn
+
+    The chat agent (camel ChatAgent) already remembers every message it received
+    and produced, so each turn only the entries added since the previous step
+    are sent. When the remembered transcript would exceed the token budget, old
+    observations are shortened (and the oldest steps dropped if needed); the
+    caller then resets the agent and the compacted transcript is sent once.
+    The system prompt is never part of the transcript, so it stays an identical
+    prefix across turns and can be reused by the provider's prompt cache.
+    """
+
+    USER = "user"
+    ASSISTANT = "assistant"
+    OBSERVATION = "observation"
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET, keep_recent: int = 2,
+                 observation_head_chars: int = 300, chars_per_token: int = 4):
+        """
+        Args:
+            token_budget: Approximate maximum tokens of the remembered transcript
+            keep_recent: Number of most recent observations never shortened
+            observation_head_chars: Characters kept from an old observation when shortening
+            chars_per_token: Ratio used to estimate token counts from text length
+        """
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.observation_head_chars = observation_head_chars
+        self.chars_per_token = chars_per_token
+        self._entries: List[Tuple[str, str]] = []
+        self._sent = 0
+        self._omitted = 0
+
+    def add_user(self, text: str):
+        """Add a user message, e.g. the original request"""
+        self._entries.append((self.USER, text))
+
+    def add_assistant(self, text: str):
+        """Record a model output, the chat agent already remembers it"""
+        self._entries.append((self.ASSISTANT, text))
+        self._sent = len(self._entries)
+
+    def add_observation(self, text: str, delivered: bool = False):
+        """
+        Add tool observations to send on the next turn
+
+        Args:
+            text: Observation message
+            delivered: The agent already received the observations by other means
+                (function-calling tool messages), they only count towards the budget
+        """
+        self._entries.append((self.OBSERVATION, text))
+        if delivered:
+            self._sent = len(self._entries)
+
+    def estimate_tokens(self) -> int:
+        """Estimate the token count of the whole transcript"""
+        return sum(len(text) for _, text in self._entries) // self.chars_per_token
+
+    def next_message(self) -> Tuple[str, bool]:
+        """
+        Build the message for the next agent step
+
+        Returns:
+            Tuple of (message, reset). When reset is True the caller must reset the
+            agent's memory before sending, the message then carries the compacted
+            transcript instead of only the new entries.
+        """
+        if self.estimate_tokens() <= self.token_budget:
+            message = "\n".join(text for _, text in self._entries[self._sent:])
+            self._sent = len(self._entries)
+            return message, False
+
+        self._compact()
+        message = "\n".join(text for _, text in self._entries)
+        self._sent = len(self._entries)
+        return message, True
+
+    def _compact(self):
+        """Shorten old observations, then drop the oldest steps until within budget"""
+        observation_indexes = [i for i, (role, _) in enumerate(self._entries) if role == self.OBSERVATION]
+        old_observations = observation_indexes[:-self.keep_recent] if self.keep_recent else observation_indexes
+        for i in old_observations:
+            role, text = self._entries[i]
+            if len(text) > self.observation_head_chars:
+                self._entries[i] = (role, text[:self.observation_head_chars].rstrip() + " ...[truncated]")
+
+        # Keep the original request, drop the oldest steps after it. Compact below
+        # the budget so the next few turns can be sent as deltas again.
+        target = int(self.token_budget * 0.75)
+        if self.estimate_tokens() <= target:
+            return
+        if self._omitted:
+            self._entries.pop(1)  # Previous "steps omitted" marker
+        while self.estimate_tokens() > target and len(self._entries) > 2:
+            self._entries.pop(1)
+            self._omitted += 1
+        self._entries.insert(1, (self.USER, f"[{self._omitted} earlier steps omitted]"))
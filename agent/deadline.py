@@ -0,0 +1,75 @@
+import math
+import os
+import time
+from typing import Any, Callable, Optional
+
+from utils.parallel import ThreadPerTaskExecutor, run_parallel
+
+# Wall-clock budget of one session in seconds, 0 disables it
+SESSION_DEADLINE = float(os.environ.get("AGENT_SESSION_DEADLINE", "120"))
+# Maximum seconds per tool call and per LLM call, 0 disables them
+TOOL_TIMEOUT = float(os.environ.get("AGENT_TOOL_TIMEOUT", "30"))
+LLM_TIMEOUT = float(os.environ.get("AGENT_LLM_TIMEOUT", "60"))
+# Seconds kept for the final answer: tools stop this long before the deadline and,
+# once less than this is left, the model is asked to finish right away
+FINISH_MARGIN = float(os.environ.get("AGENT_FINISH_MARGIN", "15"))
+# LLM calls run here when they have a timeout, so a hanging call can be abandoned; each
+# call gets its own thread, an abandoned call never delays another session's call
+_llm_executor = ThreadPerTaskExecutor(thread_name_prefix="agent-llm")
+
+
+class Deadline:
+    """Wall-clock budget of one session"""
+
+    def __init__(self, seconds: Optional[float] = SESSION_DEADLINE):
+        """
+        Args:
+            seconds: Budget from now, None or 0 for no deadline
+        """
+        self.expires_at = time.monotonic() + seconds if seconds and seconds > 0 else None
+
+    def remaining(self) -> float:
+        """Seconds left, infinite without a deadline, negative once passed"""
+        if self.expires_at is None:
+            return math.inf
+        return self.expires_at - time.monotonic()
+
+    def limit(self, timeout: float, reserve: float = 0.0) -> Optional[float]:
+        """
+        Timeout of the next operation: its own timeout or the time left, whichever is shorter
+
+        Args:
+            timeout: The operation's own limit, 0 for none
+            reserve: Seconds to keep free before the deadline
+
+        Returns:
+            Seconds (at least 0), None if neither limit applies
+        """
+        limits = []
+        if timeout > 0:
+            limits.append(timeout)
+        if self.expires_at is not None:
+            limits.append(self.remaining() - reserve)
+        return max(0.0, min(limits)) if limits else None
+
+
+def call_with_timeout(func: Callable[[], Any], timeout: Optional[float]) -> Any:
+    """
+    Call a function, giving up on it after timeout seconds
+
+    The function sees the timeout through utils.parallel.remaining_time(), the LLM
+    client uses it as the request timeout and closes a stream once it has passed,
+    so an abandoned call stops shortly after the timeout. Its result is dropped.
+
+    Raises:
+        TimeoutError: If the call did not return in time
+        Whatever func raises
+    """
+    if timeout is None:
+        return func()
+    outcome = run_parallel(_llm_executor, [func], timeout=timeout)[0]
+    if outcome.timed_out:
+        raise TimeoutError(f"timed out after {timeout:.1f}s")
+    if outcome.error is not None:
+        raise outcome.error
+    return outcome.value
@@ -0,0 +1,91 @@
+import os
+import re
+from typing import Callable, Dict, List
+
+from custom_tools.attraction_tools import prefetch_attraction, weather_condition
+from custom_tools.budget_tools import prefetch_transport_costs
+from custom_tools.weather_tools import prefetch_weather
+from utils.gazetteer import find_city
+from .actions import parse_action
+
+# Start likely follow-up fetches while the model writes its next turn
+PREFETCH_ENABLED = os.environ.get("AGENT_PREFETCH", "1") == "1"
+# Maximum speculative fetches started by one session
+PREFETCH_PER_SESSION = int(os.environ.get("AGENT_PREFETCH_PER_SESSION", "4"))
+
+# Weather description in a get_weather observation, e.g. "Rome current weather: Light rain, temperature 15°C"
+_WEATHER_PATTERN = re.compile(r"current weather: (.+?), temperature")
+
+
+class Prefetcher:
+    """
+    Predict the next tool calls of a session and start their fetches early
+
+    The system prompt makes the tool sequence predictable: get_weather(city), then
+    get_attraction(city, weather), then calculate_budget(city, ...), whose public
+    transport search only depends on the city. Once the city is known, its weather
+    and transport costs are fetched while the model writes its first turn; once
+    the weather is known, the matching attraction search runs during the next one.
+    The attraction query only depends on the weather's condition class (sunny,
+    rainy, ...), so it matches however the model words the weather; weather that
+    maps to no class is not prefetched.
+    Results wait in the tools' prefetch cache, see utils.prefetch.
+    """
+
+    def __init__(self, available_tools: Dict[str, Callable], enabled: bool = PREFETCH_ENABLED,
+                 max_prefetches: int = PREFETCH_PER_SESSION):
+        """
+        Args:
+            available_tools: Tools of the session, only calls to these are prefetched
+            enabled: Whether to prefetch at all
+            max_prefetches: Maximum speculative fetches started by this session
+        """
+        self.available_tools = available_tools
+        self.enabled = enabled
+        self.remaining = max_prefetches
+        self.started = 0
+        self._seen = set()
+
+    def _start(self, tool_name: str, prefetch: Callable[..., bool], *args):
+        key = (tool_name,) + tuple(" ".join(str(arg).split()).casefold() for arg in args)
+        if not self.enabled or self.remaining <= 0 or tool_name not in self.available_tools or key in self._seen:
+            return
+        self._seen.add(key)
+        if prefetch(*args):
+            self.remaining -= 1
+            self.started += 1
+
+    def _prefetch_city(self, city: str):
+        self._start("get_weather", prefetch_weather, city)
+        self._start("calculate_budget", prefetch_transport_costs, city)
+
+    def on_user_prompt(self, user_prompt: str):
+        """The request names the city, its first lookups can start before the model asks"""
+        record = find_city(user_prompt)
+        if record is not None:
+            self._prefetch_city(record.name)
+
+    def on_observations(self, action_strs: List[str], observations: List[str]):
+        """
+        Prefetch follow-ups of the tool calls just executed
+
+        Args:
+            action_strs: Executed calls in Action format
+            observations: Their observations, same order
+        """
+        for action_str, observation in zip(action_strs, observations):
+            try:
+                tool_name, kwargs = parse_action(action_str)
+            except ValueError:
+                continue
+            city = kwargs.get("city")
+            if not city or str(observation).startswith("Error"):
+                continue
+
+            # The model may choose another spelling or city than the one found in the request
+            self._start("calculate_budget", prefetch_transport_costs, city)
+            if tool_name == "get_weather":
+                match = _WEATHER_PATTERN.search(str(observation))
+                condition = weather_condition(match.group(1)) if match else None
+                if condition:
+                    self._start("get_attraction", prefetch_attraction, city, condition)
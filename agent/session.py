@@ -0,0 +1,306 @@
+import os
+import re
+import time
+from typing import Callable, Dict, List, Optional
+
+from custom_tools import get_weather, get_weather_batch, get_attraction, calculate_budget, get_budget_summary
+from config import (
+    AGENT_SYSTEM_PROMPT,
+    AGENT_TOOL_CALLING_SYSTEM_PROMPT,
+    MODELSCOPE_API_KEY,
+    MODELSCOPE_BASE_URL,
+    MODEL_NAME,
+    TAVILY_API_KEY
+)
+from utils import OutputManager
+from utils.llm_client import OpenAICompatibleClient, STOP_SEQUENCES
+from utils.tracing import Tracer, export_trace
+from .actions import extract_actions, execute_actions, execute_tool_calls, format_observations
+from .backends import LLM_BACKEND, create_backend, uses_native_tools
+from .compaction import compact_observations
+from .context import ConversationContext
+from .deadline import FINISH_MARGIN, LLM_TIMEOUT, SESSION_DEADLINE, TOOL_TIMEOUT, Deadline, call_with_timeout
+from .prefetch import Prefetcher
+from .tool_schema import build_tool_schemas
+
+# Maximum number of model turns per session
+MAX_LOOPS = 5
+# Append session traces to output/traces.jsonl and rewrite output/metrics.<pid>.prom
+TRACE_EXPORT = os.environ.get("AGENT_TRACE_EXPORT", "1") == "1"
+
+# Sent once the session deadline is near
+FINISH_NOW_PROMPT = ("Time is almost up. Do not call any more tools: give the final answer now with finish, "
+                     "using the information collected so far.")
+
+
+class SessionResult:
+    """Outcome of one agent session"""
+
+    def __init__(self, user_prompt: str):
+        self.user_prompt = user_prompt
+        self.final_answer: Optional[str] = None
+        self.prompt_history: List[str] = []
+        self.report_path: Optional[str] = None
+        self.city: Optional[str] = None
+        self.loops = 0
+        self.duration = 0.0
+        self.error: Optional[str] = None
+        self.trace_id: Optional[str] = None
+        # The session ran into its deadline or an LLM timeout, the answer may be partial
+        self.deadline_reached = False
+
+    @property
+    def completed(self) -> bool:
+        return self.final_answer is not None
+
+    def to_dict(self) -> dict:
+        return {
+            "final_answer": self.final_answer,
+            "report_path": self.report_path,
+            "city": self.city,
+            "loops": self.loops,
+            "duration_s": round(self.duration, 3),
+            "error": self.error,
+            "trace_id": self.trace_id,
+            "deadline_reached": self.deadline_reached,
+        }
+
+
+def configure_environment():
+    """Expose configured API keys to the tools"""
+    os.environ['TAVILY_API_KEY'] = TAVILY_API_KEY
+
+
+def create_model(backend: str = LLM_BACKEND):
+    """
+    Create the LLM model, it can be shared by many sessions
+
+    Args:
+        backend: "camel", "streaming" or "native", defaults to the LLM_BACKEND environment variable
+    """
+    if backend in ("streaming", "native"):
+        return OpenAICompatibleClient(model=MODEL_NAME, api_key=MODELSCOPE_API_KEY, base_url=MODELSCOPE_BASE_URL)
+
+    # camel-ai takes most of the startup time, it is only imported for the camel backend
+    from camel.models import ModelFactory
+    from camel.types import ModelPlatformType
+
+    return ModelFactory.create(
+        model_platform=ModelPlatformType.OPENAI_COMPATIBLE_MODEL,
+        model_type=MODEL_NAME,
+        url=MODELSCOPE_BASE_URL,
+        api_key=MODELSCOPE_API_KEY,
+        # Stop before a made-up Observation instead of generating (and paying for) it
+        model_config_dict={"stop": STOP_SEQUENCES}
+    )
+
+
+def create_available_tools() -> Dict[str, Callable]:
+    """Tools the agent may call, keyed by the name used in Actions"""
+    return {
+        "get_weather": get_weather,
+        "get_weather_batch": get_weather_batch,
+        "get_attraction": get_attraction,
+        "calculate_budget": calculate_budget,
+        "get_budget_summary": get_budget_summary,
+    }
+
+
+def run_session(user_prompt: str, model, output_manager: OutputManager,
+                available_tools: Optional[Dict[str, Callable]] = None,
+                max_loops: int = MAX_LOOPS, verbose: bool = True,
+                on_event: Optional[Callable[[dict], None]] = None,
+                session_deadline: Optional[float] = SESSION_DEADLINE) -> SessionResult:
+    """
+    Run the ReAct loop for one user request and save the report when it finishes
+
+    Args:
+        user_prompt: User's request
+        model: Model created by create_model()
+        output_manager: Output manager used to save the report
+        available_tools: Tools the agent may call, defaults to create_available_tools()
+        max_loops: Maximum number of model turns
+        verbose: Print the loop progress
+        on_event: Optional callback receiving a progress event dict after each model
+            output and each observation, used for streaming progress to clients
+        session_deadline: Wall-clock budget in seconds, None or 0 for none. Tool and LLM
+            calls are cut off at the deadline; when it is near the model is asked to
+            finish, and the observations collected so far become the answer if it does not
+
+    Returns:
+        SessionResult with the final answer (None if the loop did not finish)
+    """
+    log = print if verbose else (lambda *args, **kwargs: None)
+    emit = on_event or (lambda event: None)
+    if available_tools is None:
+        available_tools = create_available_tools()
+
+    start_time = time.time()
+    deadline = Deadline(session_deadline)
+    result = SessionResult(user_prompt)
+    # Spans of this session: every loop, LLM call and tool call
+    tracer = Tracer()
+    result.trace_id = tracer.trace_id
+
+    # Each session needs its own agent, the agent keeps the conversation memory
+    native_tools = uses_native_tools(model)
+    if native_tools:
+        # Function-calling mode, schemas are generated from the tool signatures
+        llm_agent = create_backend(model, AGENT_TOOL_CALLING_SYSTEM_PROMPT, build_tool_schemas(available_tools))
+    else:
+        llm_agent = create_backend(model, AGENT_SYSTEM_PROMPT)
+
+    prompt_history = result.prompt_history
+    prompt_history.append(f"User request: {user_prompt}")
+    # Observation messages so far, the partial answer if the deadline ends the session
+    collected: List[str] = []
+    finishing = False
+    # The agent keeps its own memory, the context decides which new text each step sends
+    context = ConversationContext()
+    context.add_user(prompt_history[0])
+    # Likely tool calls start fetching while the model is still writing its turn
+    prefetcher = Prefetcher(available_tools)
+    prefetcher.on_user_prompt(user_prompt)
+
+    log(f"User input: {user_prompt}\n" + "="*40)
+
+    with tracer.span("session", "session", backend=type(llm_agent).__name__) as session_span:
+        for i in range(max_loops):
+            with tracer.span("loop", "loop", loop=i + 1) as loop_span:
+                log(f"--- Loop {i+1} ---\n")
+                result.loops = i + 1
+
+                # 1. Build prompt, only the entries the agent has not seen yet.
+                # Near the deadline the model is told to finish instead of calling more tools.
+                if not finishing and deadline.remaining() <= FINISH_MARGIN:
+                    finishing = result.deadline_reached = True
+                    log("⏰ Session deadline is near, asking for the final answer")
+                    context.add_user(FINISH_NOW_PROMPT)
+                    prompt_history.append(FINISH_NOW_PROMPT)
+                message, reset = context.next_message()
+                if reset:
+                    # Transcript exceeded the token budget, replace the agent memory with a compacted one
+                    llm_agent.reset()
+
+                # 2. Call LLM for reasoning
+                try:
+                    with tracer.span("llm", "llm") as llm_span:
+                        turn = call_with_timeout(lambda: llm_agent.step(message), deadline.limit(LLM_TIMEOUT))
+                        if turn.usage:
+                            llm_span.set(**turn.usage)
+                except TimeoutError as e:
+                    # The backend is abandoned mid-call, the session ends with what it has
+                    result.error = f"LLM call {e}"
+                    result.deadline_reached = True
+                    log(f"❌ {result.error}")
+                    break
+                except Exception as e:
+                    result.error = f"LLM call failed - {e}"
+                    log(f"❌ {result.error}")
+                    break
+                tool_calls = turn.tool_calls
+                # Structured tool calls are recorded in Action format, so reports look the same in both modes
+                llm_output = turn.text
+                if tool_calls:
+                    llm_output = "\n".join(([f"Thought: {turn.text}"] if turn.text else []) +
+                                           [f"Action: {call}" for call in tool_calls])
+                log(f"Model output:\n{llm_output}\n")
+                emit({"event": "model_output", "loop": i + 1, "content": llm_output})
+                prompt_history.append(llm_output)
+                context.add_assistant(llm_output)
+
+                # 3. Parse and execute actions, text Actions are the fallback when there are no structured calls
+                if tool_calls:
+                    action_strs = [str(call) for call in tool_calls]
+                else:
+                    action_strs = extract_actions(llm_output)
+                if not action_strs:
+                    result.error = "Parse error: No Action found in model output."
+                    log(result.error)
+                    break
+
+                if action_strs[0].startswith("finish"):
+                    if tool_calls:
+                        result.final_answer = str((tool_calls[0].arguments or {}).get("answer") or "Task completed")
+                    else:
+                        final_answer_match = re.search(r'finish\(answer="(.*)"\)', action_strs[0], re.DOTALL)
+                        if final_answer_match:
+                            result.final_answer = final_answer_match.group(1).replace('\\"', '"')
+                        else:
+                            result.final_answer = "Task completed"
+
+                    log(f"Task completed, final answer: {result.final_answer}")
+                    break
+
+                if finishing:
+                    # No time left for the tool calls, the collected observations are the answer
+                    result.error = "Session deadline reached before the model finished"
+                    log(f"❌ {result.error}")
+                    break
+
+                # Tool calls stop early enough to leave time for the final answer
+                tool_timeout = deadline.limit(TOOL_TIMEOUT, reserve=FINISH_MARGIN)
+
+                # Independent tool calls of one turn run concurrently, observations keep their order.
+                # A finish after tool calls is premature, the model has not seen their results yet.
+                if tool_calls:
+                    finish_calls = [call for call in tool_calls if call.name == "finish"]
+                    tool_calls = [call for call in tool_calls if call.name != "finish"]
+                    action_strs = [str(call) for call in tool_calls]
+                    observations = execute_tool_calls(tool_calls, available_tools, timeout=tool_timeout)
+                    compacted = compact_observations(action_strs, observations)
+                    # Every call id needs a result before the next request
+                    llm_agent.add_tool_results(
+                        [(call.call_id, observation) for call, observation in zip(tool_calls, compacted)] +
+                        [(call.call_id, "Error: finish ignored, review the tool results first") for call in finish_calls]
+                    )
+                else:
+                    action_strs = [action_str for action_str in action_strs if not action_str.startswith("finish")]
+                    observations = execute_actions(action_strs, available_tools, timeout=tool_timeout)
+                    compacted = compact_observations(action_strs, observations)
+                prefetcher.on_observations(action_strs, observations)
+
+                # 4. Record observation results: the raw output goes to the history and the report,
+                # the model only gets the compacted one
+                observation_str = format_observations(action_strs, observations)
+                context_str = format_observations(action_strs, compacted)
+                loop_span.set(raw_observation_chars=len(observation_str), context_observation_chars=len(context_str))
+                log(f"{observation_str}\n" + "="*40)
+                emit({"event": "observation", "loop": i + 1, "content": observation_str})
+                prompt_history.append(observation_str)
+                collected.append(observation_str)
+                # Structured results were already handed to the backend as tool messages
+                context.add_observation(context_str, delivered=bool(tool_calls))
+
+        session_span.set(prefetches=prefetcher.started)
+        if result.deadline_reached:
+            session_span.set(deadline_reached=True)
+            if not result.completed and collected:
+                result.final_answer = _partial_answer(collected)
+                log(f"Task ended at the deadline, partial answer: {result.final_answer}")
+
+    # Save output results to file, with the trace of the finished session
+    if result.completed:
+        try:
+            result.city = output_manager._extract_city_from_all_content(user_prompt, result.final_answer, prompt_history)
+            result.report_path = output_manager.save_travel_report(user_prompt, result.final_answer, prompt_history,
+                                                                   city=result.city, trace_lines=tracer.format_lines())
+        except Exception as e:
+            result.error = f"Error saving file: {e}"
+            log(f"\n❌ {result.error}")
+
+    if TRACE_EXPORT:
+        try:
+            export_trace(tracer, os.path.join(output_manager.output_dir, "traces.jsonl"),
+                         os.path.join(output_manager.output_dir, f"metrics.{os.getpid()}.prom"))
+        except OSError as e:
+            log(f"⚠️  Could not export trace - {e}")
+
+    result.duration = time.time() - start_time
+    return result
+
+
+def _partial_answer(observations: List[str]) -> str:
+    """Answer of a session cut off by its deadline: the tool results it collected"""
+    return ("The request could not be completed within the time limit. Information collected so far:\n\n"
+            + "\n\n".join(observations))
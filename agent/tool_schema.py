@@ -0,0 +1,106 @@
+import inspect
+import re
+import typing
+from typing import Callable, Dict, List
+
+_JSON_TYPES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    list: "array",
+    dict: "object",
+}
+
+# Tool the model calls to end the session with its final answer
+FINISH_TOOL_SCHEMA = {
+    "type": "function",
+    "function": {
+        "name": "finish",
+        "description": "Finish the task and give the final answer to the user's request.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "answer": {"type": "string", "description": "Complete final answer for the user"}
+            },
+            "required": ["answer"],
+        },
+    },
+}
+
+
+def _json_type(annotation) -> dict:
+    """Map a Python annotation to a JSON schema fragment"""
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        # Optional[X] -> X
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return _json_type(args[0]) if len(args) == 1 else {"type": "string"}
+    if origin in (list, List):
+        args = typing.get_args(annotation)
+        item = _json_type(args[0]) if args else {"type": "string"}
+        return {"type": "array", "items": item}
+    return {"type": _JSON_TYPES.get(origin or annotation, "string")}
+
+
+def _parse_docstring(func: Callable) -> tuple:
+    """
+    Split a docstring into its summary and the descriptions of the Args section
+
+    Returns:
+        Tuple of (summary, {argument name: description})
+    """
+    doc = inspect.getdoc(func) or ""
+    summary = doc.split("\n\n")[0].replace("\n", " ").strip()
+
+    descriptions = {}
+    args_section = re.search(r"^Args:\n((?:[ \t]+.+\n?)+)", doc, re.MULTILINE)
+    if args_section:
+        for line in args_section.group(1).splitlines():
+            arg_match = re.match(r"\s+(\w+)(?:\s*\([^)]*\))?:\s*(.+)", line)
+            if arg_match:
+                descriptions[arg_match.group(1)] = arg_match.group(2).strip()
+    return summary, descriptions
+
+
+def build_tool_schema(name: str, func: Callable) -> dict:
+    """
+    Build an OpenAI function-calling schema from a tool's signature and docstring
+
+    Args:
+        name: Tool name used by the model
+        func: Tool function with type-annotated parameters
+
+    Returns:
+        Tool schema dictionary
+    """
+    summary, descriptions = _parse_docstring(func)
+    hints = typing.get_type_hints(func)
+    properties = {}
+    required = []
+
+    for param in inspect.signature(func).parameters.values():
+        schema = _json_type(hints.get(param.name, str))
+        if param.name in descriptions:
+            schema["description"] = descriptions[param.name]
+        if param.default is inspect.Parameter.empty:
+            required.append(param.name)
+        else:
+            schema["default"] = param.default
+        properties[param.name] = schema
+
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": summary,
+            "parameters": {"type": "object", "properties": properties, "required": required},
+        },
+    }
+
+
+def build_tool_schemas(available_tools: Dict[str, Callable]) -> List[dict]:
+    """Build schemas for every available tool plus finish"""
+    schemas = [build_tool_schema(name, func) for name, func in available_tools.items()]
+    schemas.append(FINISH_TOOL_SCHEMA)
+    return schemas
@@ -0,0 +1,175 @@
+"""
+Batch mode: run many agent sessions from a JSONL file of user requests
+
+Each input line is a JSON object with a "prompt" (or "user_prompt") field and
+an optional "request_id" (or "id"). One result record is appended to the output
+file as soon as each session finishes, so an interrupted run can be resumed:
+requests whose id is already in the output file are skipped.
+
+Usage:
+    python batch.py requests.jsonl --output output/batch_results.jsonl --workers 4
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Set, Tuple
+
+from agent import configure_environment, create_model, run_session
+from utils import OutputManager
+
+
+def iter_requests(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Stream (request id, prompt) pairs from a JSONL file without loading it whole
+
+    Lines that are empty, not valid JSON or without a prompt are skipped with a warning.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"⚠️  Skipping line {line_number}: invalid JSON - {e}")
+                continue
+            prompt = record.get("prompt") or record.get("user_prompt")
+            if not prompt:
+                print(f"⚠️  Skipping line {line_number}: no prompt")
+                continue
+            request_id = str(record.get("request_id") or record.get("id") or f"line-{line_number}")
+            yield request_id, prompt
+
+
+def load_finished_ids(path: str, retry_failed: bool) -> Set[str]:
+    """Read request ids already recorded in the output file"""
+    finished = set()
+    if not os.path.exists(path):
+        return finished
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Last line may be truncated by a crash, that request simply runs again
+                continue
+            if retry_failed and record.get("status") != "ok":
+                continue
+            finished.add(record["request_id"])
+    return finished
+
+
+class ResultWriter:
+    """Append result records to a JSONL file, one durable line per finished session"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def run_batch(input_path: str, output_path: str, workers: int = 4,
+              sessions_per_minute: float = 0, retry_failed: bool = False) -> dict:
+    """
+    Run every pending request of input_path on a bounded worker pool
+
+    Args:
+        input_path: JSONL file of requests
+        output_path: JSONL file result records are appended to
+        workers: Number of sessions running at the same time
+        sessions_per_minute: Maximum session start rate, 0 means unlimited
+        retry_failed: Run again requests whose recorded status is not "ok"
+
+    Returns:
+        Counters of submitted, succeeded, failed and skipped requests
+    """
+    configure_environment()
+    output_manager = OutputManager()
+    # The model backend is stateless and shared, each session builds its own ChatAgent
+    model = create_model()
+
+    finished_ids = load_finished_ids(output_path, retry_failed)
+    writer = ResultWriter(output_path)
+    counters = {"submitted": 0, "ok": 0, "failed": 0, "skipped": 0}
+    counters_lock = threading.Lock()
+    # Bound the number of queued requests so huge input files are streamed, not loaded
+    slots = threading.BoundedSemaphore(workers * 2)
+    start_interval = 60.0 / sessions_per_minute if sessions_per_minute > 0 else 0.0
+
+    def process(request_id: str, prompt: str):
+        try:
+            try:
+                result = run_session(prompt, model, output_manager, verbose=False)
+                status = "ok" if result.completed and not result.error else "failed"
+                record = {"request_id": request_id, "status": status, **result.to_dict()}
+            except Exception as e:
+                status = "failed"
+                record = {"request_id": request_id, "status": status, "error": f"{type(e).__name__}: {e}"}
+            writer.write(record)
+            with counters_lock:
+                counters[status] += 1
+            print(f"[{status}] {request_id}")
+        finally:
+            slots.release()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-session") as executor:
+            next_start = time.monotonic()
+            for request_id, prompt in iter_requests(input_path):
+                if request_id in finished_ids:
+                    counters["skipped"] += 1
+                    continue
+
+                # Pace session starts to stay under the provider's rate limits
+                if start_interval:
+                    delay = next_start - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_start = max(next_start, time.monotonic()) + start_interval
+
+                slots.acquire()
+                finished_ids.add(request_id)
+                counters["submitted"] += 1
+                executor.submit(process, request_id, prompt)
+    finally:
+        writer.close()
+
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run travel agent sessions for every request of a JSONL file")
+    parser.add_argument("input", help="JSONL file with one request per line")
+    parser.add_argument("--output", default=os.path.join("output", "batch_results.jsonl"),
+                        help="JSONL file result records are appended to (also used to resume)")
+    parser.add_argument("--workers", type=int, default=4, help="Number of concurrent sessions")
+    parser.add_argument("--sessions-per-minute", type=float, default=0,
+                        help="Maximum session start rate, 0 means unlimited")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Run again requests previously recorded as failed")
+    args = parser.parse_args()
+
+    counters = run_batch(args.input, args.output, workers=args.workers,
+                         sessions_per_minute=args.sessions_per_minute, retry_failed=args.retry_failed)
+    print(f"✅ Batch finished: {counters['ok']} ok, {counters['failed']} failed, "
+          f"{counters['skipped']} already done")
+
+
+if __name__ == "__main__":
+    main()
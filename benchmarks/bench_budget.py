@@ -0,0 +1,103 @@
+"""
+Benchmark batch budget allocation against a loop of get_budget_summary() calls
+
+Generates (city, total, profile) rows, allocates them with allocate_budgets()
+in plain Python and, if NumPy is installed, vectorized, and compares both with
+the per-row loop dashboards used before. Checks that every row of the standard
+profile, and get_budget_summary() itself, formats to exactly the text of the
+previous implementation, kept here as a frozen copy.
+
+Usage:
+    python -m benchmarks.bench_budget --rows 100000
+"""
+import argparse
+import random
+import time
+
+import custom_tools.budget_allocation as budget_allocation
+from custom_tools.budget_allocation import BUDGET_PROFILES, _get_currency_info, allocate_budgets
+from custom_tools.budget_tools import get_budget_summary
+from utils.gazetteer import CITIES
+
+
+def legacy_budget_summary(city: str, total_budget: float) -> str:
+    """Previous get_budget_summary(), kept to verify the formatted text and measure the speedup"""
+    if total_budget <= 0:
+        return "Error: Budget amount must be greater than 0"
+
+    currency_info = _get_currency_info(city)
+    currency_symbol = currency_info["symbol"]
+    currency_name = currency_info["name"]
+
+    transport_ratio = 0.2
+    tickets_ratio = 0.3
+    food_ratio = 0.3
+    other_ratio = 0.2
+
+    transport_budget = total_budget * transport_ratio
+    tickets_budget = total_budget * tickets_ratio
+    food_budget = total_budget * food_ratio
+    other_budget = total_budget * other_ratio
+
+    summary = []
+    summary.append(f"=== {city} Budget Allocation Suggestions (Total Budget: {currency_symbol}{total_budget:.0f} {currency_name}) ===\n")
+    summary.append(f"🚇 Transport Costs: {currency_symbol}{transport_budget:.0f} ({transport_ratio*100:.0f}%)")
+    summary.append(f"🎫 Ticket Costs: {currency_symbol}{tickets_budget:.0f} ({tickets_ratio*100:.0f}%)")
+    summary.append(f"🍽️ Food Costs: {currency_symbol}{food_budget:.0f} ({food_ratio*100:.0f}%)")
+    summary.append(f"🛍️ Other Costs: {currency_symbol}{other_budget:.0f} ({other_ratio*100:.0f}%)")
+    summary.append("")
+    summary.append("💡 Friendly Tips:")
+    summary.append("- Above allocation is for reference only, can be adjusted based on personal preferences")
+    summary.append("- Recommend reserving 10-20% emergency funds")
+    summary.append("- Can save costs through group buying, coupons and other methods")
+
+    return "\n".join(summary)
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch budget allocation")
+    parser.add_argument("--rows", type=int, default=100000, help="Number of (city, budget) rows")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cities = [rng.choice(CITIES).name for _ in range(args.rows)]
+    totals = [round(rng.uniform(-100, 20000), 2) for _ in range(args.rows)]
+    profiles = [rng.choice(list(BUDGET_PROFILES)) for _ in range(args.rows)]
+
+    # 1. Previous usage: one text summary per row with the previous implementation, standard profile only
+    loop_texts, loop_time = timed(lambda: [legacy_budget_summary(city, total) for city, total in zip(cities, totals)])
+    print(f"Rows: {args.rows}")
+    print(f"legacy summary loop:      {loop_time * 1e3:9.1f} ms")
+
+    # 2. Batch engine, plain Python arithmetic
+    vectorize_min_rows = budget_allocation.VECTORIZE_MIN_ROWS
+    budget_allocation.VECTORIZE_MIN_ROWS = args.rows + 1
+    _, python_time = timed(lambda: allocate_budgets(cities, totals, profiles))
+    budget_allocation.VECTORIZE_MIN_ROWS = vectorize_min_rows
+    print(f"allocate_budgets (Python): {python_time * 1e3:8.1f} ms")
+
+    # 3. Batch engine, vectorized
+    if budget_allocation._load_numpy() is None:
+        print("allocate_budgets (NumPy):  skipped, numpy is not installed")
+    else:
+        _, numpy_time = timed(lambda: allocate_budgets(cities, totals, profiles))
+        print(f"allocate_budgets (NumPy):  {numpy_time * 1e3:8.1f} ms  ({loop_time / numpy_time:.0f}x faster than the loop)")
+
+    standard = allocate_budgets(cities, totals)
+    mismatches = [index for index, text in enumerate(loop_texts)
+                  if standard.format(index) != text or get_budget_summary(cities[index], totals[index]) != text]
+    if mismatches:
+        print(f"❌ {len(mismatches)} rows format differently, first: {mismatches[0]}")
+        raise SystemExit(1)
+    print("✅ Formatted rows and get_budget_summary identical to the previous implementation")
+
+
+if __name__ == "__main__":
+    main()
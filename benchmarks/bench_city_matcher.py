@@ -0,0 +1,90 @@
+"""
+Benchmark city extraction of OutputManager on long transcripts
+
+Compares the precompiled single-pass matcher against the previous implementation
+(nested alias x country-prefix substring scans, tables rebuilt per call) and
+checks that both return the same city for every generated text.
+
+Usage:
+    python -m benchmarks.bench_city_matcher --transcripts 200 --steps 40
+"""
+import argparse
+import random
+import time
+
+from utils.gazetteer import CITIES
+from utils.output_manager import OutputManager
+
+_COUNTRY_PREFIXES = ['西班牙', '意大利', '法国', '德国', '英国', '美国', '日本', '韩国', '泰国', '新加坡', '马来西亚', '澳大利亚', '加拿大', '俄罗斯', '荷兰', '比利时', '瑞士', '奥地利', '丹麦', '瑞典', '挪威', '芬兰', 'spain', 'italy', 'france', 'germany', 'uk', 'usa', 'japan', 'korea', 'thailand', 'singapore', 'malaysia', 'australia', 'canada', 'russia', 'netherlands', 'belgium', 'switzerland', 'austria', 'denmark', 'sweden', 'norway', 'finland']
+
+_FILLER = [
+    "Thought: I should check the weather first and then look for outdoor attractions.",
+    "Observation: current weather: Light rain, temperature 15°C",
+    "The old town is best explored on foot, museums open at 10:00 and close at 18:00.",
+    "Public transport day passes cost around 11 per person and cover metro, bus and tram.",
+    "Action: calculate_budget(attractions=\"Cathedral, Old Town\", days=1)",
+    "推荐上午参观博物馆，下午去公园散步，晚上品尝当地美食。",
+]
+
+
+def legacy_extract_city(prompt: str) -> str:
+    """Previous implementation, kept to verify results and measure the speedup"""
+    all_cities = {record.name: record.aliases for record in CITIES}
+    processed_prompt = prompt.lower()
+    country_prefixes = list(_COUNTRY_PREFIXES)
+    for city_name, aliases in sorted(all_cities.items(), key=lambda x: max(len(alias) for alias in x[1]), reverse=True):
+        for alias in aliases:
+            if alias.lower() in processed_prompt:
+                return city_name
+            for prefix in country_prefixes:
+                if f"{prefix}{alias}" in prompt or f"{prefix} {alias}" in prompt:
+                    return city_name
+    return "Query City"
+
+
+def make_transcript(rng: random.Random, steps: int) -> str:
+    """Build a transcript mentioning zero to three random cities among filler text"""
+    aliases = [alias for record in CITIES for alias in record.aliases]
+    lines = [rng.choice(_FILLER) for _ in range(steps)]
+    for _ in range(rng.randint(0, 3)):
+        position = rng.randrange(len(lines))
+        prefix = rng.choice(["", "", "Spain ", "西班牙", "visit "])
+        lines[position] += f" {prefix}{rng.choice(aliases)}"
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OutputManager city extraction")
+    parser.add_argument("--transcripts", type=int, default=200, help="Number of generated transcripts")
+    parser.add_argument("--steps", type=int, default=40, help="Lines per transcript")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = [make_transcript(rng, args.steps) for _ in range(args.transcripts)]
+    manager = OutputManager.__new__(OutputManager)
+
+    start = time.perf_counter()
+    legacy_results = [legacy_extract_city(text) for text in texts]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_results = [manager._extract_city_from_prompt(text) for text in texts]
+    new_time = time.perf_counter() - start
+
+    mismatches = [(i, a, b) for i, (a, b) in enumerate(zip(legacy_results, new_results)) if a != b]
+    average_length = sum(len(text) for text in texts) / len(texts)
+
+    print(f"Transcripts: {len(texts)}, average length {average_length:.0f} chars")
+    print(f"Legacy matcher:      {legacy_time / len(texts) * 1e3:8.3f} ms/transcript")
+    print(f"Precompiled matcher: {new_time / len(texts) * 1e3:8.3f} ms/transcript")
+    print(f"Speedup: {legacy_time / new_time:.1f}x")
+    if mismatches:
+        for i, legacy, new in mismatches[:10]:
+            print(f"❌ Mismatch on transcript {i}: legacy={legacy} new={new}")
+        raise SystemExit(1)
+    print("✅ Results identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Check observation compaction on calculate_budget output
+
+Builds budget observations with the tool's own formatting for a growing number
+of attractions, each priced by two normal-length sentences, and compacts them.
+Checks that every compacted observation stays within the cap, keeps a line for
+every attraction and still contains the public transport section, and reports
+how many characters compaction saves.
+
+Usage:
+    python -m benchmarks.bench_compaction --max-attractions 10
+"""
+import argparse
+
+from agent.compaction import LINE_MAX_CHARS, OBSERVATION_MAX_CHARS, compact_observation
+from custom_tools.budget_tools import _format_price_section, _format_search_section
+from utils.parallel import TaskOutcome
+
+_ATTRACTIONS = ["Sagrada Familia", "Park Güell", "Casa Batlló", "La Pedrera", "Picasso Museum",
+                "Camp Nou", "Montjuïc Castle", "Palau de la Música", "Barcelona Cathedral", "Tibidabo"]
+
+_PRICE_ANSWER = ("Adult general admission to {name} costs €26 when booked online, and guided tours with "
+                 "audio guide start at €36 per person. Reduced tickets for students and seniors cost €19, "
+                 "children under 11 enter free of charge.")
+
+_TRANSPORT_ANSWER = ("A single metro or bus ticket in Barcelona costs €2.55, the T-casual card with ten rides "
+                     "costs €12.15 and the Hola Barcelona travel card costs €17.50 for 48 hours.")
+
+
+def make_observation(count: int) -> str:
+    """calculate_budget output for the first count attractions, as the tool formats it"""
+    names = _ATTRACTIONS[:count]
+    lines = ["=== Barcelona Travel Budget Calculation (1 day) ===\n"]
+    lines.extend(_format_price_section("🎫 Attraction Ticket Costs:", names,
+                                       [_PRICE_ANSWER.format(name=name) for name in names]))
+    lines.extend(_format_search_section("🚇 Public Transport Costs:", TaskOutcome(value={"answer": _TRANSPORT_ANSWER})))
+    lines.append("💡 Budget Suggestions:")
+    lines.append("- Recommend reserving sufficient ticket and transport costs for 1 day itinerary")
+    lines.append("- Consider purchasing attraction combo tickets or transport day passes to save costs")
+    return "\n".join(lines)
+
+
+def check(count: int, compacted: str) -> list:
+    """Problems of one compacted observation, empty if it is fine"""
+    problems = []
+    if len(compacted) > OBSERVATION_MAX_CHARS:
+        problems.append(f"{len(compacted)} chars, cap is {OBSERVATION_MAX_CHARS}")
+    long_lines = [line for line in compacted.splitlines() if len(line) > LINE_MAX_CHARS]
+    if long_lines:
+        problems.append(f"{len(long_lines)} lines over {LINE_MAX_CHARS} chars")
+    missing = [name for name in _ATTRACTIONS[:count] if f"- {name}:" not in compacted]
+    if missing:
+        problems.append(f"attractions missing: {', '.join(missing)}")
+    if "🚇 Public Transport Costs:" not in compacted or "€2.55" not in compacted:
+        problems.append("transport section missing")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check calculate_budget observation compaction")
+    parser.add_argument("--max-attractions", type=int, default=len(_ATTRACTIONS),
+                        help=f"Largest attraction list checked, at most {len(_ATTRACTIONS)}")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"Cap: {OBSERVATION_MAX_CHARS} chars")
+    for count in range(1, min(args.max_attractions, len(_ATTRACTIONS)) + 1):
+        raw = make_observation(count)
+        compacted = compact_observation("calculate_budget", raw)
+        problems = check(count, compacted)
+        print(f"{count:2d} attractions: {len(raw):5d} -> {len(compacted):4d} chars"
+              + (f"  ❌ {'; '.join(problems)}" if problems else ""))
+        failed = failed or bool(problems)
+    if failed:
+        raise SystemExit(1)
+    print("✅ Every attraction and the transport costs kept within the cap")
+
+
+if __name__ == "__main__":
+    main()
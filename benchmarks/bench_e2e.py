@@ -0,0 +1,192 @@
+"""
+End-to-end benchmark of the agent loop against local fake services
+
+Starts local stand-ins for the OpenAI-compatible LLM, wttr.in and Tavily (see
+benchmarks/fake_services.py), points the real tools and client at them and runs
+complete sessions, report saving included. For each concurrency level it prints
+throughput and latency percentiles of whole sessions, loops, LLM calls, tool
+phases and each tool. Latencies are seeded, so runs are comparable before and
+after a change; --json saves the numbers for diffing.
+
+Usage:
+    python -m benchmarks.bench_e2e --sessions 40 --concurrency 1,4,16 --llm-latency 0.3 --tool-latency 0.1
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from benchmarks.fake_services import FakeLLMServer, FakeSearchServer, FakeWeatherServer
+from utils.gazetteer import CITIES
+
+_PROMPT = ("Hello, please help me check the weather in {city} today, then recommend some suitable tourist "
+           "attractions based on the weather. Please list a one-day itinerary with time and budget.")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of a list, q in [0, 100]"""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = max(1, int(round(q / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class Recorder:
+    """Collects latency samples by metric name from many threads"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, metric: str, seconds: float):
+        with self._lock:
+            self.samples.setdefault(metric, []).append(seconds)
+
+    def timed_tools(self, tools: Dict[str, Callable]) -> Dict[str, Callable]:
+        """Wrap tools so every call records its duration as tool:<name>"""
+        def wrap(name, func):
+            def timed(**kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(**kwargs)
+                finally:
+                    self.add(f"tool:{name}", time.perf_counter() - start)
+            return timed
+        return {name: wrap(name, func) for name, func in tools.items()}
+
+
+def run_one(prompt: str, model, output_manager, tools: Dict[str, Callable], recorder: Recorder) -> bool:
+    """Run one session and record session, loop, LLM and tool-phase latencies"""
+    from agent.session import run_session
+
+    last = [time.perf_counter()]
+
+    def on_event(event: dict):
+        now = time.perf_counter()
+        # The model output closes the LLM call of a loop, the observation closes its tool phase
+        recorder.add("llm" if event["event"] == "model_output" else "tools", now - last[0])
+        if event["event"] == "observation":
+            recorder.add("loop", now - loop_start[0])
+            loop_start[0] = now
+        last[0] = now
+
+    loop_start = [last[0]]
+    start = last[0]
+    result = run_session(prompt, model, output_manager, available_tools=tools, verbose=False, on_event=on_event)
+    recorder.add("session", time.perf_counter() - start)
+    return result.completed
+
+
+def run_level(concurrency: int, prompts: List[str], model, output_manager,
+              tools: Dict[str, Callable]) -> dict:
+    """Run all prompts with the given number of concurrent sessions"""
+    recorder = Recorder()
+    timed_tools = recorder.timed_tools(tools)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        completed = list(executor.map(
+            lambda prompt: run_one(prompt, model, output_manager, timed_tools, recorder), prompts
+        ))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "sessions": len(prompts),
+        "failed": completed.count(False),
+        "elapsed": elapsed,
+        "throughput": len(prompts) / elapsed,
+        "latency": {
+            metric: {name: percentile(values, q) for name, q in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))}
+            for metric, values in sorted(recorder.samples.items())
+        },
+    }
+
+
+def print_level(level: dict):
+    print(f"\nConcurrency {level['concurrency']}: {level['sessions']} sessions in {level['elapsed']:.2f}s, "
+          f"{level['throughput']:.2f} sessions/s, {level['failed']} failed")
+    print(f"  {'metric':<24}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}  (ms)")
+    for metric, stats in level["latency"].items():
+        print(f"  {metric:<24}" + "".join(f"{stats[name] * 1e3:9.1f}" for name in ("p50", "p90", "p99", "max")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end agent benchmark against local fake services")
+    parser.add_argument("--sessions", type=int, default=20, help="Sessions per concurrency level")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--backend", choices=["streaming", "native"], default="streaming", help="LLM backend")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Seconds before the first LLM token")
+    parser.add_argument("--llm-jitter", type=float, default=0.1)
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    parser.add_argument("--tool-latency", type=float, default=0.1, help="Latency of wttr.in and Tavily stubs")
+    parser.add_argument("--tool-jitter", type=float, default=0.05)
+    parser.add_argument("--storage", choices=["files", "segments"], default="files", help="Report storage")
+    parser.add_argument("--cache", action="store_true", help="Keep the weather and search caches enabled")
+    parser.add_argument("--rate-limits", default="",
+                        help='Client-side rate limits, e.g. "llm=8:16,tavily=8:16,wttr=4:8" (default: none)')
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    # 1. Start the fake services
+    llm = FakeLLMServer(args.llm_latency, args.llm_jitter, args.seed, token_delay=args.token_delay).start()
+    weather = FakeWeatherServer(args.tool_latency, args.tool_jitter, args.seed + 1).start()
+    search = FakeSearchServer(args.tool_latency, args.tool_jitter, args.seed + 2).start()
+
+    # 2. Point the tools at them, module settings are read on import so this happens first
+    workdir = tempfile.mkdtemp(prefix="bench_e2e_")
+    os.environ.update({
+        "LLM_BACKEND": args.backend,
+        "WTTR_BASE_URL": weather.base_url,
+        "TAVILY_API_URL": f"{search.base_url}/search",
+        "TAVILY_API_KEY": "fake-key",
+        "SEARCH_CACHE_PATH": os.path.join(workdir, "search_cache.sqlite3"),
+        "RATE_LIMITS": args.rate_limits,
+    })
+    if not args.cache:
+        os.environ.update({"SEARCH_CACHE_DISABLED": "1", "WEATHER_CACHE_TTL": "0"})
+
+    from agent.session import create_available_tools
+    from utils.llm_client import OpenAICompatibleClient
+    from utils.output_manager import OutputManager
+    from utils.prefetch import get_prefetch_cache
+    from utils.scheduler import get_scheduler
+
+    model = OpenAICompatibleClient(model="fake-model", api_key="fake-key", base_url=f"{llm.base_url}/v1")
+    output_manager = OutputManager(os.path.join(workdir, "output"), storage=args.storage)
+    tools = create_available_tools()
+
+    # 3. Run every level on the same seeded prompts, after one warm-up session
+    rng = random.Random(args.seed)
+    cities = [record.name for record in CITIES if record.country != "CN"]
+    prompts = [_PROMPT.format(city=rng.choice(cities)) for _ in range(args.sessions)]
+    run_one(prompts[0], model, output_manager, tools, Recorder())
+
+    print(f"Backend: {args.backend}, LLM latency {args.llm_latency * 1e3:g}±{args.llm_jitter * 1e3:g} ms, "
+          f"tool latency {args.tool_latency * 1e3:g}±{args.tool_jitter * 1e3:g} ms, storage: {args.storage}")
+    levels = []
+    for concurrency in [int(value) for value in args.concurrency.split(",")]:
+        level = run_level(concurrency, prompts, model, output_manager, tools)
+        print_level(level)
+        levels.append(level)
+
+    print(f"\nRequests served: LLM {llm.requests}, weather {weather.requests}, search {search.requests}")
+    print(f"Prefetch: {get_prefetch_cache().stats()}")
+    print(f"Scheduler: {get_scheduler().stats()}")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "levels": levels}, f, indent=2)
+        print(f"Results written to {args.json_path}")
+
+    for server in (llm, weather, search):
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
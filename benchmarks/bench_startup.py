@@ -0,0 +1,101 @@
+"""
+Benchmark startup time of the entry points
+
+Imports each entry point module in a fresh interpreter with -X importtime,
+reports the median import time over several runs (interpreter startup
+subtracted) and the slowest modules of the last run. Exits with status 1 if an
+entry point is slower than --max-ms or loads a module listed in --forbid, so it
+can guard against import-time regressions.
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 5 --max-ms 150
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy dependencies that only specific code paths need, none of them should load at startup
+_DEFAULT_FORBIDDEN = "camel,openai,tavily,requests"
+
+
+def run_import(statement: str) -> Tuple[float, str]:
+    """Run a statement in a fresh interpreter, returns (wall time in ms, importtime log)"""
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=_REPO_ROOT, capture_output=True, text=True
+    )
+    elapsed = (time.perf_counter() - start) * 1e3
+    if completed.returncode != 0:
+        raise RuntimeError(f"'{statement}' failed:\n{completed.stderr[-2000:]}")
+    return elapsed, completed.stderr
+
+
+def parse_importtime(log: str) -> Dict[str, Tuple[float, float]]:
+    """Parse -X importtime output into {module: (self ms, cumulative ms)}"""
+    timings = {}
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        timings[name.strip()] = (int(self_us) / 1e3, int(cumulative_us) / 1e3)
+    return timings
+
+
+def measure(module: str, repeat: int) -> Tuple[float, Dict[str, Tuple[float, float]]]:
+    """Median wall time of importing a module and the per-module timings of the last run"""
+    samples, log = [], ""
+    for _ in range(repeat):
+        elapsed, log = run_import(f"import {module}")
+        samples.append(elapsed)
+    return statistics.median(samples), parse_importtime(log)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark import time of the entry points")
+    parser.add_argument("--modules", default="main,batch,server", help="Comma-separated entry point modules")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per module, the median is reported")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest modules to list")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="Fail if an entry point takes longer to import (interpreter startup excluded)")
+    parser.add_argument("--forbid", default=_DEFAULT_FORBIDDEN,
+                        help="Comma-separated top-level packages that must not load at startup")
+    args = parser.parse_args()
+
+    baseline = statistics.median(run_import("pass")[0] for _ in range(args.repeat))
+    forbidden = {name for name in args.forbid.split(",") if name}
+    print(f"Interpreter startup: {baseline:.1f} ms (median of {args.repeat})")
+
+    failures: List[str] = []
+    for module in args.modules.split(","):
+        wall, timings = measure(module, args.repeat)
+        import_ms = wall - baseline
+        print(f"\n{module}: {import_ms:.1f} ms import time, {len(timings)} modules loaded")
+
+        slowest = sorted(timings.items(), key=lambda item: item[1][1], reverse=True)[:args.top]
+        print(f"  {'cumulative':>10}  {'self':>8}  module")
+        for name, (self_ms, cumulative_ms) in slowest:
+            print(f"  {cumulative_ms:8.1f}ms  {self_ms:6.1f}ms  {name}")
+
+        loaded_forbidden = sorted({name.split(".")[0] for name in timings} & forbidden)
+        if loaded_forbidden:
+            failures.append(f"{module} loads {', '.join(loaded_forbidden)} at startup")
+        if args.max_ms is not None and import_ms > args.max_ms:
+            failures.append(f"{module} takes {import_ms:.1f} ms to import (limit {args.max_ms:g} ms)")
+
+    if failures:
+        print("\n❌ Startup regressions:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\n✅ No startup regressions")
+
+
+if __name__ == "__main__":
+    main()
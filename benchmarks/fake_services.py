@@ -0,0 +1,240 @@
+"""
+Local stand-ins for the external services used by the agent
+
+- FakeLLMServer: OpenAI-compatible /v1/chat/completions replaying a scripted
+  ReAct conversation (weather, then attractions and budget in parallel, then
+  finish), as text Actions (streamed or not) or as native tool calls
+- FakeWeatherServer: wttr.in /{city}?format=j1
+- FakeSearchServer: Tavily /search
+
+Each server answers after a latency drawn uniformly from latency ± jitter with
+a seeded generator, so runs are reproducible.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import unquote, urlsplit
+
+from utils.gazetteer import find_city
+
+
+class _Latency:
+    """Seeded latency generator shared by the handler threads of one server"""
+
+    def __init__(self, latency: float, jitter: float, seed: int):
+        self.latency = latency
+        self.jitter = jitter
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sleep(self):
+        with self._lock:
+            delay = self._rng.uniform(self.latency - self.jitter, self.latency + self.jitter)
+        time.sleep(max(0.0, delay))
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up at its deadline
+            self.close_connection = True
+
+
+class _FakeServer:
+    """Runs a handler class on a background thread, base_url is known once started"""
+
+    handler_class = _FakeHandler
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.latency = _Latency(latency, jitter, seed)
+        self.requests = 0
+        self._requests_lock = threading.Lock()
+        server = self
+
+        class Handler(self.handler_class):
+            fake = server
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}"
+
+    def count_request(self):
+        with self._requests_lock:
+            self.requests += 1
+
+    def start(self) -> "_FakeServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def _conversation_city(messages: List[dict]) -> str:
+    """City of the user request, the scripted turns use it in their tool calls"""
+    for message in messages:
+        if message.get("role") == "user":
+            record = find_city(message.get("content") or "")
+            if record is not None:
+                return record.name
+    return "Barcelona"
+
+
+def _script(city: str) -> List[List[tuple]]:
+    """Tool calls of each scripted turn as (name, arguments)"""
+    return [
+        [("get_weather", {"city": city})],
+        [("get_attraction", {"city": city, "weather": "Sunny"}),
+         ("calculate_budget", {"city": city, "attractions": "Old Town, Cathedral", "days": 1})],
+        [("finish", {"answer": f"Enjoy a sunny day in {city}: Old Town in the morning, Cathedral after lunch."})],
+    ]
+
+
+class _LLMHandler(_FakeHandler):
+    fake: "FakeLLMServer"
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._send_json({"error": {"message": "not found"}}, status=404)
+        self.fake.count_request()
+        request = self._read_json()
+        messages = request.get("messages", [])
+        turn = sum(1 for message in messages if message.get("role") == "assistant")
+        script = _script(_conversation_city(messages))
+        calls = script[min(turn, len(script) - 1)]
+
+        self.fake.latency.sleep()
+        if request.get("tools"):
+            return self._send_json(self._completion(request, None, calls))
+
+        text = f"Thought: step {turn + 1} of the plan.\n" + "\n".join(
+            "Action: " + name + "(" + ", ".join(f"{key}={json.dumps(value, ensure_ascii=False)}"
+                                              for key, value in arguments.items()) + ")"
+            for name, arguments in calls
+        )
+        if request.get("stream"):
+            return self._stream(request, text)
+        return self._send_json(self._completion(request, text, None))
+
+    def _completion(self, request: dict, text: Optional[str], calls: Optional[List[tuple]]) -> dict:
+        message = {"role": "assistant", "content": text}
+        if calls:
+            message["tool_calls"] = [
+                {"id": f"call_{index}", "type": "function",
+                 "function": {"name": name, "arguments": json.dumps(arguments, ensure_ascii=False)}}
+                for index, (name, arguments) in enumerate(calls)
+            ]
+        return {
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": 0, "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if calls else "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    def _stream(self, request: dict, text: str):
+        """Send the text as server-sent events in chunks of a few characters"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for start in range(0, len(text), 16):
+                self._write_event({
+                    "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": 0,
+                    "model": request.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": {"content": text[start:start + 16]}, "finish_reason": None}],
+                })
+                if self.fake.token_delay:
+                    time.sleep(self.fake.token_delay)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closes the stream as soon as the Actions are complete
+            self.close_connection = True
+
+    def _write_event(self, payload: dict):
+        self._write_chunk(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeLLMServer(_FakeServer):
+    """OpenAI-compatible chat endpoint replaying a three-turn ReAct script"""
+
+    handler_class = _LLMHandler
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, seed: int = 0, token_delay: float = 0.0):
+        """
+        Args:
+            latency: Seconds before the first token
+            jitter: Latency varies uniformly by up to this many seconds
+            seed: Seed of the latency generator
+            token_delay: Seconds between streamed chunks
+        """
+        super().__init__(latency, jitter, seed)
+        self.token_delay = token_delay
+
+
+class _WeatherHandler(_FakeHandler):
+    fake: "FakeWeatherServer"
+
+    def do_GET(self):
+        self.fake.count_request()
+        city = unquote(urlsplit(self.path).path.strip("/")) or "Unknown"
+        self.fake.latency.sleep()
+        self._send_json({
+            "current_condition": [{"temp_C": str(15 + len(city) % 10), "weatherDesc": [{"value": "Sunny"}]}],
+            "nearest_area": [{"areaName": [{"value": city}]}],
+        })
+
+
+class FakeWeatherServer(_FakeServer):
+    """wttr.in stand-in answering every city with the j1 JSON format"""
+
+    handler_class = _WeatherHandler
+
+
+class _SearchHandler(_FakeHandler):
+    fake: "FakeSearchServer"
+
+    def do_POST(self):
+        self.fake.count_request()
+        query = self._read_json().get("query", "")
+        self.fake.latency.sleep()
+        self._send_json({
+            "query": query,
+            "answer": f"Summary for: {query[:80]}. Tickets cost around 15-30 per person, a day pass about 10.",
+            "results": [{"title": f"Result {index}", "url": f"https://example.com/{index}",
+                         "content": f"Details about {query[:40]} ({index})."} for index in range(3)],
+        })
+
+
+class FakeSearchServer(_FakeServer):
+    """Tavily stand-in returning an answer and three results for any query"""
+
+    handler_class = _SearchHandler
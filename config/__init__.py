@@ -1,5 +1,5 @@
 # Configuration package
-from .agent_system_prompt import AGENT_SYSTEM_PROMPT
+from .agent_system_prompt import AGENT_SYSTEM_PROMPT, AGENT_TOOL_CALLING_SYSTEM_PROMPT
 from .api_keys import (
     MODELSCOPE_API_KEY, 
     MODELSCOPE_BASE_URL, 
@@ -9,6 +9,7 @@ from .api_keys import (
 
 __all__ = [
     'AGENT_SYSTEM_PROMPT', 
+    'AGENT_TOOL_CALLING_SYSTEM_PROMPT', 
     'MODELSCOPE_API_KEY', 
     'MODELSCOPE_BASE_URL', 
     'MODEL_NAME', 
@@ -1,6 +1,26 @@
 # Custom tools package
-from .weather_tools import get_weather
-from .attraction_tools import get_attraction
-from .budget_tools import calculate_budget, get_budget_summary
+# Tools are imported on first access (PEP 562), so importing the package stays cheap
+import importlib
 
-__all__ = ['get_weather', 'get_attraction', 'calculate_budget', 'get_budget_summary']
\ No newline at end of file
+_EXPORTS = {
+    'get_weather': '.weather_tools',
+    'get_weather_batch': '.weather_tools',
+    'get_attraction': '.attraction_tools',
+    'calculate_budget': '.budget_tools',
+    'get_budget_summary': '.budget_tools',
+    'allocate_budgets': '.budget_allocation',
+}
+
+__all__ = ['get_weather', 'get_weather_batch', 'get_attraction', 'calculate_budget', 'get_budget_summary', 'allocate_budgets']
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
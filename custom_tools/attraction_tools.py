@@ -1,26 +1,45 @@
 import os
-from tavily import TavilyClient
+import re
+from typing import Optional
+
+from utils.gazetteer import canonical_city_name
+from .search_client import cached_search, prefetch_search
+
+# Weather condition classes and the words that select them, checked in this order
+# ("Light rain shower, partly cloudy" is rainy)
+_WEATHER_CONDITIONS = [
+    ("snowy", ("snow", "sleet", "blizzard", "ice pellets", "雪")),
+    ("rainy", ("rain", "drizzle", "shower", "thunder", "storm", "雨")),
+    ("foggy", ("fog", "mist", "haze", "雾", "霾")),
+    ("cloudy", ("cloud", "overcast", "云", "阴")),
+    ("sunny", ("sun", "clear", "fair", "晴")),
+]
+
 
 def get_attraction(city: str, weather: str) -> str:
     """
     Based on city and weather, use Tavily Search API to search and return optimized attraction recommendations.
+
+    Args:
+        city: City name
+        weather: Current weather description, e.g. "Light rain"
+    
+    Returns:
+        Attraction recommendations
     """
     # 1. Read API key from environment variables
     api_key = os.environ.get("TAVILY_API_KEY")
     if not api_key:
         return "Error: TAVILY_API_KEY environment variable not configured."
 
-    # 2. Initialize Tavily client
-    tavily = TavilyClient(api_key=api_key)
-    
-    # 3. Construct a precise query
-    query = f"Best tourist attractions to visit in '{city}' under '{weather}' weather conditions with reasons, and create a full day travel plan"
+    # 2. Construct a precise query
+    query = _build_attraction_query(city, weather)
     
     try:
-        # 4. Call API, include_answer=True will return a comprehensive answer
-        response = tavily.search(query=query, search_depth="basic", include_answer=True)
+        # 3. Call API (or reuse a cached response), include_answer=True will return a comprehensive answer
+        response = cached_search(api_key, query, family="attraction", search_depth="basic", include_answer=True)
         
-        # 5. Tavily's returned results are already very clean and can be used directly
+        # 4. Tavily's returned results are already very clean and can be used directly
         # response['answer'] is a summary answer based on all search results
         if response.get("answer"):
             return response["answer"]
@@ -36,4 +55,47 @@ def get_attraction(city: str, weather: str) -> str:
         return "Based on search, found the following information for you:\n" + "\n".join(formatted_results)
 
     except Exception as e:
-        return f"Error: Problem occurred while executing Tavily search - {e}"
\ No newline at end of file
+        return f"Error: Problem occurred while executing Tavily search - {e}"
+
+
+def weather_condition(weather: str) -> Optional[str]:
+    """
+    Map a weather description to its condition class
+
+    Args:
+        weather: Description as reported by the weather tool or paraphrased by the model, e.g. "Light rain"
+
+    Returns:
+        "snowy", "rainy", "foggy", "cloudy" or "sunny", None if no class matches
+    """
+    text = weather.casefold()
+    for condition, keywords in _WEATHER_CONDITIONS:
+        if any(re.search(rf"\b{re.escape(keyword)}" if keyword.isascii() else re.escape(keyword), text)
+               for keyword in keywords):
+            return condition
+    return None
+
+
+def _build_attraction_query(city: str, weather: str) -> str:
+    """
+    Build the attraction query, aliases of a known city share its canonical name (and cache entries)
+
+    The weather is reduced to its condition class, so "Sunny", "sunny" and "Clear" make the same
+    query and a prefetch started from the weather observation matches the model's own wording.
+    """
+    condition = weather_condition(weather) or " ".join(weather.split()).casefold()
+    return f"Best tourist attractions to visit in '{canonical_city_name(city)}' under '{condition}' weather conditions with reasons, and create a full day travel plan"
+
+
+def prefetch_attraction(city: str, weather: str) -> bool:
+    """
+    Start the attraction search of get_attraction(city, weather) in the background
+
+    Returns:
+        True if the prefetch started
+    """
+    api_key = os.environ.get("TAVILY_API_KEY")
+    if not api_key:
+        return False
+    return prefetch_search(api_key, _build_attraction_query(city, weather), family="attraction",
+                           search_depth="basic", include_answer=True)
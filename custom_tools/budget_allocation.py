@@ -0,0 +1,220 @@
+"""
+Batch budget allocation for many (city, total budget, ratio profile) rows
+
+allocate_budgets() splits every total into transport, tickets, food and other
+costs in one pass and returns the amounts as columns. With NumPy installed,
+large batches are computed with vectorized array arithmetic; otherwise (and
+for small batches, where importing NumPy costs more than it saves) the same
+arithmetic runs in plain Python. Text is only built for the rows asked for.
+"""
+import os
+from typing import Dict, Iterator, List, Sequence, Union
+
+from utils.gazetteer import currency_of_country, find_country, lookup_city
+
+# Budget categories, the order of every ratio profile
+BUDGET_CATEGORIES = ("transport", "tickets", "food", "other")
+
+# Share of the total per category, each profile sums to 1
+BUDGET_PROFILES: Dict[str, tuple] = {
+    "standard": (0.20, 0.30, 0.30, 0.20),
+    "backpacker": (0.25, 0.25, 0.35, 0.15),  # Cheap food and hostels, few paid attractions
+    "family": (0.20, 0.35, 0.30, 0.15),      # Tickets for several people dominate
+    "luxury": (0.15, 0.25, 0.35, 0.25),      # Fine dining and shopping
+}
+
+# Batches smaller than this are computed in plain Python even when NumPy is available
+VECTORIZE_MIN_ROWS = int(os.environ.get("BUDGET_VECTORIZE_MIN_ROWS", "64"))
+
+_CATEGORY_LINES = (
+    ("🚇", "Transport Costs"),
+    ("🎫", "Ticket Costs"),
+    ("🍽️", "Food Costs"),
+    ("🛍️", "Other Costs"),
+)
+
+
+def _load_numpy():
+    """Return the numpy module, or None if it is not installed"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class BudgetAllocations:
+    """
+    Columnar result of allocate_budgets()
+
+    Attributes:
+        cities: City of each row
+        totals: Total budget of each row
+        profiles: Ratio profile name of each row
+        currency_symbols: Local currency symbol of each row
+        currency_names: Local currency name of each row
+        columns: Category -> amount of each row (NumPy array or list)
+        ratios: Category -> ratio of each row (NumPy array or list)
+        valid: Whether each row's total is greater than 0, invalid rows have zero amounts
+    """
+
+    def __init__(self, cities: List[str], totals, profiles: List[str], currency_symbols: List[str],
+                 currency_names: List[str], columns: Dict[str, Sequence[float]],
+                 ratios: Dict[str, Sequence[float]], valid: Sequence[bool]):
+        self.cities = cities
+        self.totals = totals
+        self.profiles = profiles
+        self.currency_symbols = currency_symbols
+        self.currency_names = currency_names
+        self.columns = columns
+        self.ratios = ratios
+        self.valid = valid
+
+    def __len__(self) -> int:
+        return len(self.cities)
+
+    def row(self, index: int) -> dict:
+        """One row as a dictionary with plain Python values"""
+        row = {
+            "city": self.cities[index],
+            "total": float(self.totals[index]),
+            "profile": self.profiles[index],
+            "currency_symbol": self.currency_symbols[index],
+            "currency_name": self.currency_names[index],
+            "valid": bool(self.valid[index]),
+        }
+        for category in BUDGET_CATEGORIES:
+            row[category] = float(self.columns[category][index])
+        return row
+
+    def format(self, index: int) -> str:
+        """
+        Budget allocation suggestion text of one row, as returned by get_budget_summary()
+
+        Args:
+            index: Row index
+
+        Returns:
+            Suggestion text, or an error string if the row's total is not greater than 0
+        """
+        if not self.valid[index]:
+            return "Error: Budget amount must be greater than 0"
+
+        symbol = self.currency_symbols[index]
+        summary = [f"=== {self.cities[index]} Budget Allocation Suggestions (Total Budget: "
+                   f"{symbol}{float(self.totals[index]):.0f} {self.currency_names[index]}) ===\n"]
+        for category, (icon, label) in zip(BUDGET_CATEGORIES, _CATEGORY_LINES):
+            amount = float(self.columns[category][index])
+            ratio = float(self.ratios[category][index])
+            summary.append(f"{icon} {label}: {symbol}{amount:.0f} ({ratio*100:.0f}%)")
+        summary.append("")
+        summary.append("💡 Friendly Tips:")
+        summary.append("- Above allocation is for reference only, can be adjusted based on personal preferences")
+        summary.append("- Recommend reserving 10-20% emergency funds")
+        summary.append("- Can save costs through group buying, coupons and other methods")
+        return "\n".join(summary)
+
+    def iter_text(self) -> Iterator[str]:
+        """Format the rows one at a time"""
+        for index in range(len(self)):
+            yield self.format(index)
+
+    def to_dict(self) -> dict:
+        """Columns as plain lists, e.g. for JSON"""
+        def plain(values) -> list:
+            return values.tolist() if hasattr(values, "tolist") else list(values)
+
+        result = {
+            "city": list(self.cities),
+            "total": plain(self.totals),
+            "profile": list(self.profiles),
+            "currency_symbol": list(self.currency_symbols),
+            "currency_name": list(self.currency_names),
+            "valid": plain(self.valid),
+        }
+        for category in BUDGET_CATEGORIES:
+            result[category] = plain(self.columns[category])
+        return result
+
+
+def allocate_budgets(cities: Sequence[str], totals: Sequence[float],
+                     profiles: Union[str, Sequence[str]] = "standard") -> BudgetAllocations:
+    """
+    Split many total budgets into transport, tickets, food and other costs at once
+
+    Args:
+        cities: City of each row
+        totals: Total budget of each row, in the city's local currency
+        profiles: Ratio profile name for all rows, or one per row (see BUDGET_PROFILES)
+
+    Returns:
+        BudgetAllocations with one row per city
+
+    Raises:
+        ValueError: If the sequences differ in length or a profile is unknown
+    """
+    # 1. Check the inputs
+    cities = list(cities)
+    profiles = [profiles] * len(cities) if isinstance(profiles, str) else list(profiles)
+    if not (len(cities) == len(totals) == len(profiles)):
+        raise ValueError(f"cities, totals and profiles differ in length "
+                         f"({len(cities)}, {len(totals)}, {len(profiles)})")
+    unknown = sorted(set(profiles) - set(BUDGET_PROFILES))
+    if unknown:
+        raise ValueError(f"Unknown budget profile(s): {', '.join(unknown)}; "
+                         f"choose from {', '.join(BUDGET_PROFILES)}")
+
+    # 2. Currencies, looked up once per distinct city
+    currencies = {city: _get_currency_info(city) for city in set(cities)}
+    currency_symbols = [currencies[city]["symbol"] for city in cities]
+    currency_names = [currencies[city]["name"] for city in cities]
+
+    # 3. Amounts: total times the ratio row of the profile, for every row and category at once
+    numpy = _load_numpy() if len(cities) >= VECTORIZE_MIN_ROWS else None
+    if numpy is not None:
+        profile_names = list(BUDGET_PROFILES)
+        ratio_matrix = numpy.array([BUDGET_PROFILES[name] for name in profile_names], dtype=float)
+        profile_index = {name: index for index, name in enumerate(profile_names)}
+        row_ratios = ratio_matrix[numpy.fromiter((profile_index[name] for name in profiles), dtype=numpy.intp,
+                                                 count=len(profiles))]
+        total_array = numpy.asarray(totals, dtype=float)
+        valid = total_array > 0
+        amounts = numpy.where(valid[:, None], total_array[:, None] * row_ratios, 0.0)
+        columns = {category: amounts[:, index] for index, category in enumerate(BUDGET_CATEGORIES)}
+        ratios = {category: row_ratios[:, index] for index, category in enumerate(BUDGET_CATEGORIES)}
+    else:
+        total_array = [float(total) for total in totals]
+        valid = [total > 0 for total in total_array]
+        row_ratios = [BUDGET_PROFILES[name] for name in profiles]
+        columns = {
+            category: [total * ratio[index] if ok else 0.0 for total, ratio, ok in zip(total_array, row_ratios, valid)]
+            for index, category in enumerate(BUDGET_CATEGORIES)
+        }
+        ratios = {category: [ratio[index] for ratio in row_ratios] for index, category in enumerate(BUDGET_CATEGORIES)}
+
+    return BudgetAllocations(cities, total_array, profiles, currency_symbols, currency_names, columns, ratios, valid)
+
+
+def _get_currency_info(city: str) -> dict:
+    """
+    Get local currency information based on city name
+
+    Args:
+        city: City name
+
+    Returns:
+        Dictionary containing currency symbol and name
+    """
+    # 1. Known city or alias, also when followed by a region ("Barcelona, Spain")
+    record = lookup_city(city) or lookup_city(city.split(",")[0])
+    if record is not None:
+        return {"symbol": record.currency_symbol, "name": record.currency_name}
+
+    # 2. Unknown city, infer the currency from a country named in it
+    country = find_country(city)
+    currency = currency_of_country(country) if country else None
+    if currency is not None:
+        return currency
+
+    # Default return Euro (since most queries might be European cities)
+    return {"symbol": "€", "name": "Euro"}
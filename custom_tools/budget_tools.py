@@ -1,5 +1,57 @@
+import atexit
 import os
-from tavily import TavilyClient
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from utils.gazetteer import canonical_city_key, canonical_city_name
+from utils.parallel import run_parallel
+from utils.persistent_cache import PersistentCache
+from utils.tracing import record_cache
+from .budget_allocation import allocate_budgets
+from .search_client import (SEARCH_CACHE_DISABLED, SEARCH_CACHE_PATH, SEARCH_CACHE_TTLS, cached_search,
+                            normalize_query, prefetch_search, scheduled_search)
+
+# Ticket and transport searches are independent, so they run side by side
+BUDGET_SEARCH_WORKERS = int(os.environ.get("BUDGET_SEARCH_WORKERS", "8"))
+# Maximum time to wait for each sub-query before returning partial results
+BUDGET_SEARCH_TIMEOUT = float(os.environ.get("BUDGET_SEARCH_TIMEOUT", "15"))
+
+# Price info of single attractions, kept in the search cache file under its own namespace
+ATTRACTION_PRICE_TTL = float(os.environ.get("ATTRACTION_PRICE_TTL", str(SEARCH_CACHE_TTLS["ticket"])))
+# Searches that found nothing are only remembered briefly, the price may be indexed soon
+ATTRACTION_PRICE_EMPTY_TTL = float(os.environ.get("ATTRACTION_PRICE_EMPTY_TTL", "3600"))
+ATTRACTION_PRICE_MAX_ENTRIES = int(os.environ.get("ATTRACTION_PRICE_MAX_ENTRIES", "50000"))
+# Maximum attractions priced per call, the rest of a long list is ignored
+MAX_PRICED_ATTRACTIONS = int(os.environ.get("MAX_PRICED_ATTRACTIONS", "10"))
+
+# Price info of an attraction whose search found nothing
+NO_PRICE_INFO = "No price information found"
+
+# Separators of the attractions argument: commas (also full-width), enumeration commas, semicolons
+_ATTRACTION_SEPARATORS = re.compile(r"[,，、;；\n]")
+
+_search_executor = ThreadPoolExecutor(max_workers=BUDGET_SEARCH_WORKERS, thread_name_prefix="budget-search")
+_price_cache = None
+_price_cache_lock = threading.Lock()
+
+
+def get_price_cache() -> PersistentCache:
+    """Return the process-wide (city, attraction) -> price info store, opening it on first use"""
+    global _price_cache
+    if _price_cache is None:
+        with _price_cache_lock:
+            if _price_cache is None:
+                _price_cache = PersistentCache(
+                    SEARCH_CACHE_PATH,
+                    namespace="attraction_prices",
+                    default_ttl=ATTRACTION_PRICE_TTL,
+                    max_entries=ATTRACTION_PRICE_MAX_ENTRIES,
+                )
+                atexit.register(_price_cache.flush_stats)
+    return _price_cache
+
 
 def calculate_budget(city: str, attractions: str, days: int = 1) -> str:
     """
@@ -18,53 +70,45 @@ def calculate_budget(city: str, attractions: str, days: int = 1) -> str:
     if not api_key:
         return "Error: TAVILY_API_KEY environment variable not configured."
 
-    # 2. Initialize Tavily client
-    tavily = TavilyClient(api_key=api_key)
-    
     try:
-        # 3. Query attraction ticket prices
-        ticket_query = f"{city} {attractions} ticket prices entrance fee cost"
-        ticket_response = tavily.search(query=ticket_query, search_depth="basic", include_answer=True)
-        
-        # 4. Query public transport costs
-        transport_query = f"{city} public transport cost metro bus day pass transport card prices"
-        transport_response = tavily.search(query=transport_query, search_depth="basic", include_answer=True)
+        # 2. Look up each attraction's price info in the store, only the missing ones are searched
+        # (aliases of a known city share its canonical name and entries)
+        search_city = canonical_city_name(city)
+        names = _split_attractions(attractions)
+        keys = [_price_key(city, name) for name in names]
+        prices = _get_cached_prices(keys)
+
+        # 3. Search the missing prices and the public transport costs concurrently
+        # (transport only depends on the city and is served from the search cache when repeated)
+        transport_query = _build_transport_query(search_city)
+        missing = [index for index, info in enumerate(prices) if info is None]
+        outcomes = run_parallel(_search_executor, [
+            lambda: cached_search(api_key, transport_query, family="transport", search_depth="basic", include_answer=True),
+        ] + [
+            (lambda name=names[index]: _fetch_price_info(api_key, search_city, name)) for index in missing
+        ], timeout=BUDGET_SEARCH_TIMEOUT)
+        transport_outcome, price_outcomes = outcomes[0], outcomes[1:]
+
+        failures = []
+        for index, outcome in zip(missing, price_outcomes):
+            if outcome.ok:
+                prices[index] = outcome.value
+                _store_price_info(keys[index], outcome.value)
+            else:
+                prices[index] = f"Not available: {_describe_failure(outcome)}"
+                failures.append(outcome)
+
+        if not transport_outcome.ok and len(failures) == len(names):
+            # Nothing to show, say why each half failed
+            causes = [f"ticket prices: {_describe_failure(failures[0])}"] if failures else []
+            causes.append(f"transport costs: {_describe_failure(transport_outcome)}")
+            return f"Error: Problem occurred while querying budget information - {'; '.join(causes)}"
         
-        # 5. Integrate budget information
+        # 4. Integrate budget information, a failed sub-query still leaves the rest
         budget_info = []
         budget_info.append(f"=== {city} Travel Budget Calculation ({days} day{'s' if days > 1 else ''}) ===\n")
-        
-        # Ticket cost information
-        if ticket_response.get("answer"):
-            budget_info.append("🎫 Attraction Ticket Costs:")
-            budget_info.append(ticket_response["answer"])
-            budget_info.append("")
-        else:
-            # If no comprehensive answer, use search results
-            ticket_results = []
-            for result in ticket_response.get("results", [])[:3]:  # Take first 3 results
-                ticket_results.append(f"- {result['title']}: {result['content'][:200]}...")
-            
-            if ticket_results:
-                budget_info.append("🎫 Attraction Ticket Costs:")
-                budget_info.extend(ticket_results)
-                budget_info.append("")
-        
-        # Transport cost information
-        if transport_response.get("answer"):
-            budget_info.append("🚇 Public Transport Costs:")
-            budget_info.append(transport_response["answer"])
-            budget_info.append("")
-        else:
-            # If no comprehensive answer, use search results
-            transport_results = []
-            for result in transport_response.get("results", [])[:3]:  # Take first 3 results
-                transport_results.append(f"- {result['title']}: {result['content'][:200]}...")
-            
-            if transport_results:
-                budget_info.append("🚇 Public Transport Costs:")
-                budget_info.extend(transport_results)
-                budget_info.append("")
+        budget_info.extend(_format_price_section("🎫 Attraction Ticket Costs:", names, prices))
+        budget_info.extend(_format_search_section("🚇 Public Transport Costs:", transport_outcome))
         
         # Add budget suggestions
         budget_info.append("💡 Budget Suggestions:")
@@ -78,195 +122,145 @@ def calculate_budget(city: str, attractions: str, days: int = 1) -> str:
         return f"Error: Problem occurred while querying budget information - {e}"
 
 
-def get_budget_summary(city: str, total_budget: float) -> str:
+def _split_attractions(attractions: str) -> List[str]:
+    """Split the attractions argument into distinct names, keeping their order"""
+    names, seen = [], set()
+    for part in _ATTRACTION_SEPARATORS.split(str(attractions)):
+        name = " ".join(part.split())
+        if name and normalize_query(name) not in seen:
+            seen.add(normalize_query(name))
+            names.append(name)
+    return names[:MAX_PRICED_ATTRACTIONS]
+
+
+def _price_key(city: str, attraction: str) -> str:
+    """Store key of an attraction, the same for every spelling of a known city"""
+    return f"{canonical_city_key(city)}|{normalize_query(attraction)}"
+
+
+def _get_cached_prices(keys: List[str]) -> List[Optional[str]]:
+    """Stored price info of each key, None where it is missing or expired"""
+    if SEARCH_CACHE_DISABLED:
+        return [None] * len(keys)
+    cache = get_price_cache()
+    prices = []
+    for key in keys:
+        info = cache.get(key, family="ticket")
+        record_cache(hit=info is not None)
+        prices.append(info)
+    return prices
+
+
+def _store_price_info(key: str, info: str):
+    """Store the price info of one attraction, an empty result with the short ATTRACTION_PRICE_EMPTY_TTL"""
+    if SEARCH_CACHE_DISABLED:
+        return
+    ttl = ATTRACTION_PRICE_EMPTY_TTL if info == NO_PRICE_INFO else None
+    if ttl is not None and ttl <= 0:
+        return
+    get_price_cache().set(key, info, ttl=ttl, family="ticket")
+
+
+def _fetch_price_info(api_key: str, city: str, attraction: str) -> str:
     """
-    Provide budget allocation suggestions based on total budget
-    
+    Search the ticket price of one attraction
+
+    Returns:
+        Tavily's summary answer, the start of the first results if it has none,
+        or NO_PRICE_INFO if the search found nothing
+
+    Raises:
+        requests.exceptions.RequestException: If the search fails
+    """
+    response = scheduled_search(api_key, f"{city} {attraction} ticket price entrance fee cost",
+                                search_depth="basic", include_answer=True)
+    if response.get("answer"):
+        return response["answer"]
+    snippets = [f"{result['title']}: {result['content'][:200]}..." for result in response.get("results", [])[:2]]
+    return " | ".join(snippets) or NO_PRICE_INFO
+
+
+def prefetch_transport_costs(city: str) -> bool:
+    """
+    Start the public transport search of calculate_budget in the background, it only depends on the city
+
+    Returns:
+        True if the prefetch started
+    """
+    api_key = os.environ.get("TAVILY_API_KEY")
+    if not api_key:
+        return False
+    return prefetch_search(api_key, _build_transport_query(canonical_city_name(city)), family="transport",
+                           search_depth="basic", include_answer=True)
+
+
+def _build_transport_query(city: str) -> str:
+    """Build the public transport cost query, it only depends on the city"""
+    return f"{city} public transport cost metro bus day pass transport card prices"
+
+
+def _describe_failure(outcome) -> str:
+    """Describe why a search sub-query produced no result"""
+    if outcome.timed_out:
+        return f"search timed out after {BUDGET_SEARCH_TIMEOUT:g}s"
+    return str(outcome.error)
+
+
+def _format_price_section(title: str, names: List[str], prices: List[str]) -> list:
+    """
+    Format the per-attraction price info as budget text lines
+
     Args:
-        city: City name
-        total_budget: Total budget amount (local currency)
-    
+        title: Section title
+        names: Attraction names
+        prices: Price info of each attraction, same order
+
     Returns:
-        Budget allocation suggestion string
+        List of lines, empty if no attractions were given
     """
-    if total_budget <= 0:
-        return "Error: Budget amount must be greater than 0"
-    
-    # Get currency information based on city
-    currency_info = _get_currency_info(city)
-    currency_symbol = currency_info["symbol"]
-    currency_name = currency_info["name"]
-    
-    # Budget allocation ratios (can be adjusted based on different cities)
-    transport_ratio = 0.2  # Transport 20%
-    tickets_ratio = 0.3    # Tickets 30%
-    food_ratio = 0.3       # Food 30%
-    other_ratio = 0.2      # Other 20%
-    
-    transport_budget = total_budget * transport_ratio
-    tickets_budget = total_budget * tickets_ratio
-    food_budget = total_budget * food_ratio
-    other_budget = total_budget * other_ratio
+    if not names:
+        return []
+    return [title] + [f"- {name}: {info}" for name, info in zip(names, prices)] + [""]
+
+
+def _format_search_section(title: str, outcome) -> list:
+    """
+    Format one search sub-query as budget text lines
     
-    summary = []
-    summary.append(f"=== {city} Budget Allocation Suggestions (Total Budget: {currency_symbol}{total_budget:.0f} {currency_name}) ===\n")
-    summary.append(f"🚇 Transport Costs: {currency_symbol}{transport_budget:.0f} ({transport_ratio*100:.0f}%)")
-    summary.append(f"🎫 Ticket Costs: {currency_symbol}{tickets_budget:.0f} ({tickets_ratio*100:.0f}%)")
-    summary.append(f"🍽️ Food Costs: {currency_symbol}{food_budget:.0f} ({food_ratio*100:.0f}%)")
-    summary.append(f"🛍️ Other Costs: {currency_symbol}{other_budget:.0f} ({other_ratio*100:.0f}%)")
-    summary.append("")
-    summary.append("💡 Friendly Tips:")
-    summary.append("- Above allocation is for reference only, can be adjusted based on personal preferences")
-    summary.append("- Recommend reserving 10-20% emergency funds")
-    summary.append("- Can save costs through group buying, coupons and other methods")
+    Args:
+        title: Section title
+        outcome: TaskOutcome of the search
     
-    return "\n".join(summary)
+    Returns:
+        List of lines, empty if the search returned nothing
+    """
+    if not outcome.ok:
+        return [title, f"- Not available: {_describe_failure(outcome)}", ""]
+
+    response = outcome.value
+    if response.get("answer"):
+        return [title, response["answer"], ""]
 
+    # If no comprehensive answer, use search results
+    results = []
+    for result in response.get("results", [])[:3]:  # Take first 3 results
+        results.append(f"- {result['title']}: {result['content'][:200]}...")
 
-def _get_currency_info(city: str) -> dict:
+    if not results:
+        return []
+    return [title] + results + [""]
+
+
+def get_budget_summary(city: str, total_budget: float) -> str:
     """
-    Get local currency information based on city name
+    Provide budget allocation suggestions based on total budget
     
     Args:
         city: City name
+        total_budget: Total budget amount (local currency)
     
     Returns:
-        Dictionary containing currency symbol and name
+        Budget allocation suggestion string
     """
-    # City to currency mapping
-    city_currency_map = {
-        # European cities - Euro
-        "Granada": {"symbol": "€", "name": "Euro"},
-        "Madrid": {"symbol": "€", "name": "Euro"},
-        "Barcelona": {"symbol": "€", "name": "Euro"},
-        "Valencia": {"symbol": "€", "name": "Euro"},
-        "Seville": {"symbol": "€", "name": "Euro"},
-        "Bilbao": {"symbol": "€", "name": "Euro"},
-        "Zaragoza": {"symbol": "€", "name": "Euro"},
-        "Malaga": {"symbol": "€", "name": "Euro"},
-        "Murcia": {"symbol": "€", "name": "Euro"},
-        "Palma": {"symbol": "€", "name": "Euro"},
-        "Cordoba": {"symbol": "€", "name": "Euro"},
-        "Alicante": {"symbol": "€", "name": "Euro"},
-        "Toledo": {"symbol": "€", "name": "Euro"},
-        "Salamanca": {"symbol": "€", "name": "Euro"},
-        "Burgos": {"symbol": "€", "name": "Euro"},
-        "Leon": {"symbol": "€", "name": "Euro"},
-        "Valladolid": {"symbol": "€", "name": "Euro"},
-        "Logrono": {"symbol": "€", "name": "Euro"},
-        "Pamplona": {"symbol": "€", "name": "Euro"},
-        "San Sebastian": {"symbol": "€", "name": "Euro"},
-        "Vitoria": {"symbol": "€", "name": "Euro"},
-        "Ronda": {"symbol": "€", "name": "Euro"},
-        "Sevilla": {"symbol": "€", "name": "Euro"},
-        
-        # Other European cities
-        "Paris": {"symbol": "€", "name": "Euro"},
-        "Berlin": {"symbol": "€", "name": "Euro"},
-        "Munich": {"symbol": "€", "name": "Euro"},
-        "Amsterdam": {"symbol": "€", "name": "Euro"},
-        "Brussels": {"symbol": "€", "name": "Euro"},
-        "Rome": {"symbol": "€", "name": "Euro"},
-        "Milan": {"symbol": "€", "name": "Euro"},
-        
-        # UK
-        "London": {"symbol": "£", "name": "Pound"},
-        
-        # USA
-        "New York": {"symbol": "$", "name": "Dollar"},
-        "NYC": {"symbol": "$", "name": "Dollar"},
-        "Los Angeles": {"symbol": "$", "name": "Dollar"},
-        "LA": {"symbol": "$", "name": "Dollar"},
-        "San Francisco": {"symbol": "$", "name": "Dollar"},
-        "SF": {"symbol": "$", "name": "Dollar"},
-        "Chicago": {"symbol": "$", "name": "Dollar"},
-        "Washington": {"symbol": "$", "name": "Dollar"},
-        "DC": {"symbol": "$", "name": "Dollar"},
-        "Boston": {"symbol": "$", "name": "Dollar"},
-        "Seattle": {"symbol": "$", "name": "Dollar"},
-        "Miami": {"symbol": "$", "name": "Dollar"},
-        "Las Vegas": {"symbol": "$", "name": "Dollar"},
-        
-        # Canada
-        "Toronto": {"symbol": "C$", "name": "Canadian Dollar"},
-        "Vancouver": {"symbol": "C$", "name": "Canadian Dollar"},
-        
-        # Australia
-        "Sydney": {"symbol": "A$", "name": "Australian Dollar"},
-        "Melbourne": {"symbol": "A$", "name": "Australian Dollar"},
-        "Brisbane": {"symbol": "A$", "name": "Australian Dollar"},
-        
-        # Japan
-        "Tokyo": {"symbol": "¥", "name": "Yen"},
-        
-        # South Korea
-        "Seoul": {"symbol": "₩", "name": "Won"},
-        
-        # Singapore
-        "Singapore": {"symbol": "S$", "name": "Singapore Dollar"},
-        
-        # Malaysia
-        "Kuala Lumpur": {"symbol": "RM", "name": "Ringgit"},
-        "KL": {"symbol": "RM", "name": "Ringgit"},
-        
-        # Thailand
-        "Bangkok": {"symbol": "฿", "name": "Baht"},
-        
-        # Russia
-        "Moscow": {"symbol": "₽", "name": "Ruble"},
-        "Saint Petersburg": {"symbol": "₽", "name": "Ruble"},
-        
-        # UAE
-        "Dubai": {"symbol": "AED", "name": "Dirham"},
-        
-        # Chinese cities - RMB
-        "Beijing": {"symbol": "¥", "name": "RMB"},
-        "Shanghai": {"symbol": "¥", "name": "RMB"},
-        "Guangzhou": {"symbol": "¥", "name": "RMB"},
-        "Shenzhen": {"symbol": "¥", "name": "RMB"},
-        "Hangzhou": {"symbol": "¥", "name": "RMB"},
-        "Nanjing": {"symbol": "¥", "name": "RMB"},
-        "Suzhou": {"symbol": "¥", "name": "RMB"},
-        "Chengdu": {"symbol": "¥", "name": "RMB"},
-        "Chongqing": {"symbol": "¥", "name": "RMB"},
-        "Xian": {"symbol": "¥", "name": "RMB"},
-        "Wuhan": {"symbol": "¥", "name": "RMB"},
-        "Tianjin": {"symbol": "¥", "name": "RMB"},
-        
-        # Hong Kong, Macau, Taiwan
-        "Hong Kong": {"symbol": "HK$", "name": "Hong Kong Dollar"},
-        "HK": {"symbol": "HK$", "name": "Hong Kong Dollar"},
-        "Macau": {"symbol": "MOP", "name": "Pataca"},
-        "Macao": {"symbol": "MOP", "name": "Pataca"},
-        "Taipei": {"symbol": "NT$", "name": "New Taiwan Dollar"},
-    }
-    
-    # Find currency information corresponding to the city
-    if city in city_currency_map:
-        return city_currency_map[city]
-    
-    # If specific city not found, try to infer country/region based on city name
-    city_lower = city.lower()
-    
-    # Spanish cities general matching
-    spanish_keywords = ["spain", "spanish"]
-    if any(keyword in city_lower for keyword in spanish_keywords):
-        return {"symbol": "€", "name": "Euro"}
-    
-    # Other European countries
-    european_keywords = ["france", "germany", "italy", "netherlands", "belgium", "austria", "portugal"]
-    if any(keyword in city_lower for keyword in european_keywords):
-        return {"symbol": "€", "name": "Euro"}
-    
-    # USA
-    us_keywords = ["usa", "united states", "america"]
-    if any(keyword in city_lower for keyword in us_keywords):
-        return {"symbol": "$", "name": "Dollar"}
-    
-    # UK
-    uk_keywords = ["uk", "united kingdom", "britain", "england"]
-    if any(keyword in city_lower for keyword in uk_keywords):
-        return {"symbol": "£", "name": "Pound"}
-    
-    # Default return Euro (since most queries might be European cities)
-    return {"symbol": "€", "name": "Euro"}
\ No newline at end of file
+    # A batch of one, see allocate_budgets() for many cities and budgets at once
+    return allocate_budgets([city], [total_budget]).format(0)
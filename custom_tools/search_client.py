@@ -0,0 +1,150 @@
+import atexit
+import hashlib
+import os
+import threading
+
+from utils.http_transport import get_transport
+from utils.persistent_cache import PersistentCache
+from utils.prefetch import get_prefetch_cache
+from utils.scheduler import get_scheduler
+from utils.tracing import record_cache
+
+# Tavily search REST endpoint, called through the shared HTTP transport
+TAVILY_API_URL = os.environ.get("TAVILY_API_URL", "https://api.tavily.com/search")
+
+# Cache file shared by every process running the tools
+SEARCH_CACHE_PATH = os.environ.get("SEARCH_CACHE_PATH", os.path.join("cache", "search_cache.sqlite3"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "20000"))
+SEARCH_CACHE_DISABLED = os.environ.get("SEARCH_CACHE_DISABLED", "") == "1"
+
+# Time to live per query family in seconds
+SEARCH_CACHE_TTLS = {
+    "attraction": 6 * 3600,       # Recommendations depend on weather, refresh a few times a day
+    "ticket": 24 * 3600,          # Ticket prices rarely change within a day
+    "transport": 7 * 24 * 3600,   # Public transport fares change very rarely
+    "default": 3600,
+}
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def normalize_query(query: str) -> str:
+    """Normalize whitespace and case so trivially different queries share a cache entry"""
+    return " ".join(query.split()).casefold()
+
+
+def search_cache_key(query: str, search_depth: str, include_answer: bool) -> str:
+    """Build the cache key of a search request"""
+    raw = f"{normalize_query(query)}|{search_depth}|{int(include_answer)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get_search_cache() -> PersistentCache:
+    """Return the process-wide search cache, opening it on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PersistentCache(
+                    SEARCH_CACHE_PATH,
+                    namespace="tavily_search",
+                    default_ttl=SEARCH_CACHE_TTLS["default"],
+                    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+                )
+                atexit.register(_cache.flush_stats)
+    return _cache
+
+
+def tavily_search(api_key: str, query: str, search_depth: str = "basic", include_answer: bool = True) -> dict:
+    """
+    Call the Tavily search API over the shared pooled connection
+
+    A search is a read, so it is retried on transient failures like a GET.
+
+    Raises:
+        requests.exceptions.RequestException: On network errors, timeouts and error responses
+    """
+    response = get_transport().post(
+        TAVILY_API_URL,
+        json={"query": query, "search_depth": search_depth, "include_answer": include_answer},
+        headers={"Authorization": f"Bearer {api_key}"},
+        idempotent=True
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+def cached_search(api_key: str, query: str, family: str = "default",
+                  search_depth: str = "basic", include_answer: bool = True) -> dict:
+    """
+    Run a Tavily search, answering repeat queries from the shared cache
+
+    A search started earlier by prefetch_search() is used (or waited for) instead
+    of searching again.
+
+    Args:
+        api_key: Tavily API key
+        query: Search query
+        family: Query family, selects the TTL and groups hit/miss statistics
+        search_depth: Tavily search depth
+        include_answer: Whether Tavily should return a summary answer
+
+    Returns:
+        Tavily response dictionary
+
+    Raises:
+        requests.exceptions.RequestException: If the search fails, failed searches are not cached
+    """
+    key = search_cache_key(query, search_depth, include_answer)
+    return get_prefetch_cache().get_or_load(
+        ("search", key),
+        lambda: _search(api_key, key, query, family, search_depth, include_answer)
+    )
+
+
+def prefetch_search(api_key: str, query: str, family: str = "default",
+                    search_depth: str = "basic", include_answer: bool = True) -> bool:
+    """
+    Start a search in the background, a later cached_search() with the same arguments uses its result
+
+    Returns:
+        True if the prefetch started
+    """
+    key = search_cache_key(query, search_depth, include_answer)
+    return get_prefetch_cache().prefetch(
+        ("search", key),
+        lambda: _search(api_key, key, query, family, search_depth, include_answer)
+    )
+
+
+def scheduled_search(api_key: str, query: str, search_depth: str = "basic", include_answer: bool = True) -> dict:
+    """
+    Run a Tavily search through the shared scheduler, without the search cache
+
+    Identical searches in flight share one request, all of them pass Tavily's rate limit.
+
+    Raises:
+        requests.exceptions.RequestException: On network errors, timeouts and error responses
+    """
+    return get_scheduler().call(
+        "tavily", search_cache_key(query, search_depth, include_answer),
+        lambda: tavily_search(api_key, query, search_depth, include_answer)
+    )
+
+
+def _search(api_key: str, key: str, query: str, family: str, search_depth: str, include_answer: bool) -> dict:
+    """Search through the persistent cache"""
+    if SEARCH_CACHE_DISABLED:
+        return scheduled_search(api_key, query, search_depth, include_answer)
+
+    cache = get_search_cache()
+    response = cache.get(key, family=family)
+    record_cache(hit=response is not None)
+    if response is not None:
+        return response
+
+    response = scheduled_search(api_key, query, search_depth, include_answer)
+    cache.set(key, response, ttl=SEARCH_CACHE_TTLS.get(family, SEARCH_CACHE_TTLS["default"]),
+              family=family)
+    return response
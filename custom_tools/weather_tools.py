@@ -1,32 +1,141 @@
-import requests
-import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 
-def get_weather(city: str) -> str:
+from utils.gazetteer import canonical_city_key
+from utils.http_transport import get_transport
+from utils.parallel import run_parallel
+from utils.prefetch import get_prefetch_cache
+from utils.scheduler import get_scheduler
+from utils.tracing import record_cache
+from utils.ttl_cache import TTLCache
+
+# wttr.in endpoint, the city is appended to it
+WTTR_BASE_URL = os.environ.get("WTTR_BASE_URL", "https://wttr.in")
+
+# Current conditions change slowly, so results are reused for a few minutes
+WEATHER_CACHE_TTL = float(os.environ.get("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_SIZE = int(os.environ.get("WEATHER_CACHE_SIZE", "256"))
+
+# Cities of one get_weather_batch call are fetched concurrently, at most this many at a time
+WEATHER_BATCH_WORKERS = int(os.environ.get("WEATHER_BATCH_WORKERS", "5"))
+WEATHER_BATCH_MAX_CITIES = int(os.environ.get("WEATHER_BATCH_MAX_CITIES", "10"))
+
+# Separators of the cities argument: commas (also full-width), enumeration commas, semicolons, "and"
+_CITY_SEPARATORS = re.compile(r"[,，、;；]|\s+and\s+")
+
+_weather_cache = TTLCache(max_size=WEATHER_CACHE_SIZE, ttl=WEATHER_CACHE_TTL)
+_batch_executor = ThreadPoolExecutor(max_workers=WEATHER_BATCH_WORKERS, thread_name_prefix="weather-batch")
+
+
+def _fetch_current_condition(city: str) -> tuple:
     """
-    Query real weather information by calling the wttr.in API.
+    Fetch current weather from wttr.in
+
+    Returns:
+        Tuple of (weather description, temperature in °C)
     """
     # API endpoint, we request JSON format data
-    url = f"https://wttr.in/{city}?format=j1"
+    url = f"{WTTR_BASE_URL}/{city}?format=j1"
+
+    # Make network request over the shared pooled connection (default timeouts and retries),
+    # identical lookups in flight share one request and all of them pass wttr.in's rate limit
+    response = get_scheduler().call("wttr", url, lambda: get_transport().get(url))
+    # Check if response status code is 200 (success)
+    response.raise_for_status()
+    # Parse returned JSON data
+    data = response.json()
+
+    # Extract current weather conditions
+    current_condition = data['current_condition'][0]
+    weather_desc = current_condition['weatherDesc'][0]['value']
+    temp_c = current_condition['temp_C']
+    return weather_desc, temp_c
+
+
+def get_weather(city: str) -> str:
+    """
+    Query real weather information by calling the wttr.in API.
+
+    Args:
+        city: City name
     
+    Returns:
+        Current weather description and temperature
+    """
+    # Imported on first use, requests adds noticeably to startup time
+    import requests
+
     try:
-        # Make network request
-        response = requests.get(url)
-        # Check if response status code is 200 (success)
-        response.raise_for_status() 
-        # Parse returned JSON data
-        data = response.json()
-        
-        # Extract current weather conditions
-        current_condition = data['current_condition'][0]
-        weather_desc = current_condition['weatherDesc'][0]['value']
-        temp_c = current_condition['temp_C']
-        
+        # Concurrent lookups for the same city share a single request, aliases share the canonical key
+        key = canonical_city_key(city)
+        fetched = []
+
+        def load():
+            fetched.append(True)
+            return _fetch_current_condition(key)
+
+        # A prefetched lookup is used (or waited for) instead of a new one
+        weather_desc, temp_c = get_prefetch_cache().get_or_load(
+            ("weather", key), lambda: _weather_cache.get_or_load(key, load)
+        )
+        record_cache(hit=not fetched)
+
         # Format as natural language and return
         return f"{city} current weather: {weather_desc}, temperature {temp_c}°C"
-        
+
     except requests.exceptions.RequestException as e:
         # Handle network errors
         return f"Error: Network problem encountered while querying weather - {e}"
     except (KeyError, IndexError) as e:
         # Handle data parsing errors
-        return f"Error: Failed to parse weather data, possibly invalid city name - {e}"
\ No newline at end of file
+        return f"Error: Failed to parse weather data, possibly invalid city name - {e}"
+
+
+def get_weather_batch(cities: str) -> str:
+    """
+    Query real-time weather for several cities at once, the lookups run concurrently.
+
+    Args:
+        cities: City names separated by commas, e.g. "Madrid, Seville, Granada"
+
+    Returns:
+        One line per city with its current weather, or the error of its lookup
+    """
+    # 1. Split into distinct cities, aliases of the same city are looked up once
+    parts = cities if isinstance(cities, list) else _CITY_SEPARATORS.split(str(cities))
+    names, seen = [], set()
+    for part in parts:
+        name = " ".join(str(part).split())
+        if name and canonical_city_key(name) not in seen:
+            seen.add(canonical_city_key(name))
+            names.append(name)
+    if not names:
+        return "Error: No city given, pass city names separated by commas."
+    skipped = names[WEATHER_BATCH_MAX_CITIES:]
+    names = names[:WEATHER_BATCH_MAX_CITIES]
+
+    # 2. Look up all cities concurrently, each one through get_weather (and its caches)
+    outcomes = run_parallel(_batch_executor, [(lambda city=city: get_weather(city)) for city in names])
+
+    # 3. One line per city, a failed city does not affect the others
+    lines = [f"Weather of {len(names)} cities:"]
+    for city, outcome in zip(names, outcomes):
+        observation = outcome.value if outcome.ok else f"Error: {outcome.error}"
+        lines.append(f"- {city}: {observation}" if observation.startswith("Error") else f"- {observation}")
+    if skipped:
+        lines.append(f"- Not queried (at most {WEATHER_BATCH_MAX_CITIES} cities per call): {', '.join(skipped)}")
+    return "\n".join(lines)
+
+
+def prefetch_weather(city: str) -> bool:
+    """
+    Start the weather lookup of a city in the background, a later get_weather(city) uses it
+
+    Returns:
+        True if the prefetch started
+    """
+    key = canonical_city_key(city)
+    return get_prefetch_cache().prefetch(
+        ("weather", key), lambda: _weather_cache.get_or_load(key, lambda: _fetch_current_condition(key))
+    )
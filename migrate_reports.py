@@ -0,0 +1,88 @@
+"""
+Move plain-text reports into the compressed segment store
+
+Every report in the catalog that is still a .txt file is appended to
+output/segments, read back to verify it, and its catalog entry is pointed at
+the new location. Originals are kept unless --delete is given. Running the
+script again only migrates what is left.
+
+Usage:
+    python migrate_reports.py --output-dir output --delete
+"""
+import argparse
+import os
+
+from utils.output_manager import REPORT_FSYNC_INTERVAL, REPORT_SEGMENT_MAX_BYTES
+from utils.report_index import ReportIndex
+from utils.segment_store import SegmentStore
+
+
+def migrate_reports(output_dir: str, delete: bool = False) -> int:
+    """
+    Migrate plain-text reports of output_dir into its segment store
+
+    Args:
+        output_dir: Directory holding the reports and reports.sqlite3
+        delete: Remove each original file once its copy has been verified
+
+    Returns:
+        Number of reports migrated
+    """
+    # 1. Open the catalog, indexing files saved before it existed
+    index_path = os.path.join(output_dir, "reports.sqlite3")
+    is_new = not os.path.exists(index_path)
+    index = ReportIndex(index_path)
+    if is_new:
+        index.backfill(output_dir)
+
+    # Originals are only deleted once their copy is on disk, so every append is synced
+    store = SegmentStore(
+        os.path.join(output_dir, "segments"),
+        max_segment_bytes=REPORT_SEGMENT_MAX_BYTES,
+        fsync_interval=0 if delete else REPORT_FSYNC_INTERVAL
+    )
+
+    # 2. Oldest first, so segments keep the original save order
+    entries = [entry for entry in index.query(limit=None) if entry["segment_offset"] is None]
+    migrated = 0
+    for entry in reversed(entries):
+        if not os.path.exists(entry["path"]):
+            print(f"⚠️  Skipping {entry['report_id']}: {entry['path']} not found")
+            continue
+        with open(entry["path"], 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        # 3. Append, then verify the copy before the catalog points at it
+        segment_path, offset, length = store.append(content)
+        if SegmentStore.read(segment_path, offset, length) != content:
+            raise RuntimeError(f"Verification failed for {entry['report_id']}")
+        index.add(
+            report_id=entry["report_id"],
+            city=entry["city"],
+            created_at=entry["created_at"],
+            size=entry["size"],
+            steps=entry["steps"],
+            path=f"{segment_path}#{offset}",
+            segment_offset=offset,
+            segment_length=length
+        )
+
+        if delete:
+            os.remove(entry["path"])
+        migrated += 1
+
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move plain-text travel reports into the compressed segment store")
+    parser.add_argument("--output-dir", default="output", help="Report directory (default: output)")
+    parser.add_argument("--delete", action="store_true", help="Delete original files after verifying their copy")
+    args = parser.parse_args()
+
+    migrated = migrate_reports(args.output_dir, delete=args.delete)
+    print(f"✅ Migrated {migrated} reports to {os.path.join(args.output_dir, 'segments')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Server mode: keep the travel agent warm behind a local HTTP API
+
+Imports, the model backend, tool clients, caches and connection pools are set
+up once at startup and reused by every request. Sessions are queued to a fixed
+number of workers.
+
+Endpoints:
+    GET  /health            Server status, queue length, prefetch hit rate and API scheduler stats
+    GET  /metrics           Session, LLM and tool metrics in Prometheus text format
+    POST /sessions          Run a session, body {"prompt": "..."}, returns the result
+    POST /sessions/stream   Same, but streams newline-delimited JSON progress events
+
+Usage:
+    python server.py --host 127.0.0.1 --port 8000 --workers 4
+"""
+import argparse
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from agent import configure_environment, create_model, run_session
+from utils import OutputManager
+from utils.prefetch import get_prefetch_cache
+from utils.scheduler import get_scheduler
+from utils.tracing import get_metrics
+
+
+class AgentService:
+    """Warm agent state shared by all HTTP requests"""
+
+    def __init__(self, workers: int = 4, max_queue: int = 100):
+        """
+        Args:
+            workers: Number of sessions running at the same time
+            max_queue: Maximum number of sessions waiting or running, further requests get 503
+        """
+        configure_environment()
+        self.output_manager = OutputManager()
+        self.model = create_model()
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-session")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, prompt: str, on_event=None):
+        """
+        Queue a session
+
+        Returns:
+            Future resolving to a SessionResult, or None if the queue is full
+        """
+        with self._lock:
+            if self._pending >= self.max_queue:
+                return None
+            self._pending += 1
+
+        def run():
+            try:
+                return run_session(prompt, self.model, self.output_manager, verbose=False, on_event=on_event)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+
+        return self._executor.submit(run)
+
+
+def _session_payload(result) -> dict:
+    payload = {"status": "ok" if result.completed and not result.error else "failed"}
+    payload.update(result.to_dict())
+    return payload
+
+
+class AgentRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler, one thread per connection"""
+
+    protocol_version = "HTTP/1.1"
+    service: AgentService = None
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            data = get_metrics().render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        if self.path != "/health":
+            self._send_json(404, {"error": "Not found"})
+            return
+        self._send_json(200, {"status": "ok", "workers": self.service.workers,
+                              "pending": self.service.pending, "prefetch": get_prefetch_cache().stats(),
+                              "scheduler": get_scheduler().stats()})
+
+    def do_POST(self):
+        if self.path not in ("/sessions", "/sessions/stream"):
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        prompt = self._read_prompt()
+        if prompt is None:
+            return
+
+        if self.path == "/sessions":
+            future = self.service.submit(prompt)
+            if future is None:
+                self._send_json(503, {"error": "Too many pending sessions, retry later"})
+                return
+            self._send_json(200, _session_payload(future.result()))
+        else:
+            self._stream_session(prompt)
+
+    def _read_prompt(self):
+        """Parse the JSON request body, replies with 400 and returns None if invalid"""
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            prompt = body.get("prompt") or body.get("user_prompt")
+        except (ValueError, AttributeError):
+            prompt = None
+        if not prompt:
+            self._send_json(400, {"error": "Request body must be JSON with a \"prompt\" field"})
+            return None
+        return prompt
+
+    def _stream_session(self, prompt: str):
+        """Run a session and stream its progress events as newline-delimited JSON"""
+        events = queue.Queue()
+        future = self.service.submit(prompt, on_event=events.put)
+        if future is None:
+            self._send_json(503, {"error": "Too many pending sessions, retry later"})
+            return
+        future.add_done_callback(lambda f: events.put(None))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        try:
+            self._write_chunk({"event": "queued"})
+            while True:
+                event = events.get()
+                if event is None:
+                    break
+                self._write_chunk(event)
+
+            if future.exception() is not None:
+                self._write_chunk({"event": "error", "error": str(future.exception())})
+            else:
+                self._write_chunk({"event": "result", **_session_payload(future.result())})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # Client went away, the session still finishes and saves its report
+            pass
+
+    def _write_chunk(self, event: dict):
+        data = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status: int, payload: dict):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the travel agent over a local HTTP API")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind")
+    parser.add_argument("--workers", type=int, default=4, help="Number of concurrent sessions")
+    parser.add_argument("--max-queue", type=int, default=100, help="Maximum pending sessions before returning 503")
+    args = parser.parse_args()
+
+    AgentRequestHandler.service = AgentService(workers=args.workers, max_queue=args.max_queue)
+    server = ThreadingHTTPServer((args.host, args.port), AgentRequestHandler)
+    print(f"🌍 Smart Travel Assistant serving on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
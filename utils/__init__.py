@@ -1,5 +1,22 @@
 # Utilities package
-from .llm_client import OpenAICompatibleClient
-from .output_manager import OutputManager
+# Modules are imported on first access (PEP 562), so the openai client is only loaded when used
+import importlib
 
-__all__ = ['OpenAICompatibleClient', 'OutputManager']
\ No newline at end of file
+_EXPORTS = {
+    'OpenAICompatibleClient': '.llm_client',
+    'OutputManager': '.output_manager',
+}
+
+__all__ = ['OpenAICompatibleClient', 'OutputManager']
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,96 @@
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def _trie_pattern(words: Sequence[str]) -> str:
+    """
+    Build a regex alternation shaped like a trie, e.g. ["la", "las vegas"] -> "la(?:s\\ vegas)?"
+
+    At any position the regex engine only follows characters that continue some
+    word, and greedy optional groups make it prefer the longest word.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node: dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # Longer words first, the word ending here is the fallback
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class AliasMatcher:
+    """
+    Find which of many names is mentioned in a text, in a single regex pass
+
+    Names are given in priority order with their aliases. Matching is a
+    case-insensitive substring search; when several names are mentioned, the one
+    earliest in priority order wins, wherever it appears in the text.
+    """
+
+    def __init__(self, names: Sequence[Tuple[str, Sequence[str]]]):
+        """
+        Args:
+            names: (name, aliases) pairs, highest priority first
+        """
+        # Rank of the best name owning each alias
+        alias_rank: Dict[str, int] = {}
+        self._names: List[str] = []
+        for rank, (name, aliases) in enumerate(names):
+            self._names.append(name)
+            for alias in aliases:
+                alias_rank.setdefault(alias.lower(), rank)
+
+        # The regex reports the longest alias starting at each position, the shorter
+        # aliases starting there are its prefixes, so keep the best rank among them
+        self._best_rank: Dict[str, int] = {}
+        for alias, rank in alias_rank.items():
+            self._best_rank[alias] = min(
+                (alias_rank[alias[:end]] for end in range(1, len(alias) + 1) if alias[:end] in alias_rank),
+                default=rank
+            )
+
+        self._pattern = re.compile(_trie_pattern(list(alias_rank)))
+
+    def find(self, text: str) -> Optional[str]:
+        """
+        Return the highest priority name mentioned in text
+
+        Args:
+            text: Text to search
+
+        Returns:
+            Matched name, or None if no alias occurs in text
+        """
+        text = text.lower()
+        best = None
+        match = self._pattern.search(text)
+        while match is not None:
+            start, end = match.span()
+            candidates = [match]
+            # Aliases starting inside this match may overlap it, check those positions too,
+            # so every start position of the text is examined exactly once
+            for position in range(start + 1, end):
+                inner = self._pattern.match(text, position)
+                if inner is not None:
+                    candidates.append(inner)
+
+            for candidate in candidates:
+                rank = self._best_rank[candidate.group()]
+                if best is None or rank < best:
+                    best = rank
+            if best == 0:
+                break
+            match = self._pattern.search(text, end)
+        return None if best is None else self._names[best]
@@ -0,0 +1,294 @@
+"""
+City gazetteer: one table of known cities, built into lookup structures once at import
+
+Every city has a canonical name, a country and its aliases (English and native
+script names, common nicknames and abbreviations). Exact lookups of any alias
+are a single dict hit, and mentions inside free text are found with one
+precompiled regex pass.
+"""
+import re
+from typing import Dict, List, Optional
+
+from .city_matcher import AliasMatcher
+
+# Version of the city key rules. Stored keys, e.g. in the report catalog, are rebuilt once
+# when it changes: bump it whenever aliases are added or moved or canonical_city_key changes
+CITY_KEY_VERSION = 1
+
+# Currency (symbol, name) by ISO country code
+_COUNTRY_CURRENCIES = {
+    'CN': ('¥', 'RMB'),
+    'HK': ('HK$', 'Hong Kong Dollar'),
+    'MO': ('MOP', 'Pataca'),
+    'TW': ('NT$', 'New Taiwan Dollar'),
+    'SG': ('S$', 'Singapore Dollar'),
+    'MY': ('RM', 'Ringgit'),
+    'TH': ('฿', 'Baht'),
+    'JP': ('¥', 'Yen'),
+    'KR': ('₩', 'Won'),
+    'US': ('$', 'Dollar'),
+    'CA': ('C$', 'Canadian Dollar'),
+    'AU': ('A$', 'Australian Dollar'),
+    'GB': ('£', 'Pound'),
+    'RU': ('₽', 'Ruble'),
+    'AE': ('AED', 'Dirham'),
+    'EG': ('E£', 'Egyptian Pound'),
+    'ES': ('€', 'Euro'),
+    'FR': ('€', 'Euro'),
+    'DE': ('€', 'Euro'),
+    'IT': ('€', 'Euro'),
+    'NL': ('€', 'Euro'),
+    'BE': ('€', 'Euro'),
+    'AT': ('€', 'Euro'),
+    'PT': ('€', 'Euro'),
+}
+
+# Country names that identify the country of an unknown city, e.g. "Cuenca, Spain"
+_COUNTRY_KEYWORDS = {
+    'spain': 'ES', 'spanish': 'ES', '西班牙': 'ES',
+    'france': 'FR', '法国': 'FR',
+    'germany': 'DE', '德国': 'DE',
+    'italy': 'IT', '意大利': 'IT',
+    'netherlands': 'NL', 'belgium': 'BE', 'austria': 'AT', 'portugal': 'PT',
+    'usa': 'US', 'united states': 'US', 'america': 'US', '美国': 'US',
+    'uk': 'GB', 'united kingdom': 'GB', 'britain': 'GB', 'england': 'GB', '英国': 'GB',
+}
+
+# (canonical name, country, aliases). Cities are listed in the priority order used
+# to break ties when a text mentions several of them.
+_CHINESE_CITY_TABLE = [
+    ('Beijing', 'CN', ['北京', 'Beijing', '帝都']),
+    ('Shanghai', 'CN', ['上海', 'Shanghai', '魔都']),
+    ('Guangzhou', 'CN', ['广州', 'Guangzhou', '羊城']),
+    ('Shenzhen', 'CN', ['深圳', 'Shenzhen', '鹏城']),
+    ('Hangzhou', 'CN', ['杭州', 'Hangzhou', '西湖']),
+    ('Nanjing', 'CN', ['南京', 'Nanjing', '金陵']),
+    ('Suzhou', 'CN', ['苏州', 'Suzhou', '姑苏']),
+    ('Chengdu', 'CN', ['成都', 'Chengdu', '蓉城']),
+    ('Chongqing', 'CN', ['重庆', 'Chongqing', '山城']),
+    ('Xian', 'CN', ['西安', "Xi'an", '长安']),
+    ('Wuhan', 'CN', ['武汉', 'Wuhan', '江城']),
+    ('Tianjin', 'CN', ['天津', 'Tianjin']),
+    ('Qingdao', 'CN', ['青岛', 'Qingdao']),
+    ('Dalian', 'CN', ['大连', 'Dalian']),
+    ('Xiamen', 'CN', ['厦门', 'Xiamen', '鹭岛']),
+    ('Changsha', 'CN', ['长沙', 'Changsha', '星城']),
+    ('Zhengzhou', 'CN', ['郑州', 'Zhengzhou']),
+    ('Jinan', 'CN', ['济南', 'Jinan', '泉城']),
+    ('Harbin', 'CN', ['哈尔滨', 'Harbin', '冰城']),
+    ('Shenyang', 'CN', ['沈阳', 'Shenyang']),
+    ('Changchun', 'CN', ['长春', 'Changchun']),
+    ('Kunming', 'CN', ['昆明', 'Kunming', '春城']),
+    ('Guiyang', 'CN', ['贵阳', 'Guiyang']),
+    ('Nanning', 'CN', ['南宁', 'Nanning']),
+    ('Haikou', 'CN', ['海口', 'Haikou']),
+    ('Sanya', 'CN', ['三亚', 'Sanya']),
+    ('Lhasa', 'CN', ['拉萨', 'Lhasa']),
+    ('Urumqi', 'CN', ['乌鲁木齐', 'Urumqi']),
+    ('Yinchuan', 'CN', ['银川', 'Yinchuan']),
+    ('Xining', 'CN', ['西宁', 'Xining']),
+    ('Lanzhou', 'CN', ['兰州', 'Lanzhou']),
+    ('Hohhot', 'CN', ['呼和浩特', 'Hohhot']),
+    ('Shijiazhuang', 'CN', ['石家庄', 'Shijiazhuang']),
+    ('Taiyuan', 'CN', ['太原', 'Taiyuan']),
+    ('Hefei', 'CN', ['合肥', 'Hefei']),
+    ('Nanchang', 'CN', ['南昌', 'Nanchang']),
+    ('Fuzhou', 'CN', ['福州', 'Fuzhou']),
+    ('Wuxi', 'CN', ['无锡', 'Wuxi']),
+    ('Changzhou', 'CN', ['常州', 'Changzhou']),
+    ('Ningbo', 'CN', ['宁波', 'Ningbo']),
+    ('Wenzhou', 'CN', ['温州', 'Wenzhou']),
+    ('Jiaxing', 'CN', ['嘉兴', 'Jiaxing']),
+    ('Jinhua', 'CN', ['金华', 'Jinhua']),
+    ('Shaoxing', 'CN', ['绍兴', 'Shaoxing']),
+    ('Taizhou', 'CN', ['台州', 'Taizhou']),
+    ('Huzhou', 'CN', ['湖州', 'Huzhou']),
+    ('Lishui', 'CN', ['丽水', 'Lishui']),
+    ('Quzhou', 'CN', ['衢州', 'Quzhou']),
+    ('Zhoushan', 'CN', ['舟山', 'Zhoushan']),
+]
+
+_INTERNATIONAL_CITY_TABLE = [
+    ('Taipei', 'TW', ['台北', 'Taipei']),
+    ('Hong Kong', 'HK', ['香港', 'Hong Kong', 'HK']),
+    ('Macau', 'MO', ['澳门', 'Macau', 'Macao']),
+    ('Singapore', 'SG', ['新加坡', 'Singapore', '狮城']),
+    ('Kuala Lumpur', 'MY', ['吉隆坡', 'Kuala Lumpur', 'KL']),
+    ('Bangkok', 'TH', ['曼谷', 'Bangkok']),
+    ('Tokyo', 'JP', ['东京', 'Tokyo']),
+    ('Seoul', 'KR', ['首尔', 'Seoul', '汉城']),
+    ('New York', 'US', ['纽约', 'New York', 'NYC']),
+    ('London', 'GB', ['伦敦', 'London']),
+    ('Paris', 'FR', ['巴黎', 'Paris']),
+    ('Sydney', 'AU', ['悉尼', 'Sydney']),
+    ('Toronto', 'CA', ['多伦多', 'Toronto']),
+    ('Vancouver', 'CA', ['温哥华', 'Vancouver']),
+    ('Los Angeles', 'US', ['洛杉矶', 'Los Angeles', 'LA']),
+    ('San Francisco', 'US', ['旧金山', 'San Francisco', 'SF']),
+    ('Chicago', 'US', ['芝加哥', 'Chicago']),
+    ('Washington', 'US', ['华盛顿', 'Washington', 'DC']),
+    ('Boston', 'US', ['波士顿', 'Boston']),
+    ('Seattle', 'US', ['西雅图', 'Seattle']),
+    ('Miami', 'US', ['迈阿密', 'Miami']),
+    ('Las Vegas', 'US', ['拉斯维加斯', 'Las Vegas', '赌城']),
+    ('Berlin', 'DE', ['柏林', 'Berlin']),
+    ('Munich', 'DE', ['慕尼黑', 'Munich']),
+    ('Amsterdam', 'NL', ['阿姆斯特丹', 'Amsterdam']),
+    ('Brussels', 'BE', ['布鲁塞尔', 'Brussels']),
+    ('Rome', 'IT', ['罗马', 'Rome']),
+    ('Milan', 'IT', ['米兰', 'Milan']),
+    ('Barcelona', 'ES', ['巴塞罗那', 'Barcelona']),
+    ('Madrid', 'ES', ['马德里', 'Madrid']),
+    ('Moscow', 'RU', ['莫斯科', 'Moscow']),
+    ('Saint Petersburg', 'RU', ['圣彼得堡', 'Saint Petersburg']),
+    ('Dubai', 'AE', ['迪拜', 'Dubai']),
+    ('Cairo', 'EG', ['开罗', 'Cairo']),
+    ('Melbourne', 'AU', ['墨尔本', 'Melbourne']),
+    ('Brisbane', 'AU', ['布里斯班', 'Brisbane']),
+    ('Valencia', 'ES', ['瓦伦西亚', 'Valencia']),
+    ('Granada', 'ES', ['格拉纳达', 'Granada']),
+    ('Seville', 'ES', ['塞维利亚', 'Sevilla', 'Seville']),
+    ('Bilbao', 'ES', ['毕尔巴鄂', 'Bilbao']),
+    ('Zaragoza', 'ES', ['萨拉戈萨', 'Zaragoza']),
+    ('Malaga', 'ES', ['马拉加', 'Malaga']),
+    ('Murcia', 'ES', ['穆尔西亚', 'Murcia']),
+    ('Palma', 'ES', ['帕尔马', 'Palma']),
+    ('Las Palmas', 'ES', ['拉斯帕尔马斯', 'Las Palmas']),
+    ('Cordoba', 'ES', ['科尔多瓦', 'Cordoba']),
+    ('Alicante', 'ES', ['阿利坎特', 'Alicante']),
+    ('Vigo', 'ES', ['维戈', 'Vigo']),
+    ('Gijon', 'ES', ['希洪', 'Gijon']),
+    ('Oviedo', 'ES', ['奥维耶多', 'Oviedo']),
+    ('Santiago de Compostela', 'ES', ['圣地亚哥德孔波斯特拉', 'Santiago de Compostela']),
+    ('Toledo', 'ES', ['托莱多', 'Toledo']),
+    ('Caceres', 'ES', ['卡塞雷斯', 'Caceres']),
+    ('Badajoz', 'ES', ['巴达霍斯', 'Badajoz']),
+    ('Avila', 'ES', ['阿维拉', 'Avila']),
+    ('Segovia', 'ES', ['塞哥维亚', 'Segovia']),
+    ('Salamanca', 'ES', ['萨拉曼卡', 'Salamanca']),
+    ('Burgos', 'ES', ['布尔戈斯', 'Burgos']),
+    ('Leon', 'ES', ['莱昂', 'Leon']),
+    ('Palencia', 'ES', ['帕伦西亚', 'Palencia']),
+    ('Valladolid', 'ES', ['瓦拉多利德', 'Valladolid']),
+    ('Zamora', 'ES', ['萨莫拉', 'Zamora']),
+    ('Logrono', 'ES', ['洛格罗尼奥', 'Logrono']),
+    ('Pamplona', 'ES', ['潘普洛纳', 'Pamplona']),
+    ('San Sebastian', 'ES', ['圣塞巴斯蒂安', 'San Sebastian']),
+    ('Vitoria', 'ES', ['维多利亚', 'Vitoria']),
+    ('Huesca', 'ES', ['韦斯卡', 'Huesca']),
+    ('Teruel', 'ES', ['特鲁埃尔', 'Teruel']),
+    ('Castellon', 'ES', ['卡斯特利翁', 'Castellon']),
+    ('Jaen', 'ES', ['哈恩', 'Jaen']),
+    ('Almeria', 'ES', ['阿尔梅里亚', 'Almeria']),
+    ('Cadiz', 'ES', ['加的斯', 'Cadiz']),
+    ('Huelva', 'ES', ['韦尔瓦', 'Huelva']),
+    ('Jerez', 'ES', ['赫雷斯', 'Jerez']),
+    ('Algeciras', 'ES', ['阿尔赫西拉斯', 'Algeciras']),
+    ('Marbella', 'ES', ['马贝拉', 'Marbella']),
+    ('Estepona', 'ES', ['埃斯特波纳', 'Estepona']),
+    ('Fuengirola', 'ES', ['富恩希罗拉', 'Fuengirola']),
+    ('Torremolinos', 'ES', ['托雷莫利诺斯', 'Torremolinos']),
+    ('Benalmadena', 'ES', ['贝纳尔马德纳', 'Benalmadena']),
+    ('Ronda', 'ES', ['龙达', 'Ronda']),
+]
+
+class CityRecord:
+    """A known city: canonical name, country, currency and aliases"""
+
+    def __init__(self, name: str, country: str, aliases: List[str]):
+        self.name = name
+        self.country = country
+        self.currency_symbol, self.currency_name = _COUNTRY_CURRENCIES[country]
+        self.aliases = aliases
+
+    def __repr__(self) -> str:
+        return f"CityRecord({self.name!r}, {self.country!r})"
+
+
+def normalize_name(name: str) -> str:
+    """Normalize whitespace and case of a name ("  new  YORK " -> "new york")"""
+    return " ".join(name.split()).casefold()
+
+
+CITIES: List[CityRecord] = [CityRecord(name, country, aliases)
+                            for name, country, aliases in _CHINESE_CITY_TABLE + _INTERNATIONAL_CITY_TABLE]
+
+
+def _build_alias_index(records: List[CityRecord]) -> Dict[str, CityRecord]:
+    """Map every alias and canonical name to its record, the first city listed wins a shared alias"""
+    index: Dict[str, CityRecord] = {}
+    for record in records:
+        for alias in [record.name] + record.aliases:
+            index.setdefault(normalize_name(alias), record)
+    return index
+
+
+_BY_ALIAS = _build_alias_index(CITIES)
+
+_BY_NAME: Dict[str, CityRecord] = {record.name: record for record in CITIES}
+
+# Cities ordered by their longest alias, longer names are matched first (avoid partial matching issues)
+_CITY_MATCHER = AliasMatcher(sorted(
+    ((record.name, record.aliases) for record in CITIES),
+    key=lambda x: max(len(alias) for alias in x[1]),
+    reverse=True
+))
+
+# Country names as whole words (Latin script) or plain substrings (CJK)
+_COUNTRY_PATTERN = re.compile(
+    r"(?<![a-z])(" + "|".join(re.escape(keyword) for keyword in sorted(_COUNTRY_KEYWORDS, key=len, reverse=True))
+    + r")(?![a-z])"
+)
+
+
+def lookup_city(name: str) -> Optional[CityRecord]:
+    """
+    Look up a city by canonical name or alias, ignoring case and extra whitespace
+
+    Args:
+        name: City name, e.g. "barcelona", "巴塞罗那" or "NYC"
+
+    Returns:
+        City record, None if the name is not known
+    """
+    return _BY_ALIAS.get(normalize_name(name))
+
+
+def find_city(text: str) -> Optional[CityRecord]:
+    """
+    Find the city mentioned in a free text
+
+    Args:
+        text: Any text, e.g. a user request or a transcript
+
+    Returns:
+        City record of the highest-priority city mentioned, None if there is none
+    """
+    name = _CITY_MATCHER.find(text)
+    return _BY_NAME[name] if name is not None else None
+
+
+def find_country(text: str) -> Optional[str]:
+    """Return the ISO code of the first country named in a text, e.g. "Cuenca, Spain" -> "ES" """
+    match = _COUNTRY_PATTERN.search(text.casefold())
+    return _COUNTRY_KEYWORDS[match.group(1)] if match else None
+
+
+def currency_of_country(country: str) -> Optional[dict]:
+    """Currency of a country as {"symbol", "name"}, None if unknown"""
+    currency = _COUNTRY_CURRENCIES.get(country)
+    return {"symbol": currency[0], "name": currency[1]} if currency else None
+
+
+def canonical_city_name(city: str) -> str:
+    """Canonical name of a known city ("巴塞罗那" -> "Barcelona"), other names with whitespace normalized"""
+    record = lookup_city(city)
+    return record.name if record is not None else " ".join(city.split())
+
+
+def canonical_city_key(city: str) -> str:
+    """
+    Cache key of a city name: aliases of a known city share its canonical key,
+    other names are only normalized ("巴塞罗那" and " barcelona" -> "barcelona")
+    """
+    return normalize_name(canonical_city_name(city))
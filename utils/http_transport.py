@@ -0,0 +1,152 @@
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .parallel import remaining_time
+
+# Default (connect, read) timeouts, a hung server can only block a tool call this long
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "20"))
+# Retries of idempotent reads after connection errors, timeouts and retryable status codes
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.environ.get("HTTP_BACKOFF_BASE", "0.5"))
+# Keep-alive connections kept open per host, and requests in flight per host
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "16"))
+HTTP_PER_HOST_LIMIT = int(os.environ.get("HTTP_PER_HOST_LIMIT", "8"))
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+class HttpTransport:
+    """
+    Process-wide HTTP transport shared by all tools
+
+    One requests Session keeps pooled keep-alive connections, so repeat calls to
+    the same API skip the TCP and TLS handshakes. Every request gets default
+    timeouts, idempotent reads are retried with jittered exponential backoff, and
+    the number of requests in flight to one host is capped.
+    """
+
+    def __init__(self, connect_timeout: float = HTTP_CONNECT_TIMEOUT, read_timeout: float = HTTP_READ_TIMEOUT,
+                 max_retries: int = HTTP_MAX_RETRIES, backoff_base: float = HTTP_BACKOFF_BASE,
+                 pool_size: int = HTTP_POOL_SIZE, per_host_limit: int = HTTP_PER_HOST_LIMIT):
+        """
+        Args:
+            connect_timeout: Default seconds to wait for a connection
+            read_timeout: Default seconds to wait between bytes of the response
+            max_retries: Retries after the first attempt of an idempotent request
+            backoff_base: Backoff before retry n is drawn from [0, backoff_base * 2**n] seconds
+            pool_size: Keep-alive connections kept per host
+            per_host_limit: Maximum concurrent requests to one host
+        """
+        # Imported here, requests is only loaded once a tool makes a network call
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.per_host_limit = per_host_limit
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_slots_lock = threading.Lock()
+
+        # Retries are handled here so that they apply to POST reads too and use jitter
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._retryable_errors = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+        self._timeout_error = requests.exceptions.Timeout
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before the next attempt, full jitter unless the server asks for more"""
+        delay = random.uniform(0, self.backoff_base * (2 ** attempt))
+        if retry_after is not None and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), 30.0))
+        return delay
+
+    def request(self, method: str, url: str, idempotent: Optional[bool] = None,
+                timeout: Optional[Tuple[float, float]] = None, **kwargs):
+        """
+        Send a request through the shared connection pool
+
+        Args:
+            method: HTTP method
+            url: Request URL
+            idempotent: Whether the request may be retried, defaults to True for GET, HEAD and OPTIONS
+            timeout: (connect, read) timeouts, defaults to the transport's. Inside a call
+                with a deadline (see utils.parallel.remaining_time) both are capped by the
+                time left, and no attempt starts once it has passed
+            **kwargs: Passed to requests.Session.request (params, json, headers, ...)
+
+        Returns:
+            requests.Response of the last attempt, the caller checks its status
+
+        Raises:
+            requests.exceptions.RequestException: If the last attempt fails to connect or times out
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        slot = self._host_slot(url)
+
+        for attempt in range(attempts):
+            last_attempt = attempt == attempts - 1
+            attempt_timeout = timeout or self.timeout
+            left = remaining_time()
+            if left is not None:
+                if left <= 0:
+                    raise self._timeout_error(f"Deadline passed before requesting {urlsplit(url).netloc}")
+                attempt_timeout = (min(attempt_timeout[0], left), min(attempt_timeout[1], left))
+            # Waiting for a free slot counts against the deadline too
+            if not slot.acquire(timeout=left):
+                raise self._timeout_error(f"Deadline passed waiting for a connection to {urlsplit(url).netloc}")
+            try:
+                try:
+                    response = self.session.request(method, url, timeout=attempt_timeout, **kwargs)
+                finally:
+                    slot.release()
+            except self._retryable_errors:
+                if last_attempt:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                return response
+            response.close()
+            time.sleep(self._backoff(attempt, response.headers.get("Retry-After")))
+
+    def get(self, url: str, **kwargs):
+        """Send a GET request, retried on transient failures"""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        """Send a POST request, only retried if idempotent=True is passed"""
+        return self.request("POST", url, **kwargs)
+
+
+def get_transport() -> HttpTransport:
+    """Return the transport shared by every tool in this process"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport()
+    return _transport
@@ -0,0 +1,95 @@
+import atexit
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Optional
+
+from .persistent_cache import PersistentCache
+from .tracing import record_cache
+
+# "off" (default), "on", or "refresh" to bypass stored responses while still storing new ones
+LLM_CACHE = os.environ.get("LLM_CACHE", "off")
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join("cache", "llm_cache.sqlite3"))
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class LLMResponseCache:
+    """
+    Exact-match cache of model responses, stored on disk
+
+    The key is a hash of the model name, the system prompt, the full message list
+    and the sampling parameters, so a response is only reused for an identical
+    request: a replayed session gets the same answers as long as the tool
+    observations are the same, and diverges to live calls as soon as one differs.
+    Entries expire after a TTL and the least recently used ones are evicted once
+    the cache grows beyond max_entries or max_bytes.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: float = LLM_CACHE_TTL,
+                 max_entries: int = LLM_CACHE_MAX_ENTRIES, max_bytes: Optional[int] = LLM_CACHE_MAX_BYTES,
+                 read: bool = True):
+        """
+        Args:
+            path: SQLite database file, created if missing
+            ttl: Seconds a response stays reusable
+            max_entries: Maximum number of stored responses
+            max_bytes: Maximum total size of stored responses in bytes
+            read: Answer from stored responses, False only stores fresh ones (bypass)
+        """
+        self.read = read
+        self._store = PersistentCache(path, namespace="llm_responses", default_ttl=ttl,
+                                      max_entries=max_entries, max_bytes=max_bytes)
+
+    @staticmethod
+    def make_key(model: str, system_prompt: Optional[str], messages: list, params: dict) -> str:
+        """
+        Hash a request into a cache key
+
+        Args:
+            model: Model name
+            system_prompt: System prompt, None if it is part of messages
+            messages: Conversation sent to the model
+            params: Sampling parameters that change the output, e.g. stop sequences and tool schemas
+        """
+        raw = json.dumps([model, system_prompt, messages, params], sort_keys=True, ensure_ascii=False,
+                         separators=(",", ":"), default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored response, None on a miss or when reads are bypassed"""
+        if not self.read:
+            return None
+        value = self._store.get(key, family="llm")
+        record_cache(value is not None)
+        return value
+
+    def set(self, key: str, value: Any):
+        """Store a response, it must be JSON-serializable"""
+        self._store.set(key, value, family="llm")
+
+    def stats(self) -> dict:
+        """Hit/miss counters, accumulated across all processes sharing the file"""
+        return self._store.stats().get("llm", {"hits": 0, "misses": 0})
+
+    def flush_stats(self):
+        """Write pending in-process counters to the database"""
+        self._store.flush_stats()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Return the process-wide LLM response cache, None unless LLM_CACHE is "on" or "refresh" """
+    global _cache
+    if LLM_CACHE not in ("on", "refresh"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache(read=LLM_CACHE == "on")
+                atexit.register(_cache.flush_stats)
+    return _cache
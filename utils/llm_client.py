@@ -1,29 +1,212 @@
-from openai import OpenAI
+from typing import List, Optional
+
+from .llm_cache import get_llm_cache
+from .parallel import remaining_time
+from .scheduler import get_scheduler
+
+# Models sometimes invent the tool result themselves, generation stops there
+STOP_SEQUENCES = ["\nObservation:"]
+
+
+def find_action_cutoff(text: str) -> Optional[int]:
+    """
+    Find where a ReAct output can be cut once its Action lines are complete
+
+    Several consecutive Action lines are allowed (they run in parallel), so the
+    output is only cut when an Action line is followed by a line that is not an
+    Action, e.g. a made-up Observation. A finish Action is never cut, its answer
+    may span several lines.
+
+    Args:
+        text: Output generated so far
+
+    Returns:
+        Length of the useful prefix, or None if generation should continue
+    """
+    lines = text.split("\n")
+    seen_action = False
+    offset = 0
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        is_last = index == len(lines) - 1
+        if stripped.startswith("Action:"):
+            if stripped[len("Action:"):].lstrip().startswith("finish"):
+                return None
+            seen_action = True
+        elif seen_action and stripped:
+            # A partial last line may still turn into another Action line
+            if not (is_last and "Action:".startswith(stripped)):
+                return offset
+        offset += len(line) + 1
+    return None
+
+
+def _request_timeout() -> dict:
+    """Request timeout argument of a call with a deadline, so an abandoned call does not run on"""
+    left = remaining_time()
+    if left is None:
+        return {}
+    return {"timeout": max(left, 0.001)}
+
 
 class OpenAICompatibleClient:
     """
     A client for calling any LLM service compatible with OpenAI interface.
     """
     def __init__(self, model: str, api_key: str, base_url: str):
+        # Imported here, the openai package is slow to import and only needed once a client exists
+        from openai import OpenAI
+
         self.model = model
         self.client = OpenAI(api_key=api_key, base_url=base_url)
+        # Exact-match response cache, None unless LLM_CACHE is enabled
+        self.cache = get_llm_cache()
 
-    def generate(self, prompt: str, system_prompt: str) -> str:
-        """Call LLM API to generate response."""
+    def generate(self, prompt: str, system_prompt: str, stream: bool = False) -> str:
+        """
+        Call LLM API to generate response.
+
+        With stream=True the output is parsed while it arrives and generation stops
+        as soon as the Action lines are complete.
+        """
         print("Calling large language model...")
         try:
             messages = [
                 {'role': 'system', 'content': system_prompt},
                 {'role': 'user', 'content': prompt}
             ]
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                stream=False
-            )
-            answer = response.choices[0].message.content
+            answer = self.chat(messages, stream=stream, stop_at_action=stream)
             print("Large language model response successful.")
             return answer
         except Exception as e:
             print(f"Error occurred when calling LLM API: {e}")
-            return "Error: Error occurred when calling language model service."
\ No newline at end of file
+            return "Error: Error occurred when calling language model service."
+
+    def chat(self, messages: List[dict], stream: bool = False, stop_at_action: bool = False) -> str:
+        """
+        Send a full message list and return the assistant's text
+
+        Args:
+            messages: OpenAI-style message dictionaries, including the system message
+            stream: Receive the completion incrementally
+            stop_at_action: With stream, close the stream once the Action lines are complete
+
+        Returns:
+            Generated text
+
+        Raises:
+            Any exception raised by the OpenAI client
+        """
+        # Calls pass the provider's rate limit, identical requests are only coalesced when responses
+        # are cached anyway
+        def call(key=None):
+            return get_scheduler().call("llm", key, lambda: self._chat(messages, stream, stop_at_action))
+
+        if self.cache is None:
+            return call()
+
+        # A cut stream ends earlier than a full completion, so it is part of the key
+        key = self.cache.make_key(self.model, None, messages,
+                                  {"stop": STOP_SEQUENCES, "cut_at_action": stream and stop_at_action})
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached["text"]
+        text = call(key)
+        self.cache.set(key, {"text": text})
+        return text
+
+    def _chat(self, messages: List[dict], stream: bool, stop_at_action: bool) -> str:
+        if not stream:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                stop=STOP_SEQUENCES,
+                stream=False,
+                **_request_timeout()
+            )
+            return response.choices[0].message.content
+
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stop=STOP_SEQUENCES,
+            stream=True,
+            **_request_timeout()
+        )
+        text = ""
+        try:
+            for chunk in response:
+                left = remaining_time()
+                if left is not None and left <= 0:
+                    # The caller gave up on this call, stop receiving (and paying for) tokens
+                    raise TimeoutError("deadline passed while streaming the completion")
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                text += delta
+
+                if stop_at_action and "Action:" in text:
+                    cutoff = find_action_cutoff(text)
+                    if cutoff is not None:
+                        # Stop paying for tokens after the Action, the tool can start right away
+                        return text[:cutoff].rstrip()
+        finally:
+            response.close()
+        return text
+
+    def chat_with_tools(self, messages: List[dict], tools: List[dict]) -> dict:
+        """
+        Send a message list with function-calling tool schemas
+
+        Args:
+            messages: OpenAI-style message dictionaries, including the system message
+            tools: Tool schemas in OpenAI function-calling format
+
+        Returns:
+            Dictionary with "content" (text, possibly empty), "tool_calls", a list of
+            {"id", "type", "function": {"name", "arguments"}} dictionaries with the
+            arguments still JSON-encoded, and "usage" ({"prompt_tokens", "completion_tokens"}
+            or None if the provider does not report it)
+
+        Raises:
+            Any exception raised by the OpenAI client
+        """
+        def call(key=None):
+            return get_scheduler().call("llm", key, lambda: self._chat_with_tools(messages, tools))
+
+        if self.cache is None:
+            return call()
+
+        key = self.cache.make_key(self.model, None, messages, {"tools": tools, "tool_choice": "auto"})
+        cached = self.cache.get(key)
+        if cached is not None:
+            # No tokens were spent on a cached reply
+            return dict(cached, usage={"prompt_tokens": 0, "completion_tokens": 0})
+        reply = call(key)
+        self.cache.set(key, reply)
+        return reply
+
+    def _chat_with_tools(self, messages: List[dict], tools: List[dict]) -> dict:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            tools=tools,
+            tool_choice="auto",
+            stream=False,
+            **_request_timeout()
+        )
+        message = response.choices[0].message
+        tool_calls = []
+        for call in message.tool_calls or []:
+            tool_calls.append({
+                "id": call.id,
+                "type": "function",
+                "function": {"name": call.function.name, "arguments": call.function.arguments or "{}"},
+            })
+        usage = None
+        if getattr(response, "usage", None) is not None:
+            usage = {"prompt_tokens": response.usage.prompt_tokens,
+                     "completion_tokens": response.usage.completion_tokens}
+        return {"content": message.content or "", "tool_calls": tool_calls, "usage": usage}
@@ -1,182 +1,87 @@
 import os
 import re
+import time
+import uuid
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+
+from .gazetteer import find_city
+from .report_index import ReportIndex
+from .segment_store import SegmentStore
+
+# "files" writes one text file per report, "segments" appends compressed reports to segment files
+REPORT_STORAGE = os.environ.get("REPORT_STORAGE", "files")
+REPORT_SEGMENT_MAX_BYTES = int(os.environ.get("REPORT_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024)))
+REPORT_FSYNC_INTERVAL = float(os.environ.get("REPORT_FSYNC_INTERVAL", "1.0"))
+
+# Common city name patterns (including country prefix)
+_ORIGINAL_CITY_PATTERNS = [re.compile(pattern) for pattern in [
+    # Spanish cities - exact matching
+    r'西班牙(格拉纳达|马德里|巴塞罗那|瓦伦西亚|塞维利亚|龙达|毕尔巴鄂|萨拉戈萨|马拉加|穆尔西亚|帕尔马|科尔多瓦|阿利坎特|托莱多|萨拉曼卡|布尔戈斯|莱昂|瓦拉多利德|洛格罗尼奥|潘普洛纳|圣塞巴斯蒂安|维多利亚)',
+    r'Spain\s+(Granada|Madrid|Barcelona|Valencia|Seville|Sevilla|Ronda|Bilbao|Zaragoza|Malaga|Murcia|Palma|Cordoba|Alicante|Toledo|Salamanca|Burgos|Leon|Valladolid|Logrono|Pamplona)',
+    # Other country cities
+    r'意大利(罗马|米兰|佛罗伦萨|威尼斯|那不勒斯|都灵|博洛尼亚|巴勒莫|热那亚|卡塔尼亚)',
+    r'Italy\s+(Rome|Milan|Florence|Venice|Naples|Turin|Bologna|Palermo|Genoa|Catania)',
+    r'法国(巴黎|马赛|里昂|图卢兹|尼斯|南特|斯特拉斯堡|蒙彼利埃|波尔多|里尔)',
+    r'France\s+(Paris|Marseille|Lyon|Toulouse|Nice|Nantes|Strasbourg|Montpellier|Bordeaux|Lille)',
+    r'德国(柏林|慕尼黑|汉堡|科隆|法兰克福|斯图加特|杜塞尔多夫|多特蒙德|埃森|莱比锡)',
+    r'Germany\s+(Berlin|Munich|Hamburg|Cologne|Frankfurt|Stuttgart|Dusseldorf|Dortmund|Essen|Leipzig)',
+    r'英国(伦敦|曼彻斯特|伯明翰|利兹|格拉斯哥|谢菲尔德|布拉德福德|爱丁堡|利物浦|布里斯托)',
+    r'UK\s+(London|Manchester|Birmingham|Leeds|Glasgow|Sheffield|Bradford|Edinburgh|Liverpool|Bristol)',
+    r'美国(纽约|洛杉矶|芝加哥|休斯顿|费城|凤凰城|圣安东尼奥|圣地亚哥|达拉斯|圣何塞)',
+    r'USA\s+(New York|Los Angeles|Chicago|Houston|Philadelphia|Phoenix|San Antonio|San Diego|Dallas|San Jose)',
+]]
+
 
 class OutputManager:
     """
     Output manager responsible for saving query results to files
     """
     
-    def __init__(self, output_dir: str = "output"):
+    def __init__(self, output_dir: str = "output", storage: str = REPORT_STORAGE):
+        """
+        Args:
+            output_dir: Directory for reports and the report catalog
+            storage: "files" for one text file per report, "segments" for the
+                append-only compressed segment store in output_dir/segments
+        """
+        if storage not in ("files", "segments"):
+            raise ValueError(f"Unknown report storage '{storage}'")
         self.output_dir = output_dir
+        self.storage = storage
         self._ensure_output_dir()
+        self.index = self._open_index()
+        self.segments = self._open_segments() if storage == "segments" else None
     
     def _ensure_output_dir(self):
         """Ensure output directory exists"""
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
     
+    def _open_index(self) -> ReportIndex:
+        """Open the report catalog, indexing reports saved before it existed"""
+        index_path = os.path.join(self.output_dir, "reports.sqlite3")
+        is_new = not os.path.exists(index_path)
+        index = ReportIndex(index_path)
+        if is_new:
+            index.backfill(self.output_dir)
+        return index
+    
+    def _open_segments(self) -> SegmentStore:
+        """Open the compressed segment store"""
+        return SegmentStore(
+            os.path.join(self.output_dir, "segments"),
+            max_segment_bytes=REPORT_SEGMENT_MAX_BYTES,
+            fsync_interval=REPORT_FSYNC_INTERVAL
+        )
+    
     def _extract_city_from_prompt(self, prompt: str) -> str:
         """Extract city name from user request"""
-        # Chinese cities (including common aliases)
-        chinese_cities = {
-            'Beijing': ['北京', 'Beijing', '帝都'],
-            'Shanghai': ['上海', 'Shanghai', '魔都'],
-            'Guangzhou': ['广州', 'Guangzhou', '羊城'],
-            'Shenzhen': ['深圳', 'Shenzhen', '鹏城'],
-            'Hangzhou': ['杭州', 'Hangzhou', '西湖'],
-            'Nanjing': ['南京', 'Nanjing', '金陵'],
-            'Suzhou': ['苏州', 'Suzhou', '姑苏'],
-            'Chengdu': ['成都', 'Chengdu', '蓉城'],
-            'Chongqing': ['重庆', 'Chongqing', '山城'],
-            'Xian': ['西安', "Xi'an", '长安'],
-            'Wuhan': ['武汉', 'Wuhan', '江城'],
-            'Tianjin': ['天津', 'Tianjin'],
-            'Qingdao': ['青岛', 'Qingdao'],
-            'Dalian': ['大连', 'Dalian'],
-            'Xiamen': ['厦门', 'Xiamen', '鹭岛'],
-            'Changsha': ['长沙', 'Changsha', '星城'],
-            'Zhengzhou': ['郑州', 'Zhengzhou'],
-            'Jinan': ['济南', 'Jinan', '泉城'],
-            'Harbin': ['哈尔滨', 'Harbin', '冰城'],
-            'Shenyang': ['沈阳', 'Shenyang'],
-            'Changchun': ['长春', 'Changchun'],
-            'Kunming': ['昆明', 'Kunming', '春城'],
-            'Guiyang': ['贵阳', 'Guiyang'],
-            'Nanning': ['南宁', 'Nanning'],
-            'Haikou': ['海口', 'Haikou'],
-            'Sanya': ['三亚', 'Sanya'],
-            'Lhasa': ['拉萨', 'Lhasa'],
-            'Urumqi': ['乌鲁木齐', 'Urumqi'],
-            'Yinchuan': ['银川', 'Yinchuan'],
-            'Xining': ['西宁', 'Xining'],
-            'Lanzhou': ['兰州', 'Lanzhou'],
-            'Hohhot': ['呼和浩特', 'Hohhot'],
-            'Shijiazhuang': ['石家庄', 'Shijiazhuang'],
-            'Taiyuan': ['太原', 'Taiyuan'],
-            'Hefei': ['合肥', 'Hefei'],
-            'Nanchang': ['南昌', 'Nanchang'],
-            'Fuzhou': ['福州', 'Fuzhou'],
-            'Wuxi': ['无锡', 'Wuxi'],
-            'Changzhou': ['常州', 'Changzhou'],
-            'Ningbo': ['宁波', 'Ningbo'],
-            'Wenzhou': ['温州', 'Wenzhou'],
-            'Jiaxing': ['嘉兴', 'Jiaxing'],
-            'Jinhua': ['金华', 'Jinhua'],
-            'Shaoxing': ['绍兴', 'Shaoxing'],
-            'Taizhou': ['台州', 'Taizhou'],
-            'Huzhou': ['湖州', 'Huzhou'],
-            'Lishui': ['丽水', 'Lishui'],
-            'Quzhou': ['衢州', 'Quzhou'],
-            'Zhoushan': ['舟山', 'Zhoushan']
-        }
-        
-        # International cities (including common aliases)
-        international_cities = {
-            'Taipei': ['台北', 'Taipei'],
-            'Hong Kong': ['香港', 'Hong Kong', 'HK'],
-            'Macau': ['澳门', 'Macau', 'Macao'],
-            'Singapore': ['新加坡', 'Singapore', '狮城'],
-            'Kuala Lumpur': ['吉隆坡', 'Kuala Lumpur', 'KL'],
-            'Bangkok': ['曼谷', 'Bangkok'],
-            'Tokyo': ['东京', 'Tokyo'],
-            'Seoul': ['首尔', 'Seoul', '汉城'],
-            'New York': ['纽约', 'New York', 'NYC'],
-            'London': ['伦敦', 'London'],
-            'Paris': ['巴黎', 'Paris'],
-            'Sydney': ['悉尼', 'Sydney'],
-            'Toronto': ['多伦多', 'Toronto'],
-            'Vancouver': ['温哥华', 'Vancouver'],
-            'Los Angeles': ['洛杉矶', 'Los Angeles', 'LA'],
-            'San Francisco': ['旧金山', 'San Francisco', 'SF'],
-            'Chicago': ['芝加哥', 'Chicago'],
-            'Washington': ['华盛顿', 'Washington', 'DC'],
-            'Boston': ['波士顿', 'Boston'],
-            'Seattle': ['西雅图', 'Seattle'],
-            'Miami': ['迈阿密', 'Miami'],
-            'Las Vegas': ['拉斯维加斯', 'Las Vegas', '赌城'],
-            'Berlin': ['柏林', 'Berlin'],
-            'Munich': ['慕尼黑', 'Munich'],
-            'Amsterdam': ['阿姆斯特丹', 'Amsterdam'],
-            'Brussels': ['布鲁塞尔', 'Brussels'],
-            'Rome': ['罗马', 'Rome'],
-            'Milan': ['米兰', 'Milan'],
-            'Barcelona': ['巴塞罗那', 'Barcelona'],
-            'Madrid': ['马德里', 'Madrid'],
-            'Moscow': ['莫斯科', 'Moscow'],
-            'Saint Petersburg': ['圣彼得堡', 'Saint Petersburg'],
-            'Dubai': ['迪拜', 'Dubai'],
-            'Cairo': ['开罗', 'Cairo'],
-            'Melbourne': ['墨尔本', 'Melbourne'],
-            'Brisbane': ['布里斯班', 'Brisbane'],
-            'Valencia': ['瓦伦西亚', 'Valencia'],
-            'Granada': ['格拉纳达', 'Granada'],
-            'Seville': ['塞维利亚', 'Sevilla', 'Seville'],
-            'Bilbao': ['毕尔巴鄂', 'Bilbao'],
-            'Zaragoza': ['萨拉戈萨', 'Zaragoza'],
-            'Malaga': ['马拉加', 'Malaga'],
-            'Murcia': ['穆尔西亚', 'Murcia'],
-            'Palma': ['帕尔马', 'Palma'],
-            'Las Palmas': ['拉斯帕尔马斯', 'Las Palmas'],
-            'Cordoba': ['科尔多瓦', 'Cordoba'],
-            'Alicante': ['阿利坎特', 'Alicante'],
-            'Vigo': ['维戈', 'Vigo'],
-            'Gijon': ['希洪', 'Gijon'],
-            'Oviedo': ['奥维耶多', 'Oviedo'],
-            'Santiago de Compostela': ['圣地亚哥德孔波斯特拉', 'Santiago de Compostela'],
-            'Toledo': ['托莱多', 'Toledo'],
-            'Caceres': ['卡塞雷斯', 'Caceres'],
-            'Badajoz': ['巴达霍斯', 'Badajoz'],
-            'Avila': ['阿维拉', 'Avila'],
-            'Segovia': ['塞哥维亚', 'Segovia'],
-            'Salamanca': ['萨拉曼卡', 'Salamanca'],
-            'Burgos': ['布尔戈斯', 'Burgos'],
-            'Leon': ['莱昂', 'Leon'],
-            'Palencia': ['帕伦西亚', 'Palencia'],
-            'Valladolid': ['瓦拉多利德', 'Valladolid'],
-            'Zamora': ['萨莫拉', 'Zamora'],
-            'Logrono': ['洛格罗尼奥', 'Logrono'],
-            'Pamplona': ['潘普洛纳', 'Pamplona'],
-            'San Sebastian': ['圣塞巴斯蒂安', 'San Sebastian'],
-            'Vitoria': ['维多利亚', 'Vitoria'],
-            'Huesca': ['韦斯卡', 'Huesca'],
-            'Teruel': ['特鲁埃尔', 'Teruel'],
-            'Castellon': ['卡斯特利翁', 'Castellon'],
-            'Jaen': ['哈恩', 'Jaen'],
-            'Almeria': ['阿尔梅里亚', 'Almeria'],
-            'Cadiz': ['加的斯', 'Cadiz'],
-            'Huelva': ['韦尔瓦', 'Huelva'],
-            'Jerez': ['赫雷斯', 'Jerez'],
-            'Algeciras': ['阿尔赫西拉斯', 'Algeciras'],
-            'Marbella': ['马贝拉', 'Marbella'],
-            'Estepona': ['埃斯特波纳', 'Estepona'],
-            'Fuengirola': ['富恩希罗拉', 'Fuengirola'],
-            'Torremolinos': ['托雷莫利诺斯', 'Torremolinos'],
-            'Benalmadena': ['贝纳尔马德纳', 'Benalmadena'],
-            'Ronda': ['龙达', 'Ronda']
-        }
-        
-        # Merge all cities
-        all_cities = {**chinese_cities, **international_cities}
-        
-        # Preprocess text, remove common country prefixes
-        processed_prompt = prompt.lower()
-        country_prefixes = ['西班牙', '意大利', '法国', '德国', '英国', '美国', '日本', '韩国', '泰国', '新加坡', '马来西亚', '澳大利亚', '加拿大', '俄罗斯', '荷兰', '比利时', '瑞士', '奥地利', '丹麦', '瑞典', '挪威', '芬兰', 'spain', 'italy', 'france', 'germany', 'uk', 'usa', 'japan', 'korea', 'thailand', 'singapore', 'malaysia', 'australia', 'canada', 'russia', 'netherlands', 'belgium', 'switzerland', 'austria', 'denmark', 'sweden', 'norway', 'finland']
-        
-        # Sort cities by name length, prioritize matching longer names (avoid partial matching issues)
-        for city_name, aliases in sorted(all_cities.items(), key=lambda x: max(len(alias) for alias in x[1]), reverse=True):
-            for alias in aliases:
-                # Direct matching
-                if alias.lower() in processed_prompt:
-                    return city_name
-                
-                # Try matching with country prefix
-                for prefix in country_prefixes:
-                    if f"{prefix}{alias}" in prompt or f"{prefix} {alias}" in prompt:
-                        return city_name
-        
-        return "Query City"
+        # A single pass over the text finds every alias, longer names have priority.
+        # Country-prefixed forms ("西班牙巴塞罗那", "Spain Barcelona") contain the alias
+        # itself, so they are matched as well.
+        record = find_city(prompt)
+        return record.name if record is not None else "Query City"
     
     def _generate_filename(self, city: str) -> str:
         """Generate filename: datetime_cityname"""
@@ -185,8 +90,26 @@ class OutputManager:
         clean_city = re.sub(r'[<>:"/\\|?*]', '', city)
         return f"{timestamp}_{clean_city}.txt"
     
+    def _write_report_file(self, city: str, content: str) -> str:
+        """Write a report to a new file, a numeric suffix is added if the name is taken"""
+        filename = self._generate_filename(city)
+        stem, suffix = os.path.splitext(filename)
+        for attempt in range(1, 1000):
+            if attempt > 1:
+                filename = f"{stem}_{attempt}{suffix}"
+            filepath = os.path.join(self.output_dir, filename)
+            try:
+                # Exclusive create, reports saved in the same second never overwrite each other
+                with open(filepath, 'x', encoding='utf-8') as f:
+                    f.write(content)
+                return filepath
+            except FileExistsError:
+                continue
+        raise FileExistsError(f"No free report file name for {stem}")
+    
     def save_travel_report(self, user_prompt: str, final_answer: str, 
-                          prompt_history: List[str]) -> str:
+                          prompt_history: List[str], city: Optional[str] = None,
+                          trace_lines: Optional[List[str]] = None) -> str:
         """
         Save travel query report
         
@@ -194,25 +117,44 @@ class OutputManager:
             user_prompt: User's original request
             final_answer: Final answer
             prompt_history: Complete conversation history
+            city: City name if already extracted, otherwise it is extracted from the content
+            trace_lines: Execution trace of the session, appended to the report
             
         Returns:
-            Saved file path
+            Saved file path, or "<segment file>#<offset>" with segment storage
         """
-        city = self._extract_city_from_all_content(user_prompt, final_answer, prompt_history)
-        filename = self._generate_filename(city)
-        filepath = os.path.join(self.output_dir, filename)
+        if city is None:
+            city = self._extract_city_from_all_content(user_prompt, final_answer, prompt_history)
         
         # Prepare output content
         content = self._format_travel_report(user_prompt, final_answer, 
-                                           prompt_history, city)
+                                           prompt_history, city, trace_lines)
         
-        # Write to file
+        # Write to file or append to the active segment
+        segment_offset = segment_length = None
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return filepath
+            if self.segments is not None:
+                report_id = f"{os.path.splitext(self._generate_filename(city))[0]}_{uuid.uuid4().hex[:8]}"
+                segment_path, segment_offset, segment_length = self.segments.append(content)
+                location = f"{segment_path}#{segment_offset}"
+            else:
+                location = self._write_report_file(city, content)
+                report_id = os.path.splitext(os.path.basename(location))[0]
         except Exception as e:
             raise Exception(f"Error saving file: {e}")
+        
+        # Register in the report catalog
+        self.index.add(
+            report_id=report_id,
+            city=city,
+            created_at=time.time(),
+            size=len(content.encode('utf-8')),
+            steps=len(prompt_history),
+            path=location,
+            segment_offset=segment_offset,
+            segment_length=segment_length
+        )
+        return location
     
     def _extract_city_from_all_content(self, user_prompt: str, final_answer: str, 
                                      prompt_history: List[str]) -> str:
@@ -275,26 +217,8 @@ class OutputManager:
         Returns:
             Extracted original city name
         """
-        # Common city name patterns (including country prefix)
-        city_patterns = [
-            # Spanish cities - exact matching
-            r'西班牙(格拉纳达|马德里|巴塞罗那|瓦伦西亚|塞维利亚|龙达|毕尔巴鄂|萨拉戈萨|马拉加|穆尔西亚|帕尔马|科尔多瓦|阿利坎特|托莱多|萨拉曼卡|布尔戈斯|莱昂|瓦拉多利德|洛格罗尼奥|潘普洛纳|圣塞巴斯蒂安|维多利亚)',
-            r'Spain\s+(Granada|Madrid|Barcelona|Valencia|Seville|Sevilla|Ronda|Bilbao|Zaragoza|Malaga|Murcia|Palma|Cordoba|Alicante|Toledo|Salamanca|Burgos|Leon|Valladolid|Logrono|Pamplona)',
-            # Other country cities
-            r'意大利(罗马|米兰|佛罗伦萨|威尼斯|那不勒斯|都灵|博洛尼亚|巴勒莫|热那亚|卡塔尼亚)',
-            r'Italy\s+(Rome|Milan|Florence|Venice|Naples|Turin|Bologna|Palermo|Genoa|Catania)',
-            r'法国(巴黎|马赛|里昂|图卢兹|尼斯|南特|斯特拉斯堡|蒙彼利埃|波尔多|里尔)',
-            r'France\s+(Paris|Marseille|Lyon|Toulouse|Nice|Nantes|Strasbourg|Montpellier|Bordeaux|Lille)',
-            r'德国(柏林|慕尼黑|汉堡|科隆|法兰克福|斯图加特|杜塞尔多夫|多特蒙德|埃森|莱比锡)',
-            r'Germany\s+(Berlin|Munich|Hamburg|Cologne|Frankfurt|Stuttgart|Dusseldorf|Dortmund|Essen|Leipzig)',
-            r'英国(伦敦|曼彻斯特|伯明翰|利兹|格拉斯哥|谢菲尔德|布拉德福德|爱丁堡|利物浦|布里斯托)',
-            r'UK\s+(London|Manchester|Birmingham|Leeds|Glasgow|Sheffield|Bradford|Edinburgh|Liverpool|Bristol)',
-            r'美国(纽约|洛杉矶|芝加哥|休斯顿|费城|凤凰城|圣安东尼奥|圣地亚哥|达拉斯|圣何塞)',
-            r'USA\s+(New York|Los Angeles|Chicago|Houston|Philadelphia|Phoenix|San Antonio|San Diego|Dallas|San Jose)',
-        ]
-        
-        for pattern in city_patterns:
-            match = re.search(pattern, prompt)
+        for pattern in _ORIGINAL_CITY_PATTERNS:
+            match = pattern.search(prompt)
             if match:
                 city_name = match.group(1).strip()
                 if city_name:
@@ -303,7 +227,8 @@ class OutputManager:
         return "Query City"
     
     def _format_travel_report(self, user_prompt: str, final_answer: str, 
-                            prompt_history: List[str], city: str) -> str:
+                            prompt_history: List[str], city: str,
+                            trace_lines: Optional[List[str]] = None) -> str:
         """Format travel report content"""
         lines = []
         
@@ -335,6 +260,13 @@ class OutputManager:
             lines.append(f"[Step {i}] {entry}")
             lines.append("")
         
+        # Execution trace (durations, tokens, cache hits of every loop, LLM and tool call)
+        if trace_lines:
+            lines.append("⏱️ Execution Trace:")
+            lines.append("-" * 50)
+            lines.extend(trace_lines)
+            lines.append("")
+        
         # Report footer
         lines.append("=" * 80)
         lines.append("📊 Report Statistics:")
@@ -346,15 +278,39 @@ class OutputManager:
         
         return '\n'.join(lines)
     
-    def list_saved_reports(self) -> List[str]:
-        """List all saved report files"""
-        if not os.path.exists(self.output_dir):
-            return []
+    def list_saved_reports(self, limit: Optional[int] = None) -> List[str]:
+        """List saved report locations, newest first"""
+        return [entry["path"] for entry in self.index.query(limit=limit)]
+    
+    def read_report(self, location: str) -> str:
+        """
+        Read a saved report from either storage
         
-        files = []
-        for filename in os.listdir(self.output_dir):
-            if filename.endswith('.txt'):
-                filepath = os.path.join(self.output_dir, filename)
-                files.append(filepath)
+        Args:
+            location: Path returned by save_travel_report or listed in the catalog
+            
+        Returns:
+            Report text
+        """
+        segment = SegmentStore.parse_location(location)
+        if segment is not None:
+            return SegmentStore.read(*segment)
+        with open(location, 'r', encoding='utf-8') as f:
+            return f.read()
+    
+    def query_reports(self, city: Optional[str] = None, since: Optional[float] = None,
+                      until: Optional[float] = None, limit: int = 50, offset: int = 0) -> List[dict]:
+        """
+        Query the report catalog, newest first
         
-        return sorted(files, reverse=True)  # Sort by time in descending order
\ No newline at end of file
+        Args:
+            city: Only reports for this city
+            since: Only reports saved at or after this Unix timestamp
+            until: Only reports saved before this Unix timestamp
+            limit: Page size
+            offset: Number of matching reports to skip
+            
+        Returns:
+            List of dictionaries with report_id, city, created_at, size, steps and path
+        """
+        return self.index.query(city=city, since=since, until=until, limit=limit, offset=offset)
@@ -0,0 +1,174 @@
+import contextvars
+import itertools
+import threading
+import time
+from concurrent.futures import Executor, Future, TimeoutError as FutureTimeoutError, wait
+from typing import Any, Callable, List, Optional
+
+# Monotonic time at which the innermost run_parallel timeout around this call expires
+_call_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("call_deadline", default=None)
+
+
+def remaining_time() -> Optional[float]:
+    """
+    Seconds left before the caller stops waiting for the current task
+
+    Network clients use it as their request timeout, so a call that was given up
+    on does not keep a connection (and a worker) busy past its deadline.
+
+    Returns:
+        Seconds (negative once passed), None if the task runs without a timeout
+    """
+    deadline = _call_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+class ThreadPerTaskExecutor(Executor):
+    """
+    Executor starting a daemon thread for every task
+
+    Tasks never queue behind each other, so calls abandoned after a timeout
+    cannot delay other sessions' calls, and a hung call does not block exit.
+    Concurrency towards the services is limited by the HTTP transport's per-host
+    limit and the scheduler's rate limits instead.
+    """
+
+    def __init__(self, thread_name_prefix: str = "task"):
+        self.thread_name_prefix = thread_name_prefix
+        self._counter = itertools.count(1)
+
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+        threading.Thread(target=run, name=f"{self.thread_name_prefix}-{next(self._counter)}", daemon=True).start()
+        return future
+
+
+_shared_executor = ThreadPerTaskExecutor(thread_name_prefix="shared-load")
+
+
+def run_shared(future: Future, func: Callable[[], Any]):
+    """
+    Run a load whose result several callers wait for, setting future to its outcome
+
+    Callers of other sessions share the load, so it does not inherit the deadline of
+    the caller that happened to start it: that caller running out of time must not
+    fail the others. Without a caller deadline the load runs on the calling thread,
+    otherwise on its own thread so the caller can stop waiting (see wait_shared).
+
+    Args:
+        future: Pending future the callers wait on
+        func: Zero-argument callable producing the value
+    """
+    def load():
+        _call_deadline.set(None)
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    context = contextvars.copy_context()
+    if _call_deadline.get() is None:
+        context.run(load)
+    else:
+        _shared_executor.submit(context.run, load)
+
+
+def wait_shared(future: Future) -> Any:
+    """
+    Result of a shared load, waiting at most the caller's own remaining_time()
+
+    Raises:
+        TimeoutError: If the caller's deadline passed before the load finished
+        Whatever the load raised
+    """
+    left = remaining_time()
+    try:
+        return future.result(timeout=None if left is None else max(left, 0.0))
+    except FutureTimeoutError:
+        if future.done():
+            # The load itself timed out, its error is every caller's
+            raise
+        raise TimeoutError("deadline passed waiting for a shared request") from None
+
+
+class TaskOutcome:
+    """Result of one task run by run_parallel"""
+
+    def __init__(self, value: Any = None, error: Optional[BaseException] = None, timed_out: bool = False):
+        self.value = value
+        self.error = error
+        self.timed_out = timed_out
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+    def __repr__(self) -> str:
+        if self.timed_out:
+            return "TaskOutcome(timed_out=True)"
+        if self.error is not None:
+            return f"TaskOutcome(error={self.error!r})"
+        return f"TaskOutcome(value={self.value!r})"
+
+
+def run_parallel(executor: Executor, tasks: List[Callable[[], Any]],
+                 timeout: Optional[float] = None) -> List[TaskOutcome]:
+    """
+    Run independent zero-argument callables concurrently and collect their outcomes
+
+    The call returns once every task finished or the timeout expired, whichever
+    comes first. Tasks still running at that point are reported as timed out and
+    left to finish in the background, so one slow task never blocks the others.
+    Each task runs in a copy of the caller's context, so context variables such
+    as the current trace span carry over to the worker threads. With a timeout,
+    tasks see the time left through remaining_time() and a task that only starts
+    after the timeout expired is not run.
+
+    Args:
+        executor: Executor the tasks are submitted to
+        tasks: Callables to run
+        timeout: Overall wall-clock limit in seconds, None waits indefinitely
+
+    Returns:
+        One TaskOutcome per task, in the same order as tasks
+    """
+    deadline = None
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+        outer = _call_deadline.get()
+        if outer is not None:
+            deadline = min(deadline, outer)
+
+    def start(task: Callable[[], Any]) -> Any:
+        if deadline is not None:
+            if time.monotonic() >= deadline:
+                raise TimeoutError("deadline passed before the task started")
+            _call_deadline.set(deadline)
+        return task()
+
+    futures = [executor.submit(contextvars.copy_context().run, start, task) for task in tasks]
+    wait(futures, timeout=timeout)
+
+    outcomes = []
+    for future in futures:
+        if not future.done():
+            future.cancel()
+            outcomes.append(TaskOutcome(timed_out=True))
+        elif future.exception() is not None:
+            outcomes.append(TaskOutcome(error=future.exception()))
+        else:
+            outcomes.append(TaskOutcome(value=future.result()))
+    return outcomes
@@ -0,0 +1,232 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class PersistentCache:
+    """
+    SQLite-backed key-value cache shared by all processes using the same file.
+
+    Values are stored as JSON. Every entry belongs to a family (e.g. "transport")
+    which is only used for hit/miss statistics. Expired entries are ignored on read
+    and the least recently used entries are evicted once the cache grows beyond
+    max_entries or max_bytes.
+    """
+
+    # Only refresh last_access when it is older than this, so hits stay read-only
+    _TOUCH_INTERVAL = 60.0
+    # Check size limits once every N writes
+    _EVICT_EVERY = 50
+    # Flush in-process hit/miss counters to the database once every N lookups
+    _FLUSH_STATS_EVERY = 100
+
+    def __init__(self, path: str, namespace: str = "default", default_ttl: float = 3600.0,
+                 max_entries: int = 10000, max_bytes: Optional[int] = None):
+        """
+        Args:
+            path: SQLite database file, created if missing
+            namespace: Logical cache name, several caches can share one file
+            default_ttl: Time to live in seconds used when set() gets no ttl
+            max_entries: Maximum number of entries kept in this namespace
+            max_bytes: Optional maximum total size of stored values in bytes
+        """
+        self.path = path
+        self.namespace = namespace
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._lookups = 0
+        self._pending_stats: Dict[str, list] = {}
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, SQLite connections are not shared between threads"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                family TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_cache_entries_access
+            ON cache_entries (namespace, last_access)
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_stats (
+                namespace TEXT NOT NULL,
+                family TEXT NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (namespace, family)
+            )
+        """)
+
+    def get(self, key: str, family: str = "default") -> Optional[Any]:
+        """
+        Look up a value
+
+        Args:
+            key: Cache key
+            family: Family used for hit/miss statistics
+
+        Returns:
+            Stored value, or None if missing or expired
+        """
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, expires_at, last_access FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        ).fetchone()
+
+        if row is None or row[1] <= now:
+            self._count(family, hit=False)
+            return None
+
+        if now - row[2] > self._TOUCH_INTERVAL:
+            conn.execute(
+                "UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key)
+            )
+        self._count(family, hit=True)
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, family: str = "default"):
+        """
+        Store a JSON-serializable value
+
+        Args:
+            key: Cache key
+            value: Value to store
+            ttl: Time to live in seconds, defaults to default_ttl
+            family: Family the entry belongs to
+        """
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries "
+            "(namespace, key, family, value, size, created_at, expires_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.namespace, key, family, payload, len(payload.encode("utf-8")), now, expires_at, now)
+        )
+
+        with self._lock:
+            self._writes += 1
+            should_evict = self._writes % self._EVICT_EVERY == 0
+        if should_evict:
+            self.evict()
+
+    def delete(self, key: str):
+        """Remove a single entry"""
+        self._connect().execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+        )
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until size limits are met"""
+        conn = self._connect()
+        conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+            (self.namespace, time.time())
+        )
+
+        count, total_size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (self.namespace,)
+        ).fetchone()
+
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key IN ("
+                "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY last_access LIMIT ?)",
+                (self.namespace, self.namespace, count - self.max_entries)
+            )
+
+        if self.max_bytes is not None and total_size > self.max_bytes:
+            excess = total_size - self.max_bytes
+            rows = conn.execute(
+                "SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY last_access",
+                (self.namespace,)
+            )
+            victims = []
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                victims.append((self.namespace, key))
+                excess -= size
+            conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", victims)
+
+    def clear(self):
+        """Remove all entries and statistics of this namespace"""
+        conn = self._connect()
+        conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+        conn.execute("DELETE FROM cache_stats WHERE namespace = ?", (self.namespace,))
+        with self._lock:
+            self._pending_stats.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Return hit/miss counters per family, accumulated across all processes
+
+        Returns:
+            Dictionary like {"transport": {"hits": 10, "misses": 2}}
+        """
+        self.flush_stats()
+        rows = self._connect().execute(
+            "SELECT family, hits, misses FROM cache_stats WHERE namespace = ?", (self.namespace,)
+        )
+        return {family: {"hits": hits, "misses": misses} for family, hits, misses in rows}
+
+    def flush_stats(self):
+        """Write pending in-process counters to the database"""
+        with self._lock:
+            pending = self._pending_stats
+            self._pending_stats = {}
+        if not pending:
+            return
+        conn = self._connect()
+        for family, (hits, misses) in pending.items():
+            conn.execute(
+                "INSERT INTO cache_stats (namespace, family, hits, misses) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, family) DO UPDATE SET "
+                "hits = hits + excluded.hits, misses = misses + excluded.misses",
+                (self.namespace, family, hits, misses)
+            )
+
+    def _count(self, family: str, hit: bool):
+        with self._lock:
+            counters = self._pending_stats.setdefault(family, [0, 0])
+            counters[0 if hit else 1] += 1
+            self._lookups += 1
+            should_flush = self._lookups % self._FLUSH_STATS_EVERY == 0
+        if should_flush:
+            self.flush_stats()
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from .parallel import ThreadPerTaskExecutor, wait_shared
+from .tracing import current_span
+
+# Prefetched results are only kept for about one LLM turn
+PREFETCH_TTL = float(os.environ.get("PREFETCH_TTL", "120"))
+# Maximum prefetched results waiting to be used, further prefetches are skipped.
+# Every prefetch runs on its own thread, so this also caps the speculative calls in flight
+PREFETCH_MAX_UNUSED = int(os.environ.get("PREFETCH_MAX_UNUSED", "32"))
+
+_prefetch_cache = None
+_prefetch_cache_lock = threading.Lock()
+
+
+class PrefetchCache:
+    """
+    Short-lived results of speculative fetches, used by the real calls if they come
+
+    prefetch() starts a loader in the background. The first real call for the same
+    key made later through get_or_load() takes the prefetched result, or waits for
+    it if it is still in flight, instead of fetching again. The result is removed
+    once used, so it is never a second cache: later calls and keys that were not
+    prefetched go straight to the loader and the tools' own caches and TTLs.
+    Prefetches that expire unused count as wasted, and no new prefetch starts
+    while too many results are waiting unused. Prefetches never queue, a real
+    call only waits for one that is already running.
+    """
+
+    def __init__(self, ttl: float = PREFETCH_TTL, max_unused: int = PREFETCH_MAX_UNUSED):
+        """
+        Args:
+            ttl: Seconds a prefetched result stays available
+            max_unused: Maximum prefetched results not used yet
+        """
+        self.ttl = ttl
+        self.max_unused = max_unused
+        self._executor = ThreadPerTaskExecutor(thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        # key -> (future, expires_at), only prefetches not used yet
+        self._entries: Dict[Hashable, Tuple[Future, float]] = {}
+        self.started = 0
+        self.hits = 0
+        self.wasted = 0
+        self.skipped = 0
+
+    def _purge_locked(self, now: float):
+        for key, (future, expires_at) in list(self._entries.items()):
+            if expires_at <= now:
+                del self._entries[key]
+                self.wasted += 1
+
+    def prefetch(self, key: Hashable, loader: Callable[[], Any]) -> bool:
+        """
+        Start loading a value in the background
+
+        Args:
+            key: Key the real call will use
+            loader: Zero-argument callable fetching the value
+
+        Returns:
+            True if a prefetch started, False if the key is already prefetched or the unused cap is reached
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._purge_locked(now)
+            if key in self._entries:
+                return False
+            if len(self._entries) >= self.max_unused:
+                self.skipped += 1
+                return False
+            future = self._executor.submit(loader)
+            self._entries[key] = (future, now + self.ttl)
+            self.started += 1
+            return True
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Return the prefetched value of a key, or call the loader
+
+        The prefetched value is handed out once, it is removed from the cache here.
+        A prefetch that has not started yet is cancelled and does not count as
+        prefetched; waiting for a running one stops at the caller's deadline. A
+        failed prefetch falls back to the loader, so errors are the real call's own.
+        """
+        with self._lock:
+            self._purge_locked(time.monotonic())
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            return loader()
+
+        future = entry[0]
+        if future.cancel():
+            with self._lock:
+                self.started -= 1
+            return loader()
+        try:
+            value = wait_shared(future)
+        except Exception:
+            if not future.done():
+                # The caller's own deadline passed
+                raise
+            return loader()
+        with self._lock:
+            self.hits += 1
+        span = current_span()
+        if span is not None:
+            span.increment("prefetch_hits")
+        return value
+
+    def stats(self) -> dict:
+        """Prefetch counters and the share of prefetches the real calls used"""
+        with self._lock:
+            self._purge_locked(time.monotonic())
+            return {
+                "started": self.started,
+                "hits": self.hits,
+                "wasted": self.wasted,
+                "skipped": self.skipped,
+                "pending": len(self._entries),
+                "hit_rate": round(self.hits / self.started, 3) if self.started else 0.0,
+            }
+
+
+def get_prefetch_cache() -> PrefetchCache:
+    """Return the process-wide prefetch cache shared by the tools"""
+    global _prefetch_cache
+    if _prefetch_cache is None:
+        with _prefetch_cache_lock:
+            if _prefetch_cache is None:
+                _prefetch_cache = PrefetchCache()
+    return _prefetch_cache
@@ -0,0 +1,189 @@
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+from .gazetteer import CITY_KEY_VERSION, canonical_city_key
+
+
+class ReportIndex:
+    """
+    SQLite catalog of saved travel reports
+
+    Every saved report gets one row, so reports can be listed and filtered by
+    city and time without scanning or opening the files in the output directory.
+    Queries are served from indexes and return one page at a time. Reports kept
+    in a segment store also record the offset and length of their compressed data.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite database file, created if missing
+        """
+        self.path = path
+        self._local = threading.local()
+        self._init_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return this thread's connection, SQLite connections are not shared between threads"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS reports (
+                report_id TEXT PRIMARY KEY,
+                city TEXT NOT NULL,
+                city_key TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                steps INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                segment_offset INTEGER,
+                segment_length INTEGER
+            )
+        """)
+        # Catalogs created before segment storage lack the offset columns
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(reports)")}
+        for column in ("segment_offset", "segment_length"):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE reports ADD COLUMN {column} INTEGER")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_created ON reports (created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_city_created ON reports (city_key, created_at)")
+
+        self._migrate_city_keys(conn)
+
+    def _migrate_city_keys(self, conn: sqlite3.Connection):
+        """
+        Re-key the entries once after the city key rules changed
+
+        The catalog's user_version records the CITY_KEY_VERSION its keys were built
+        with, so opening an up-to-date catalog does not scan the table.
+        """
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= CITY_KEY_VERSION:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while this one waited for the lock
+            if conn.execute("PRAGMA user_version").fetchone()[0] < CITY_KEY_VERSION:
+                for (city, city_key) in conn.execute("SELECT DISTINCT city, city_key FROM reports").fetchall():
+                    if city_key != self._city_key(city):
+                        conn.execute("UPDATE reports SET city_key = ? WHERE city = ?", (self._city_key(city), city))
+                conn.execute(f"PRAGMA user_version = {int(CITY_KEY_VERSION)}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _city_key(city: str) -> str:
+        """Aliases of a known city share its key, like every other city key ("巴塞罗那" -> "barcelona")"""
+        return canonical_city_key(city)
+
+    def add(self, report_id: str, city: str, created_at: float, size: int, steps: int, path: str,
+            segment_offset: Optional[int] = None, segment_length: Optional[int] = None):
+        """
+        Add or replace the entry of a saved report
+
+        Args:
+            report_id: Unique report id
+            city: Query city
+            created_at: Save time as a Unix timestamp
+            size: Report size in bytes
+            steps: Number of execution steps in the report
+            path: Where the report is stored
+            segment_offset: Offset of the compressed report in its segment file
+            segment_length: Length of the compressed report in its segment file
+        """
+        self._connect().execute(
+            "INSERT OR REPLACE INTO reports "
+            "(report_id, city, city_key, created_at, size, steps, path, segment_offset, segment_length) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (report_id, city, self._city_key(city), created_at, size, steps, path, segment_offset, segment_length)
+        )
+
+    def get(self, report_id: str) -> Optional[dict]:
+        """Return the entry of one report, None if it is not indexed"""
+        row = self._connect().execute(
+            "SELECT report_id, city, created_at, size, steps, path, segment_offset, segment_length "
+            "FROM reports WHERE report_id = ?", (report_id,)
+        ).fetchone()
+        return dict(row) if row is not None else None
+
+    def query(self, city: Optional[str] = None, since: Optional[float] = None,
+              until: Optional[float] = None, limit: Optional[int] = 50, offset: int = 0) -> List[dict]:
+        """
+        Return report entries, newest first
+
+        Args:
+            city: Only reports for this city (case-insensitive, any known alias)
+            since: Only reports saved at or after this Unix timestamp
+            until: Only reports saved before this Unix timestamp, pass the created_at of
+                the last entry of a page to get the next page without an offset scan
+            limit: Page size, None returns every match
+            offset: Number of matching entries to skip
+
+        Returns:
+            List of dictionaries with report_id, city, created_at, size, steps, path,
+            segment_offset and segment_length (None for plain files)
+        """
+        conditions, params = [], []
+        if city is not None:
+            conditions.append("city_key = ?")
+            params.append(self._city_key(city))
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("created_at < ?")
+            params.append(until)
+
+        sql = ("SELECT report_id, city, created_at, size, steps, path, segment_offset, segment_length "
+               "FROM reports")
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_at DESC, report_id DESC LIMIT ? OFFSET ?"
+        params.extend([-1 if limit is None else limit, offset])
+
+        return [dict(row) for row in self._connect().execute(sql, params)]
+
+    def count(self, city: Optional[str] = None) -> int:
+        """Number of indexed reports, optionally for one city"""
+        if city is None:
+            return self._connect().execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM reports WHERE city_key = ?", (self._city_key(city),)
+        ).fetchone()[0]
+
+    def backfill(self, output_dir: str) -> int:
+        """
+        Index report files saved before the index existed
+
+        Args:
+            output_dir: Directory containing YYYYMMDD_HHMMSS_City[_N].txt reports
+
+        Returns:
+            Number of reports added
+        """
+        added = 0
+        for filename in os.listdir(output_dir):
+            match = re.match(r"^(\d{8}_\d{6})_(.+?)(?:_\d+)?\.txt$", filename)
+            if not match:
+                continue
+            path = os.path.join(output_dir, filename)
+            created_at = datetime.strptime(match.group(1), "%Y%m%d_%H%M%S").timestamp()
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                steps = sum(1 for line in f if line.startswith("[Step "))
+            self.add(filename[:-len(".txt")], match.group(2), created_at, os.path.getsize(path), steps, path)
+            added += 1
+        return added
@@ -0,0 +1,220 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .parallel import remaining_time, run_shared, wait_shared
+from .tracing import current_span, current_trace_id
+
+# Requests per second and burst size per provider, "provider=rate:burst" separated by commas,
+# a rate of 0 disables the limit. Providers not listed are not limited.
+RATE_LIMITS = os.environ.get("RATE_LIMITS", "llm=8:16,tavily=8:16,wttr=4:8")
+
+# Lane of calls made outside a session, e.g. prefetches on background threads
+BACKGROUND_LANE = "background"
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[float, int]]:
+    """
+    Parse a RATE_LIMITS string
+
+    Args:
+        spec: e.g. "llm=8:16,tavily=8" (the burst defaults to the rate, at least 1)
+
+    Returns:
+        Dictionary of provider -> (requests per second, burst)
+    """
+    limits = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        provider, _, value = item.partition("=")
+        rate, _, burst = value.partition(":")
+        rate = float(rate)
+        limits[provider.strip()] = (rate, int(burst) if burst else max(1, int(rate)))
+    return limits
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter that queues callers and shares capacity fairly
+
+    Waiting callers are queued per lane (one lane per session). Tokens are handed
+    out round-robin over the lanes with waiters, so one session issuing a burst of
+    calls cannot starve the others, and calls within a lane keep their order.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Maximum tokens stored, i.e. calls allowed at once after an idle period
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._condition = threading.Condition()
+        # lane -> queued tickets, the first lane is served next
+        self._lanes: "OrderedDict[Hashable, deque]" = OrderedDict()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, lane: Hashable, timeout: Optional[float] = None) -> float:
+        """
+        Block until this caller gets a token
+
+        Args:
+            lane: Fair-sharing lane of the caller, e.g. its session id
+            timeout: Seconds to wait at most, None waits indefinitely
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            TimeoutError: If no token was granted in time, the caller leaves the queue
+        """
+        start = time.monotonic()
+        expires_at = None if timeout is None else start + timeout
+        ticket = object()
+        with self._condition:
+            self._lanes.setdefault(lane, deque()).append(ticket)
+            granted = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    head_lane = next(iter(self._lanes))
+                    is_next = self._lanes[head_lane][0] is ticket
+                    if is_next and self._tokens >= 1:
+                        self._tokens -= 1
+                        granted = True
+                        return now - start
+                    if expires_at is not None and now >= expires_at:
+                        raise TimeoutError(f"no rate limit token within {timeout:.1f}s")
+                    # Only the next caller waits for the refill, the others wait for their turn
+                    wait = (1 - self._tokens) / self.rate if is_next else None
+                    if expires_at is not None:
+                        wait = expires_at - now if wait is None else min(wait, expires_at - now)
+                    self._condition.wait(wait)
+            finally:
+                queue = self._lanes[lane]
+                queue.remove(ticket)
+                if not queue:
+                    del self._lanes[lane]
+                elif granted:
+                    # Round-robin: a lane that was just served goes to the back
+                    self._lanes.move_to_end(lane)
+                self._condition.notify_all()
+
+
+class Scheduler:
+    """
+    Shared client-side scheduler for calls to external APIs
+
+    Calls with the same key that overlap in time are coalesced: the first caller
+    runs the request and the others wait for its result (single-flight). Calls
+    then pass the token bucket of their provider, which queues them instead of
+    letting the provider answer with 429s, sharing capacity fairly between
+    sessions. A coalesced request runs without any caller's deadline, every
+    caller waits for it only until its own deadline.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        """
+        Args:
+            limits: Provider -> (requests per second, burst), defaults to RATE_LIMITS
+        """
+        if limits is None:
+            limits = parse_rate_limits(RATE_LIMITS)
+        self.buckets = {provider: TokenBucket(rate, burst) for provider, (rate, burst) in limits.items() if rate > 0}
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self.calls: Dict[str, int] = {}
+        self.coalesced: Dict[str, int] = {}
+        self.waited: Dict[str, float] = {}
+
+    def call(self, provider: str, key: Optional[Hashable], func: Callable[[], Any]) -> Any:
+        """
+        Run a request through the scheduler
+
+        Args:
+            provider: Provider name, selects the token bucket, e.g. "tavily"
+            key: Identity of the request for coalescing, None to never coalesce
+            func: Zero-argument callable making the request
+
+        Returns:
+            Result of func, possibly of a concurrent identical call
+
+        Raises:
+            TimeoutError: If the caller's deadline passed before the request finished
+            Whatever func raises, coalesced callers get the same exception
+        """
+        span = current_span()
+        if key is None:
+            return self._request(provider, func, span)
+
+        with self._lock:
+            future = self._inflight.get((provider, key))
+            leader = future is None
+            if leader:
+                self._inflight[(provider, key)] = future = Future()
+            else:
+                self.coalesced[provider] = self.coalesced.get(provider, 0) + 1
+        if leader:
+            # The shared request runs without the leader's deadline, each caller only waits
+            # as long as its own deadline allows
+            run_shared(future, lambda: self._lead(provider, key, func, span))
+        elif span is not None:
+            span.increment("coalesced")
+        return wait_shared(future)
+
+    def _lead(self, provider: str, key: Hashable, func: Callable[[], Any], span) -> Any:
+        try:
+            return self._request(provider, func, span)
+        finally:
+            with self._lock:
+                self._inflight.pop((provider, key), None)
+
+    def _request(self, provider: str, func: Callable[[], Any], span) -> Any:
+        """Wait for a token of the provider and run the request"""
+        bucket = self.buckets.get(provider)
+        if bucket is not None:
+            # A call with a deadline (see utils.parallel) does not wait for a token past it
+            waited = bucket.acquire(current_trace_id() or BACKGROUND_LANE, timeout=remaining_time())
+            with self._lock:
+                self.waited[provider] = self.waited.get(provider, 0.0) + waited
+            if span is not None and waited > 0.001:
+                span.set(rate_limit_wait_ms=round(waited * 1e3, 1))
+        with self._lock:
+            self.calls[provider] = self.calls.get(provider, 0) + 1
+        return func()
+
+    def stats(self) -> dict:
+        """Calls made, calls coalesced and seconds spent waiting for tokens, per provider"""
+        with self._lock:
+            return {
+                provider: {
+                    "calls": self.calls.get(provider, 0),
+                    "coalesced": self.coalesced.get(provider, 0),
+                    "waited_s": round(self.waited.get(provider, 0.0), 3),
+                }
+                for provider in sorted(set(self.calls) | set(self.coalesced))
+            }
+
+
+def get_scheduler() -> Scheduler:
+    """Return the process-wide scheduler shared by the tools and the LLM client"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = Scheduler()
+    return _scheduler
@@ -0,0 +1,126 @@
+import gzip
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within this process
+    fcntl = None
+
+
+class SegmentStore:
+    """
+    Append-only store of gzip-compressed reports in rotating segment files
+
+    Each report is compressed as its own gzip member and appended to the active
+    segment with a single write, so a segment is a valid multi-member .gz file
+    (readable with zcat) and any report can be read back from its offset and
+    length alone. Appends from several threads and processes are serialized
+    with a lock file, and fsync is batched to at most one call per interval.
+    """
+
+    SEGMENT_PATTERN = re.compile(r"^segment-(\d{6})\.gz$")
+
+    def __init__(self, directory: str, max_segment_bytes: int = 64 * 1024 * 1024,
+                 fsync_interval: float = 1.0, compress_level: int = 6):
+        """
+        Args:
+            directory: Directory holding the segment files, created if missing
+            max_segment_bytes: A new segment is started once the active one would exceed this size
+            fsync_interval: Minimum seconds between fsync calls, 0 syncs every append
+            compress_level: gzip compression level
+        """
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_interval = fsync_interval
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._last_fsync = 0.0
+
+        if not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        numbers = [int(match.group(1)) for match in map(self.SEGMENT_PATTERN.match, os.listdir(directory)) if match]
+        self._active = max(numbers, default=1)
+
+    def segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"segment-{number:06d}.gz")
+
+    def append(self, content: str) -> Tuple[str, int, int]:
+        """
+        Compress and append one report
+
+        Args:
+            content: Report text
+
+        Returns:
+            Tuple of (segment file path, offset, length) locating the compressed report,
+            the report's location string is "<segment file path>#<offset>"
+        """
+        data = gzip.compress(content.encode('utf-8'), compresslevel=self.compress_level)
+
+        with self._lock, open(os.path.join(self.directory, ".lock"), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                # Rotate when the active segment is full, another process may have rotated already
+                path = self.segment_path(self._active)
+                while os.path.exists(path) and os.path.getsize(path) > 0 and \
+                        os.path.getsize(path) + len(data) > self.max_segment_bytes:
+                    self._active += 1
+                    path = self.segment_path(self._active)
+
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    offset = os.fstat(fd).st_size
+                    os.write(fd, data)
+                    now = time.monotonic()
+                    if now - self._last_fsync >= self.fsync_interval:
+                        os.fsync(fd)
+                        self._last_fsync = now
+                finally:
+                    os.close(fd)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+        return path, offset, len(data)
+
+    @staticmethod
+    def read(path: str, offset: int, length: Optional[int] = None) -> str:
+        """
+        Read one report back
+
+        Args:
+            path: Segment file path
+            offset: Offset of the compressed report
+            length: Length of the compressed report, if unknown the data is
+                decompressed up to the end of its gzip member
+
+        Returns:
+            Report text
+        """
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            if length is not None:
+                return gzip.decompress(f.read(length)).decode('utf-8')
+
+            decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+            chunks = []
+            while not decompressor.eof:
+                data = f.read(64 * 1024)
+                if not data:
+                    raise EOFError(f"Truncated report at {path}#{offset}")
+                chunks.append(decompressor.decompress(data))
+        return b"".join(chunks).decode('utf-8')
+
+    @staticmethod
+    def parse_location(location: str) -> Optional[Tuple[str, int]]:
+        """Split a 'segment-path#offset' location, None for a plain file path"""
+        match = re.match(r"^(.*segment-\d{6}\.gz)#(\d+)$", location)
+        if not match:
+            return None
+        return match.group(1), int(match.group(2))
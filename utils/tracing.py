@@ -0,0 +1,268 @@
+"""
+Per-session tracing and process-wide metrics
+
+A Tracer records one span per session, loop iteration, LLM call and tool call.
+Spans nest through a context variable: a tool span started on a worker thread
+gets the loop span as its parent, as long as the task runs in a copy of the
+caller's context (run_parallel does this). Finished traces are appended to a
+JSONL file and folded into a MetricsRegistry that renders the Prometheus text
+exposition format.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+_current_tracer: contextvars.ContextVar = contextvars.ContextVar("current_tracer", default=None)
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+# Upper bounds of the duration histogram buckets in seconds
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Span:
+    """One timed operation with its attributes"""
+
+    def __init__(self, name: str, kind: str, parent_id: Optional[str], attributes: Optional[dict] = None):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_time = time.time()
+        self.duration = 0.0
+        self.error: Optional[str] = None
+        self.attributes: dict = dict(attributes or {})
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def set(self, **attributes):
+        """Set attributes, e.g. span.set(prompt_tokens=812)"""
+        with self._lock:
+            self.attributes.update(attributes)
+
+    def increment(self, name: str, amount: int = 1):
+        """Add to a counter attribute, safe when several threads report to the same span"""
+        with self._lock:
+            self.attributes[name] = self.attributes.get(name, 0) + amount
+
+    def finish(self):
+        self.duration = time.perf_counter() - self._start
+
+    def to_dict(self, trace_id: str) -> dict:
+        return {
+            "trace_id": trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time": round(self.start_time, 6),
+            "duration_ms": round(self.duration * 1e3, 3),
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """Collects the spans of one session"""
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attributes):
+        """
+        Time a block as a child of the current span
+
+        Exceptions propagate, their class name is recorded as the span error.
+
+        Args:
+            name: Span name, e.g. "get_weather"
+            kind: "session", "loop", "llm" or "tool"
+            **attributes: Initial attributes
+
+        Yields:
+            The Span, for setting attributes while the block runs
+        """
+        parent = _current_span.get()
+        span = Span(name, kind, parent.span_id if parent is not None else None, attributes)
+        tracer_token = _current_tracer.set(self)
+        span_token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.finish()
+            _current_span.reset(span_token)
+            _current_tracer.reset(tracer_token)
+            with self._lock:
+                self.spans.append(span)
+
+    def to_dicts(self) -> List[dict]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_time)
+        return [span.to_dict(self.trace_id) for span in spans]
+
+    def format_lines(self) -> List[str]:
+        """Render the span tree as indented text lines, e.g. for the saved report"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_time)
+        children: Dict[Optional[str], List[Span]] = {}
+        for span in spans:
+            children.setdefault(span.parent_id, []).append(span)
+
+        lines = [f"Trace ID: {self.trace_id}"]
+
+        def render(span: Span, depth: int):
+            details = ", ".join(f"{key}={value}" for key, value in span.attributes.items())
+            error = f" [error: {span.error}]" if span.error else ""
+            lines.append(f"{'  ' * depth}- {span.name} ({span.kind}) {span.duration * 1e3:.1f} ms"
+                         f"{': ' + details if details else ''}{error}")
+            for child in children.get(span.span_id, []):
+                render(child, depth + 1)
+
+        span_ids = {span.span_id for span in spans}
+        for span in spans:
+            if span.parent_id is None or span.parent_id not in span_ids:
+                render(span, 0)
+        return lines
+
+
+def current_span() -> Optional[Span]:
+    """Span of the running operation, None outside of a traced session"""
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    """Trace ID of the running session, None outside of a traced session"""
+    tracer = _current_tracer.get()
+    return tracer.trace_id if tracer is not None else None
+
+
+@contextmanager
+def trace_span(name: str, kind: str, **attributes):
+    """Child span of the current session's tracer, a no-op yielding None outside of a session"""
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield None
+        return
+    with tracer.span(name, kind, **attributes) as span:
+        yield span
+
+
+def record_cache(hit: bool):
+    """Count a cache hit or miss on the current span"""
+    span = _current_span.get()
+    if span is not None:
+        span.increment("cache_hits" if hit else "cache_misses")
+
+
+class MetricsRegistry:
+    """Process-wide aggregates of finished spans, rendered in Prometheus text format"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        # (kind, name) -> [bucket counts..., count, sum]
+        self._durations: Dict[Tuple[str, str], list] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def _increment(self, metric: str, amount: float = 1, **labels):
+        key = (metric, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, tracer: Tracer):
+        """Fold the spans of a finished session into the aggregates"""
+        with tracer._lock:
+            spans = list(tracer.spans)
+        with self._lock:
+            for span in spans:
+                histogram = self._durations.setdefault((span.kind, span.name), [0] * len(self.buckets) + [0, 0.0])
+                for index, bound in enumerate(self.buckets):
+                    if span.duration <= bound:
+                        histogram[index] += 1
+                histogram[-2] += 1
+                histogram[-1] += span.duration
+
+                if span.error:
+                    self._increment("agent_errors_total", kind=span.kind, name=span.name, error=span.error)
+                attributes = span.attributes
+                for direction in ("prompt", "completion"):
+                    tokens = attributes.get(f"{direction}_tokens")
+                    if tokens:
+                        self._increment("agent_llm_tokens_total", tokens, direction=direction)
+                for attribute, result in (("cache_hits", "hit"), ("cache_misses", "miss")):
+                    if attributes.get(attribute):
+                        self._increment("agent_cache_requests_total", attributes[attribute], name=span.name, result=result)
+                if attributes.get("observation_chars"):
+                    self._increment("agent_observation_chars_total", attributes["observation_chars"], name=span.name)
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        def label_text(labels) -> str:
+            return ",".join(f'{key}="{str(value)}"' for key, value in labels)
+
+        lines = [
+            "# HELP agent_span_duration_seconds Duration of sessions, loops, LLM calls and tool calls",
+            "# TYPE agent_span_duration_seconds histogram",
+        ]
+        with self._lock:
+            for (kind, name), histogram in sorted(self._durations.items()):
+                labels = label_text([("kind", kind), ("name", name)])
+                for bound, count in zip(self.buckets, histogram):
+                    lines.append(f'agent_span_duration_seconds_bucket{{{labels},le="{bound:g}"}} {count}')
+                lines.append(f'agent_span_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram[-2]}')
+                lines.append(f"agent_span_duration_seconds_sum{{{labels}}} {histogram[-1]:.6f}")
+                lines.append(f"agent_span_duration_seconds_count{{{labels}}} {histogram[-2]}")
+
+            helps = {
+                "agent_errors_total": "Spans that ended with an error, by error class",
+                "agent_llm_tokens_total": "Prompt and completion tokens of LLM calls",
+                "agent_cache_requests_total": "Tool and LLM response cache lookups by result",
+                "agent_observation_chars_total": "Characters of tool observations",
+            }
+            for metric, help_text in helps.items():
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} counter")
+                for (name, labels), value in sorted(self._counters.items()):
+                    if name == metric:
+                        lines.append(f"{metric}{{{label_text(labels)}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = MetricsRegistry()
+_export_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry"""
+    return _metrics
+
+
+def export_trace(tracer: Tracer, trace_path: str, metrics_path: str):
+    """
+    Append a finished session's spans to a JSONL file and rewrite the metrics file
+
+    Args:
+        tracer: Tracer of the finished session
+        trace_path: JSONL file, one span per line
+        metrics_path: Prometheus text file, replaced atomically. It only holds this
+            process's counters, so every process needs its own file (e.g. with the pid
+            in its name), otherwise processes overwrite each other's metrics
+    """
+    _metrics.observe(tracer)
+    lines = "".join(json.dumps(span, ensure_ascii=False) + "\n" for span in tracer.to_dicts())
+    with _export_lock:
+        with open(trace_path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        temp_path = f"{metrics_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(_metrics.render())
+        os.replace(temp_path, metrics_path)
@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .parallel import run_shared, wait_shared
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache with per-entry expiry, bounded size and LRU eviction.
+
+    Concurrent loads of the same key are coalesced: only the first caller runs the
+    loader, the others wait for its result. The loader runs without the first
+    caller's deadline (see utils.parallel.run_shared), each caller waits only
+    until its own.
+    """
+
+    def __init__(self, max_size: int = 256, ttl: float = 600.0):
+        """
+        Args:
+            max_size: Maximum number of entries kept, least recently used entries are evicted first
+            ttl: Default time to live of an entry in seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # key -> future of the load in progress
+        self._flights: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh cached value, or default if missing or expired"""
+        with self._lock:
+            return self._get_locked(key, default)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entries if full"""
+        with self._lock:
+            self._set_locked(key, value, ttl)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any],
+                    ttl: Optional[float] = None) -> Any:
+        """
+        Return the cached value for key, calling loader on a miss
+
+        Exceptions raised by loader are propagated to every waiting caller and
+        nothing is cached, so failures are retried on the next call.
+
+        Args:
+            key: Cache key
+            loader: Zero-argument callable producing the value
+            ttl: Optional time to live overriding the cache default
+
+        Returns:
+            Cached or freshly loaded value
+
+        Raises:
+            TimeoutError: If the caller's deadline passed while waiting for the load
+        """
+        with self._lock:
+            value = self._get_locked(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = Future()
+                self._flights[key] = flight
+
+        if leader:
+            run_shared(flight, lambda: self._load(key, loader, ttl))
+        return wait_shared(flight)
+
+    def _load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float]) -> Any:
+        try:
+            value = loader()
+            self.set(key, value, ttl)
+            return value
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+    def invalidate(self, key: Hashable):
+        """Remove a single entry"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove all entries and reset counters"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _get_locked(self, key: Hashable, default: Any) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _set_locked(self, key: Hashable, value: Any, ttl: Optional[float]):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+
+_MISSING = object()